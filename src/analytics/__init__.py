@@ -0,0 +1,3 @@
+from .parquet_export import VIDEO_SCHEMA, export_videos, read_watermark
+
+__all__ = ["VIDEO_SCHEMA", "export_videos", "read_watermark"]
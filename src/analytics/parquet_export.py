@@ -0,0 +1,207 @@
+"""
+This file exports trending_video_data to Parquet for analytics, a batch at
+a time. Documents are streamed in _id order from the watermark left by the
+previous export, so a repeated export only moves documents stored since
+then. Each batch is converted to an Arrow record batch with a fixed schema.
+Counts still stored as strings are parsed, and upload dates become
+timestamps. Rows are appended to Hive-style partitions by the day the
+document was stored:
+
+    <output>/stored_date=2026-10-18/part-<first _id>.parquet
+
+Files are written under a temporary name and renamed once complete. The
+watermark is advanced only after that, so an interrupted export rewrites
+the same files on the next run instead of duplicating rows. Readers can
+pick the columns and partitions they need:
+
+    pq.read_table("video_export", columns=["title", "view_count"], filters=[("stored_date", ">=", "2026-10-01")])
+
+Usage (from src/); to export everything again, point --output at an empty directory:
+    python -m analytics.parquet_export --output video_export
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from bson import ObjectId
+from pymongo import ASCENDING
+from db import close_client, get_db
+from metrics import count, timed
+from video_scraper.stats_parser import normalize_stats
+
+DEFAULT_OUTPUT = "video_export"
+WATERMARK_FILE = "_watermark.json"
+EXPORT_BATCH_SIZE = 5000
+PARTITION_COLUMN = "stored_date"
+
+VIDEO_SCHEMA = pa.schema([
+    pa.field("_id", pa.string(), nullable=False),
+    pa.field("video_id", pa.string()),
+    pa.field("title", pa.string()),
+    pa.field("description", pa.string()),
+    pa.field("tags", pa.list_(pa.string())),
+    pa.field("view_count", pa.int64()),
+    pa.field("likes", pa.int64()),
+    pa.field("upload_date", pa.timestamp("ms", tz="UTC")),
+    pa.field("stored_at", pa.timestamp("ms", tz="UTC"), nullable=False),
+    pa.field("_hash", pa.string()),
+])
+PROJECTION = {"video_id": 1, "title": 1, "description": 1, "tags": 1, "view_count": 1, "likes": 1,
+              "upload_date": 1, "_hash": 1}
+
+# Watch pages rendered by the browser prefix the date for premieres and streams
+_date_prefix = re.compile(r"^(?:premiered|streamed live on|started streaming on|scheduled for)\s+", re.IGNORECASE)
+
+
+def read_watermark(directory):
+    path = os.path.join(directory, WATERMARK_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as file:
+        return ObjectId(json.load(file)["last_id"])
+
+
+def write_watermark(directory, last_id, exported):
+    path = os.path.join(directory, WATERMARK_FILE)
+    with open(f"{path}.tmp", "w", encoding="utf-8") as file:
+        json.dump({"last_id": str(last_id), "exported": exported}, file)
+    os.replace(f"{path}.tmp", path)
+
+
+def parse_upload_dates(values):
+    text = pd.Series([value if isinstance(value, str) else None for value in values], dtype="object")
+    text = text.str.replace(_date_prefix, "", regex=True)
+    # "Unknown" and relative dates ("3 hours ago") become nulls
+    return pd.to_datetime(text, errors="coerce", utc=True, format="mixed")
+
+
+def _strings(values):
+    return [value if isinstance(value, str) else None for value in values]
+
+
+def to_record_batch(documents):
+    """Convert a batch of stored videos to the fixed export schema."""
+    normalize_stats(documents)
+    stored_at = [document["_id"].generation_time for document in documents]
+    tags = [
+        [str(tag) for tag in document["tags"]] if isinstance(document.get("tags"), list) else None
+        for document in documents
+    ]
+    columns = {
+        "_id": [str(document["_id"]) for document in documents],
+        "video_id": _strings(document.get("video_id") for document in documents),
+        "title": _strings(document.get("title") for document in documents),
+        "description": _strings(document.get("description") for document in documents),
+        "tags": tags,
+        "view_count": [document.get("view_count") for document in documents],
+        "likes": [document.get("likes") for document in documents],
+        "upload_date": pa.Array.from_pandas(
+            parse_upload_dates([document.get("upload_date") for document in documents]).dt.floor("ms"),
+            type=VIDEO_SCHEMA.field("upload_date").type
+        ),
+        "stored_at": stored_at,
+        "_hash": _strings(document.get("_hash") for document in documents),
+    }
+    return pa.RecordBatch.from_pydict(columns, schema=VIDEO_SCHEMA)
+
+
+class PartitionedParquetWriter:
+    """One open file per partition for the current export, renamed into place on close."""
+
+    def __init__(self, directory, schema=VIDEO_SCHEMA):
+        self.directory = directory
+        self.schema = schema
+        self.files = []
+        self._writers = {}
+
+    def write(self, batch):
+        stored_dates = pc.strftime(batch.column("stored_at"), format="%Y-%m-%d")
+        table = pa.Table.from_batches([batch])
+        for partition in pc.unique(stored_dates).to_pylist():
+            rows = table.filter(pc.equal(stored_dates, partition))
+            writer = self._writers.get(partition)
+            if writer is None:
+                partition_dir = os.path.join(self.directory, f"{PARTITION_COLUMN}={partition}")
+                os.makedirs(partition_dir, exist_ok=True)
+                # Named after the first _id written, so a rerun over the same range replaces the file
+                path = os.path.join(partition_dir, f"part-{rows.column('_id')[0].as_py()}.parquet")
+                writer = self._writers[partition] = (path, pq.ParquetWriter(f"{path}.tmp", self.schema))
+            writer[1].write_table(rows)
+
+    def close(self):
+        for path, writer in self._writers.values():
+            writer.close()
+            os.replace(f"{path}.tmp", path)
+            self.files.append(path)
+        self._writers = {}
+
+    def abort(self):
+        for path, writer in self._writers.values():
+            writer.close()
+            os.remove(f"{path}.tmp")
+        self._writers = {}
+
+
+def export_videos(collection, directory=DEFAULT_OUTPUT, batch_size=EXPORT_BATCH_SIZE):
+    os.makedirs(directory, exist_ok=True)
+    watermark = read_watermark(directory)
+    query = {"_id": {"$gt": watermark}} if watermark is not None else {}
+    cursor = collection.find(query, PROJECTION).sort("_id", ASCENDING).batch_size(batch_size)
+    print(f"[INFO] Exporting {collection.name} to {directory} " +
+          (f"after {watermark}." if watermark is not None else "from the beginning."))
+
+    writer = PartitionedParquetWriter(directory)
+    exported = 0
+    last_id = watermark
+    batch = []
+    try:
+        for document in cursor:
+            batch.append(document)
+            if len(batch) >= batch_size:
+                exported, last_id = _write_batch(writer, batch, exported)
+                batch = []
+        if batch:
+            exported, last_id = _write_batch(writer, batch, exported)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.close()
+
+    if exported:
+        write_watermark(directory, last_id, exported)
+    print(f"[INFO] Exported {exported} documents into {len(writer.files)} file(s).")
+    return {"exported_count": exported, "files": writer.files, "last_id": str(last_id) if last_id else None}
+
+
+def _write_batch(writer, batch, exported):
+    with timed("parquet_export_batch"):
+        writer.write(to_record_batch(batch))
+    count("parquet_exported_total", len(batch))
+    exported += len(batch)
+    print(f"[INFO] Exported {exported} documents (through {batch[-1]['_id']}).")
+    return exported, batch[-1]["_id"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export stored videos to partitioned Parquet files.")
+    parser.add_argument("--collection", default="trending_video_data", help="Collection to export")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Output directory")
+    parser.add_argument("--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Documents per record batch")
+    args = parser.parse_args(argv)
+
+    collection, _ = get_db(args.collection)
+    try:
+        export_videos(collection, args.output, args.batch_size)
+    finally:
+        close_client()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
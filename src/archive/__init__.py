@@ -0,0 +1,3 @@
+from .page_archive import PageArchive, archive_page, enable_page_archive, get_page_archive
+
+__all__ = ["PageArchive", "archive_page", "enable_page_archive", "get_page_archive"]
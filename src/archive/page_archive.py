@@ -0,0 +1,208 @@
+"""
+This file keeps an optional archive of the raw search and watch pages the
+scraper fetches, so parsing fixes can be replayed offline instead of
+re-scraping. Pages are content-addressed by SHA-256, so identical HTML is
+stored once. Each page is compressed on its own (zstd when the zstandard
+package is installed, zlib otherwise) and appended to rolling segment files.
+A SQLite index maps every fetch (URL, kind, time) to its blob's segment,
+offset and length.
+
+The archive is off unless PAGE_ARCHIVE_DIR is set or enable_page_archive()
+is called.
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+import zlib
+from threading import Lock
+from urllib.parse import urlparse
+from metrics import count, timed
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_DIR = os.getenv("PAGE_ARCHIVE_DIR")
+INDEX_FILE = "index.sqlite3"
+SEGMENT_SIZE = 256 * 1024 * 1024
+ZSTD_LEVEL = 3
+ZLIB_LEVEL = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    codec TEXT NOT NULL,
+    raw_length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    fetched_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_pages_kind_time ON pages (kind, fetched_at);
+CREATE INDEX IF NOT EXISTS idx_pages_digest ON pages (digest);
+CREATE INDEX IF NOT EXISTS idx_pages_url_time ON pages (url, fetched_at);
+"""
+
+
+def page_kind(url):
+    path = urlparse(url).path
+    if path == "/watch":
+        return "watch"
+    if path == "/results":
+        return "search"
+    return "other"
+
+
+def compress(data):
+    if zstandard is not None:
+        return "zstd", zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return "zlib", zlib.compress(data, ZLIB_LEVEL)
+
+
+def decompress(codec, data):
+    if codec == "zlib":
+        return zlib.decompress(data)
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("This archive segment is zstd-compressed; install the zstandard package to read it.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError(f"Unknown archive codec: {codec}")
+
+
+class PageArchive:
+    def __init__(self, directory, segment_size=SEGMENT_SIZE):
+        self.directory = directory
+        self.segment_size = segment_size
+        os.makedirs(directory, exist_ok=True)
+        self._lock = Lock()
+        self._connection = sqlite3.connect(
+            os.path.join(directory, INDEX_FILE), timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._segment = None
+        self._segment_file = None
+
+    def _roll_segment(self):
+        if self._segment_file is not None:
+            self._segment_file.close()
+        # Named per process so several workers on one host can append to the same archive
+        self._segment = f"segment-{int(time.time())}-{os.getpid()}.bin"
+        self._segment_file = open(os.path.join(self.directory, self._segment), "ab")
+
+    def _has_blob(self, digest):
+        return self._connection.execute("SELECT 1 FROM blobs WHERE digest = ?", (digest,)).fetchone() is not None
+
+    def put(self, url, html, kind=None, fetched_at=None):
+        data = html.encode("utf-8") if isinstance(html, str) else html
+        digest = hashlib.sha256(data).hexdigest()
+        kind = kind or page_kind(url)
+        fetched_at = fetched_at or time.time()
+
+        with self._lock:
+            stored = self._has_blob(digest)
+        if not stored:
+            # Compressed outside the lock so other fetch threads only wait for the append
+            with timed("archive_compress"):
+                codec, compressed = compress(data)
+
+        with self._lock:
+            # Another thread may have stored the same page while this one was compressing
+            stored = stored or self._has_blob(digest)
+            if not stored:
+                with timed("archive_write"):
+                    if self._segment_file is None or self._segment_file.tell() >= self.segment_size:
+                        self._roll_segment()
+                    offset = self._segment_file.tell()
+                    self._segment_file.write(compressed)
+                    self._segment_file.flush()
+                self._connection.execute(
+                    "INSERT OR IGNORE INTO blobs (digest, segment, offset, length, codec, raw_length) VALUES (?, ?, ?, ?, ?, ?)",
+                    (digest, self._segment, offset, len(compressed), codec, len(data))
+                )
+                count("archive_bytes_total", len(compressed))
+            self._connection.execute(
+                "INSERT INTO pages (url, kind, digest, fetched_at) VALUES (?, ?, ?, ?)", (url, kind, digest, fetched_at)
+            )
+        count("archive_pages_total", kind=kind, outcome="stored" if not stored else "duplicate")
+        return digest
+
+    def read_blob(self, segment, offset, length, codec):
+        with open(os.path.join(self.directory, segment), "rb") as file:
+            file.seek(offset)
+            return decompress(codec, file.read(length)).decode("utf-8")
+
+    def get(self, digest):
+        row = self._connection.execute(
+            "SELECT segment, offset, length, codec FROM blobs WHERE digest = ?", (digest,)
+        ).fetchone()
+        return self.read_blob(*row) if row else None
+
+    def select(self, kind=None, since=None, until=None):
+        """Newest fetch of every URL in the range, ordered by position on disk for sequential reads."""
+        # Older versions of a URL are left out, so a replay never applies a stale page over a newer one
+        with self._lock:
+            return self._connection.execute(
+                "SELECT url, kind, fetched_at, segment, offset, length, codec FROM ("
+                "SELECT pages.url, pages.kind, pages.fetched_at, blobs.segment, blobs.offset, blobs.length, blobs.codec, "
+                "ROW_NUMBER() OVER (PARTITION BY pages.url ORDER BY pages.fetched_at DESC, pages.id DESC) AS recency "
+                "FROM pages JOIN blobs ON pages.digest = blobs.digest "
+                "WHERE (? IS NULL OR pages.kind = ?) AND (? IS NULL OR pages.fetched_at >= ?) AND (? IS NULL OR pages.fetched_at < ?)"
+                ") WHERE recency = 1 ORDER BY segment, offset",
+                (kind, kind, since, since, until, until)
+            ).fetchall()
+
+    def stats(self):
+        with self._lock:
+            pages, = self._connection.execute("SELECT COUNT(*) FROM pages").fetchone()
+            blobs, stored, raw = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(raw_length), 0) FROM blobs"
+            ).fetchone()
+        return {"pages": pages, "blobs": blobs, "stored_bytes": stored, "raw_bytes": raw}
+
+    def close(self):
+        with self._lock:
+            if self._segment_file is not None:
+                self._segment_file.close()
+                self._segment_file = None
+            self._connection.close()
+
+
+_archive = None
+_archive_lock = Lock()
+
+
+def enable_page_archive(directory=None):
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = PageArchive(directory or ARCHIVE_DIR or "page_archive")
+        return _archive
+
+
+def get_page_archive():
+    if _archive is None and ARCHIVE_DIR:
+        return enable_page_archive(ARCHIVE_DIR)
+    return _archive
+
+
+def archive_page(url, html, kind=None):
+    # A no-op unless the archive is enabled; archiving never fails a scrape
+    archive = get_page_archive()
+    if archive is None or not html:
+        return None
+    try:
+        return archive.put(url, html, kind)
+    except Exception as e:
+        print(f"[WARNING] Failed to archive {url}: {e}")
+        return None
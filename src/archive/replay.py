@@ -0,0 +1,145 @@
+"""
+This file re-runs the page parsers over the archived HTML, with no browser
+and no network. Blobs are read in segment order and parsed in a process
+pool, with a bounded number of chunks in flight. For the newest fetch of
+each URL it yields what the live scraper would have produced: the video
+fields for watch pages, or the result URLs for search pages. Watch pages
+archived by the WebDriver path are parsed the same way, since their page
+source still embeds the ytInitialData and ytInitialPlayerResponse JSON the
+HTTP parser reads. The results can be written to a JSON Lines file or
+applied to the stored videos by video_id.
+
+Usage (from src/):
+    python -m archive.replay --archive page_archive --kind watch --since 2026-09-01 --output reparsed.jsonl
+    python -m archive.replay --archive page_archive --kind watch --store trending_video_data
+"""
+
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
+from pymongo import ASCENDING, UpdateOne
+from db import close_client, get_db
+from video_scraper.http_extractor import extract_video_id, parse_search_results, parse_watch_page
+from video_scraper.stats_parser import normalize_stats
+from .page_archive import PageArchive, decompress
+
+REPLAY_CHUNK_SIZE = 200
+REPLAY_QUEUE_FACTOR = 2
+STORE_BATCH_SIZE = 500
+
+
+def parse_archived_page(url, kind, html):
+    if kind == "watch":
+        video_data = parse_watch_page(html)
+        if video_data:
+            video_data["video_id"] = extract_video_id(url)
+        return video_data
+    if kind == "search":
+        video_urls = parse_search_results(html)
+        return {"url": url, "video_urls": video_urls} if video_urls is not None else None
+    return None
+
+
+def parse_chunk(directory, rows):
+    # Runs in a worker process; each open segment is reused for the rows that follow it
+    results = []
+    files = {}
+    try:
+        for url, kind, fetched_at, segment, offset, length, codec in rows:
+            file = files.get(segment)
+            if file is None:
+                file = files[segment] = open(os.path.join(directory, segment), "rb")
+            file.seek(offset)
+            html = decompress(codec, file.read(length)).decode("utf-8")
+            parsed = parse_archived_page(url, kind, html)
+            if parsed:
+                parsed["archived_at"] = fetched_at
+                results.append(parsed)
+    finally:
+        for file in files.values():
+            file.close()
+    normalize_stats([result for result in results if "raw_stats" in result])
+    return results
+
+
+def replay(directory, kind=None, since=None, until=None, workers=None, chunk_size=REPLAY_CHUNK_SIZE):
+    archive = PageArchive(directory)
+    try:
+        rows = archive.select(kind, since, until)
+    finally:
+        archive.close()
+    # stderr, since the results themselves may be written to stdout
+    print(f"[INFO] Replaying {len(rows)} archived page(s) from {directory}.", file=sys.stderr)
+
+    workers = workers or os.cpu_count() or 1
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(rows), chunk_size):
+            # At most REPLAY_QUEUE_FACTOR chunks per process are parsed or waiting, and results keep their order
+            if len(pending) >= workers * REPLAY_QUEUE_FACTOR:
+                yield from pending.popleft().result()
+            pending.append(executor.submit(parse_chunk, directory, rows[start:start + chunk_size]))
+        while pending:
+            yield from pending.popleft().result()
+
+
+def store_replayed(collection, results):
+    # Without it every update by video_id would scan the whole collection
+    collection.create_index([("video_id", ASCENDING)])
+    updated = 0
+    fields = ("title", "description", "tags", "upload_date", "view_count", "likes")
+    while True:
+        batch = list(islice(results, STORE_BATCH_SIZE))
+        if not batch:
+            return updated
+        updates = [
+            UpdateOne({"video_id": video["video_id"]}, {"$set": {field: video[field] for field in fields if field in video}})
+            for video in batch if video.get("video_id")
+        ]
+        if updates:
+            updated += collection.bulk_write(updates, ordered=False).modified_count
+
+
+def parse_date(value):
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-parse archived YouTube pages offline.")
+    parser.add_argument("--archive", default="page_archive", help="Archive directory")
+    parser.add_argument("--kind", choices=["watch", "search"], default="watch", help="Page kind to replay")
+    parser.add_argument("--since", help="Only pages fetched on or after this ISO date")
+    parser.add_argument("--until", help="Only pages fetched before this ISO date")
+    parser.add_argument("--workers", type=int, help="Parser processes (default: CPU count)")
+    parser.add_argument("--output", help="Write results as JSON Lines to this file")
+    parser.add_argument("--store", metavar="COLLECTION", help="Update the stored videos in this collection by video_id")
+    args = parser.parse_args(argv)
+
+    results = replay(args.archive, args.kind, parse_date(args.since), parse_date(args.until), args.workers)
+    if args.store:
+        collection, _ = get_db(args.store)
+        try:
+            print(f"[INFO] Updated {store_replayed(collection, results)} stored video(s).")
+        finally:
+            close_client()
+    else:
+        output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+        written = 0
+        try:
+            for result in results:
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                written += 1
+        finally:
+            if args.output:
+                output.close()
+        print(f"[INFO] Replayed {written} page(s).", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
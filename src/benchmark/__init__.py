@@ -0,0 +1,4 @@
+from .fixture_server import FixtureServer
+from .run_benchmark import run_once
+
+__all__ = ["FixtureServer", "run_once"]
@@ -0,0 +1,184 @@
+"""
+This file serves recorded YouTube search and watch pages from a local HTTP
+server so the scraper can be benchmarked offline. Fixtures live in
+<fixtures>/search/*.html and <fixtures>/watch/*.html. A watch request is
+answered with watch/<video id>.html when it exists, and otherwise with a
+recorded page chosen deterministically from the video ID. Search pages get
+their video IDs rewritten per query, so every topic discovers distinct videos.
+Search continuation requests are answered with the same recorded results,
+rewritten per continuation token, so paging yields new videos as well.
+Comment continuation requests are answered from <fixtures>/comments/*.json.
+A response recorded under the requested token's name is replayed verbatim.
+Otherwise a recorded response is chosen from the token, with its comment
+IDs and tokens rewritten so every page holds new comments.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+from urllib.parse import parse_qs, urlparse
+from video_scraper.http_extractor import extract_embedded_json
+
+VIDEO_ID_PATTERN = re.compile(r'("videoId"\s*:\s*")([A-Za-z0-9_-]{11})(")')
+TOKEN_PATTERN = re.compile(r'("token"\s*:\s*")([^"]+)(")')
+COMMENT_ID_PATTERN = re.compile(r'("commentId"\s*:\s*")([^"]+)(")')
+
+
+class FixtureHTTPServer(ThreadingHTTPServer):
+    # The default backlog of 5 stalls connects once many workers hit the server at once
+    request_queue_size = 128
+    daemon_threads = True
+
+
+def load_fixtures(directory, extension=".html"):
+    pages = {}
+    if os.path.isdir(directory):
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(extension):
+                with open(os.path.join(directory, name), "r", encoding="utf-8") as file:
+                    pages[name[:-len(extension)]] = file.read()
+    return pages
+
+
+def pick(pages, key):
+    names = list(pages)
+    index = int(hashlib.sha1(key.encode()).hexdigest(), 16) % len(names)
+    return pages[names[index]]
+
+
+def rewrite_video_ids(html, query):
+    def replace(match):
+        digest = hashlib.sha1(f"{query}:{match.group(2)}".encode()).hexdigest()
+        return f"{match.group(1)}bm{digest[:9]}{match.group(3)}"
+    return VIDEO_ID_PATTERN.sub(replace, html)
+
+
+def rewrite_tokens(text, salt):
+    def replace(match):
+        return f"{match.group(1)}{hashlib.sha1(f'{salt}:{match.group(2)}'.encode()).hexdigest()[:16]}{match.group(3)}"
+    return TOKEN_PATTERN.sub(replace, text)
+
+
+def rewrite_comment_ids(text, salt):
+    def replace(match):
+        return f"{match.group(1)}{hashlib.sha1(f'{salt}:{match.group(2)}'.encode()).hexdigest()[:20]}{match.group(3)}"
+    return COMMENT_ID_PATTERN.sub(replace, text)
+
+
+class FixtureServer:
+    def __init__(self, fixtures_dir, host="127.0.0.1", port=0, latency=0.0):
+        self.search_pages = load_fixtures(os.path.join(fixtures_dir, "search"))
+        self.watch_pages = load_fixtures(os.path.join(fixtures_dir, "watch"))
+        # Optional; without them comment continuations get a 404
+        self.comment_pages = load_fixtures(os.path.join(fixtures_dir, "comments"), ".json")
+        if not self.search_pages or not self.watch_pages:
+            raise ValueError(f"No search or watch fixtures found in {fixtures_dir}")
+
+        self.latency = latency
+        self.request_count = 0
+        self._server = FixtureHTTPServer((host, port), self._make_handler())
+        self._thread = Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def render(self, path, query):
+        params = parse_qs(query)
+        if path == "/results":
+            search_query = params.get("search_query", [""])[0]
+            return rewrite_video_ids(pick(self.search_pages, search_query), search_query)
+        if path == "/watch":
+            video_id = params.get("v", [""])[0]
+            return self.watch_pages.get(video_id) or pick(self.watch_pages, video_id)
+        return None
+
+    def render_continuation(self, token):
+        # The recorded search JSON stands in for the next page; fresh tokens keep paging going
+        html = pick(self.search_pages, token)
+        initial_data = extract_embedded_json(html, "ytInitialData") or {}
+        page = {"onResponseReceivedCommands": [{"appendContinuationItemsAction": {"continuationItems": [initial_data]}}]}
+        return rewrite_tokens(rewrite_video_ids(json.dumps(page), token), token)
+
+    def render_comments(self, token):
+        if token in self.comment_pages:
+            return self.comment_pages[token]
+        if not self.comment_pages:
+            return None
+        return rewrite_tokens(rewrite_comment_ids(pick(self.comment_pages, token), token), token)
+
+    def _make_handler(self):
+        server = self
+
+        class FixtureHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                parsed = urlparse(self.path)
+                body = server.render(parsed.path, parsed.query)
+                if body is None:
+                    self.send_error(404)
+                    return
+
+                payload = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def do_POST(self):
+                server.request_count += 1
+                if server.latency:
+                    time.sleep(server.latency)
+
+                path = urlparse(self.path).path
+                if path not in ("/youtubei/v1/search", "/youtubei/v1/next"):
+                    self.send_error(404)
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    token = json.loads(self.rfile.read(length) or b"{}").get("continuation")
+                except ValueError:
+                    token = None
+                if not token:
+                    self.send_error(400)
+                    return
+
+                body = server.render_continuation(token) if path == "/youtubei/v1/search" else server.render_comments(token)
+                if body is None:
+                    self.send_error(404)
+                    return
+                payload = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return FixtureHandler
+
+    def start(self):
+        self._thread.start()
+        print(f"[INFO] Fixture server listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
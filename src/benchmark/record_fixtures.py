@@ -0,0 +1,42 @@
+"""
+This file records live YouTube search and watch pages into a fixtures
+directory for the offline benchmark. It saves the search page for each topic
+and the watch pages of its first few results.
+
+Usage (from src/):
+    python -m benchmark.record_fixtures --output path/to/fixtures --topics "jazz" "street art"
+"""
+
+import argparse
+import os
+import re
+from video_scraper.http_extractor import build_search_url, extract_video_id, fetch_html, parse_search_results
+
+
+def record(output_dir, topics, videos_per_topic=5):
+    os.makedirs(os.path.join(output_dir, "search"), exist_ok=True)
+    os.makedirs(os.path.join(output_dir, "watch"), exist_ok=True)
+
+    for topic in topics:
+        html = fetch_html(build_search_url(topic))
+        if not html:
+            continue
+        name = re.sub(r"[^A-Za-z0-9]+", "_", topic).strip("_").lower()
+        with open(os.path.join(output_dir, "search", f"{name}.html"), "w", encoding="utf-8") as file:
+            file.write(html)
+
+        for video_url in (parse_search_results(html) or [])[:videos_per_topic]:
+            watch_html = fetch_html(video_url)
+            if watch_html:
+                with open(os.path.join(output_dir, "watch", f"{extract_video_id(video_url)}.html"), "w", encoding="utf-8") as file:
+                    file.write(watch_html)
+        print(f"[INFO] Recorded fixtures for topic: {topic}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record YouTube pages for the offline benchmark.")
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--topics", nargs="+", required=True)
+    parser.add_argument("--videos-per-topic", type=int, default=5)
+    args = parser.parse_args()
+    record(args.output, args.topics, args.videos_per_topic)
@@ -0,0 +1,158 @@
+"""
+This file benchmarks the scraper end to end against the local fixture
+server. For every thread count it scrapes a set of synthetic topics and
+reports pages/sec, per-video latency percentiles, the share of worker time
+spent starting WebDrivers, and peak RSS. Results are written as JSON, and a
+previous results file can be passed with --compare to fail on regressions.
+Without --fixtures it runs on the recorded pages in tests/fixtures.
+
+Usage (from src/):
+    python -m benchmark.run_benchmark --threads 1 4 8 --topics 5
+    python -m benchmark.run_benchmark --fixtures path/to/fixtures --threads 1 4 8 --topics 5
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from threading import Lock
+import video_scraper.http_extractor as http_extractor
+import video_scraper.scheduler as scheduler
+import video_scraper.youtube_scraper as youtube_scraper
+from video_scraper.driver_pool import DriverPool
+from .fixture_server import FixtureServer
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "tests", "fixtures")
+DEFAULT_OUTPUT = "benchmark_results.json"
+DEFAULT_TOLERANCE = 0.10
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return {"self": round(own, 1), "children": round(children, 1)}
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def run_once(topics, thread_count):
+    latencies = []
+    latencies_lock = Lock()
+    scrape_video_details = scheduler.scrape_video_details
+
+    def timed_scrape(video_url, pool=None, deadline=None):
+        started = time.perf_counter()
+        try:
+            return scrape_video_details(video_url, pool, deadline)
+        finally:
+            with latencies_lock:
+                latencies.append(time.perf_counter() - started)
+
+    pool = DriverPool(max_size=thread_count)
+    scheduler.scrape_video_details = timed_scrape
+    started = time.perf_counter()
+    try:
+        results = scheduler.ScrapeScheduler(thread_count, pool).run(topics)
+    finally:
+        wall_seconds = time.perf_counter() - started
+        scheduler.scrape_video_details = scrape_video_details
+        pool.shutdown()
+
+    videos = sum(len(topic_results) for topic_results in results.values())
+    pages = len(latencies) + len(topics)
+    busy_seconds = sum(latencies)
+    return {
+        "threads": thread_count,
+        "topics": len(topics),
+        "videos_scraped": videos,
+        "pages": pages,
+        "wall_seconds": round(wall_seconds, 3),
+        "pages_per_sec": round(pages / wall_seconds, 2) if wall_seconds else None,
+        "latency_ms": {
+            name: round(value * 1000, 1) if value is not None else None
+            for name, value in (
+                ("p50", percentile(latencies, 0.50)),
+                ("p95", percentile(latencies, 0.95)),
+                ("p99", percentile(latencies, 0.99))
+            )
+        },
+        "drivers_started": pool.drivers_started,
+        "driver_startup_seconds": round(pool.startup_seconds, 3),
+        "driver_startup_share": round(pool.startup_seconds / busy_seconds, 4) if busy_seconds else 0.0,
+        "peak_rss_mb": peak_rss_mb()
+    }
+
+
+def compare(current, baseline_file, tolerance):
+    with open(baseline_file, "r") as file:
+        baseline = {run["threads"]: run for run in json.load(file)["runs"]}
+
+    regressions = []
+    for run in current["runs"]:
+        previous = baseline.get(run["threads"])
+        if not previous or not previous.get("pages_per_sec"):
+            continue
+        change = (run["pages_per_sec"] - previous["pages_per_sec"]) / previous["pages_per_sec"]
+        print(f"[INFO] threads={run['threads']}: {previous['pages_per_sec']} -> {run['pages_per_sec']} pages/sec ({change:+.1%})")
+        if change < -tolerance:
+            regressions.append(run["threads"])
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the YouTube scraper against recorded pages.")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES, help="Directory with search/ and watch/ HTML fixtures")
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8], help="Worker thread counts to run")
+    parser.add_argument("--topics", type=int, default=5, help="Number of synthetic topics per run")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Artificial server latency per request")
+    parser.add_argument("--mode", choices=["http", "driver"], default="http", help="Use the HTTP fast path or force WebDriver")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the JSON results")
+    parser.add_argument("--compare", help="Previous results file to compare pages/sec against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="Allowed pages/sec drop before failing")
+    args = parser.parse_args(argv)
+
+    topics = [f"benchmark topic {index}" for index in range(args.topics)]
+    youtube_scraper.USE_HTTP_FAST_PATH = args.mode == "http"
+
+    runs = []
+    with FixtureServer(args.fixtures, latency=args.latency_ms / 1000) as server:
+        http_extractor.YOUTUBE_BASE_URL = server.base_url
+        for thread_count in args.threads:
+            print(f"[INFO] Running benchmark with {thread_count} thread(s) over {len(topics)} topic(s)...")
+            run = run_once(topics, thread_count)
+            print(f"[INFO] {json.dumps(run)}")
+            runs.append(run)
+
+    report = {"revision": git_revision(), "mode": args.mode, "latency_ms": args.latency_ms, "runs": runs}
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print(f"[INFO] Benchmark results written to {args.output}")
+
+    if args.compare:
+        regressions = compare(report, args.compare, args.tolerance)
+        if regressions:
+            print(f"[ERROR] pages/sec regressed by more than {args.tolerance:.0%} for thread counts: {regressions}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
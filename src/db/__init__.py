@@ -1,3 +1,10 @@
 from .db import get_db, store_items_to_collection
+from .client import get_client, close_client
+from .sink import WriteBehindSink
+from .known_videos import KnownVideoIndex, get_known_video_index
+from .snapshots import SNAPSHOT_COLLECTION, get_series, record_snapshots
+from .tag_index import cooccurring_tags, rebuild_tag_index, tag_video_count, top_tags, top_videos_for_tag
 
-__all__ = ["get_db", "store_items_to_collection"]
\ No newline at end of file
+__all__ = ["get_db", "store_items_to_collection", "get_client", "close_client", "WriteBehindSink",
+           "KnownVideoIndex", "get_known_video_index", "SNAPSHOT_COLLECTION", "get_series", "record_snapshots",
+           "cooccurring_tags", "rebuild_tag_index", "tag_video_count", "top_tags", "top_videos_for_tag"]
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+This file re-normalizes the view and like counts already stored in
+trending_video_data. Documents are streamed in _id order, one chunk at a
+time. Each chunk's stored counts are parsed in one vectorized pass, and only
+the documents whose counts change are rewritten, with one unordered bulk
+update per chunk. The job is safe to stop and rerun; --after resumes after
+a given _id.
+
+Only counts stored as strings are repaired. The raw text behind a count the
+old scalar parser already turned into an int is not stored, so its mistakes
+cannot be undone from the document: an unparseable value became 0 and
+"1.2万" became 12. Those documents are left as they are.
+
+Usage (from src/):
+    python -m db.backfill_stats --collection trending_video_data --chunk-size 1000
+"""
+
+import argparse
+import sys
+from bson import ObjectId
+from pymongo import ASCENDING, UpdateOne
+from metrics import count, timed
+from video_scraper.stats_parser import normalize_stats
+from .client import close_client
+from .db import get_db
+
+BACKFILL_CHUNK_SIZE = 1000
+STAT_FIELDS = ("view_count", "likes")
+
+
+def iter_chunks(collection, chunk_size, after=None):
+    # Range scans on _id keep every chunk an index seek, unlike skip()
+    projection = {field: 1 for field in STAT_FIELDS}
+    while True:
+        query = {"_id": {"$gt": after}} if after is not None else {}
+        chunk = list(collection.find(query, projection).sort("_id", ASCENDING).limit(chunk_size))
+        if not chunk:
+            return
+        yield chunk
+        after = chunk[-1]["_id"]
+
+
+def backfill_stats(collection, chunk_size=BACKFILL_CHUNK_SIZE, after=None, dry_run=False):
+    scanned = updated = 0
+    for chunk in iter_chunks(collection, chunk_size, after):
+        before = [{field: document.get(field) for field in STAT_FIELDS} for document in chunk]
+        with timed("backfill_normalize"):
+            normalize_stats(chunk, STAT_FIELDS)
+
+        updates = [
+            UpdateOne({"_id": document["_id"]}, {"$set": {field: document[field] for field in STAT_FIELDS}})
+            for document, old in zip(chunk, before)
+            # Stored as a string, or parsed differently: both need rewriting
+            if any(type(document[field]) is not type(old[field]) or document[field] != old[field] for field in STAT_FIELDS)
+        ]
+        if updates and not dry_run:
+            with timed("backfill_write"):
+                collection.bulk_write(updates, ordered=False)
+
+        scanned += len(chunk)
+        updated += len(updates)
+        count("backfill_scanned_total", len(chunk))
+        count("backfill_updated_total", len(updates))
+        print(f"[INFO] Backfill scanned {scanned} documents, {'would update' if dry_run else 'updated'} {updated}. "
+              f"Last _id: {chunk[-1]['_id']}")
+    return {"scanned_count": scanned, "updated_count": updated}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-normalize stored view and like counts.")
+    parser.add_argument("--collection", default="trending_video_data", help="Collection to backfill")
+    parser.add_argument("--chunk-size", type=int, default=BACKFILL_CHUNK_SIZE, help="Documents per bulk update")
+    parser.add_argument("--after", help="Resume after this ObjectId")
+    parser.add_argument("--dry-run", action="store_true", help="Report changes without writing them")
+    args = parser.parse_args(argv)
+
+    collection, _ = get_db(args.collection)
+    try:
+        summary = backfill_stats(collection, args.chunk_size, ObjectId(args.after) if args.after else None, args.dry_run)
+        print(f"[INFO] Backfill complete: {summary}")
+    finally:
+        close_client()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,45 @@
+"""
+This file owns the process-wide MongoDB client. The client is created lazily
+on first use, every caller shares its connection pool, and it is closed once
+when the process exits.
+"""
+
+import atexit
+import os
+from threading import Lock
+from pymongo import MongoClient
+
+# Environment variables for MongoDB connection
+username = os.getenv("MONGO_USERNAME")
+password = os.getenv("MONGO_PASSWORD")
+host = os.getenv("MONGO_HOST")
+database_name = os.getenv("MONGO_DB")
+
+mongo_uri = f"mongodb+srv://{username}:{password}@{host}/{database_name}?retryWrites=true&w=majority"
+
+MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "20"))
+MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+
+_client = None
+_client_lock = Lock()
+
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            # connect=False defers DNS resolution and the TLS handshake to the first operation
+            _client = MongoClient(mongo_uri, maxPoolSize=MAX_POOL_SIZE, minPoolSize=MIN_POOL_SIZE, connect=False)
+        return _client
+
+
+def close_client():
+    global _client
+    with _client_lock:
+        client, _client = _client, None
+    if client is not None:
+        client.close()
+        print("[INFO] MongoDB client closed.")
+
+
+atexit.register(close_client)
@@ -1,25 +1,36 @@
 """
 This file connects to a MongoDB database and inserts items into a collection,
-using a hash to prevent duplicates. It retrieves database credentials from
-environment variables.
+using a hash to prevent duplicates. Connections come from the shared client
+in client.py. Items are written in unordered batches against a unique index
+on the hash, so duplicates are rejected by the server. An item with a
+video_id is upserted by it instead, so a video's static metadata is written
+once even when a re-scrape changes its title or description. Each batch
+also updates the tag inverted index in tag_index.py.
 """
 
-import os
 import hashlib
-from pymongo import MongoClient
+from threading import Lock
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, OperationFailure
+from metrics import count, timed
+from .client import get_client
+from .tag_index import update_tag_index
 
-# Environment variables for MongoDB connection
-username = os.getenv("MONGO_USERNAME")
-password = os.getenv("MONGO_PASSWORD")
-host = os.getenv("MONGO_HOST")
-database_name = os.getenv("MONGO_DB")
+DATABASE_NAME = "youtube_statistics"
+INSERT_BATCH_SIZE = 500
+DUPLICATE_KEY_ERROR = 11000
 
-mongo_uri = f"mongodb+srv://{username}:{password}@{host}/{database_name}?retryWrites=true&w=majority"
+# Collections whose unique _hash index has been checked, mapped to whether it is usable
+_hash_index_state = {}
+_hash_index_lock = Lock()
+# Collections whose video_id index has been created
+_video_id_indexed = set()
 
 def get_db(collection_name):
+    # The returned client is shared; close it with close_client() rather than client.close()
     try:
-        client = MongoClient(mongo_uri)
-        db = client['youtube_statistics']
+        client = get_client()
+        db = client[DATABASE_NAME]
         collection = db[collection_name]
         return collection, client
     except Exception as e:
@@ -31,7 +42,68 @@ def generate_hash(item):
     item_string = f"{item['title']}{item['description']}"
     return hashlib.sha256(item_string.encode()).hexdigest()
 
-def store_items_to_collection(collection_tuple_or_object, items):
+def ensure_hash_index(collection):
+    key = collection.full_name
+    with _hash_index_lock:
+        if key not in _hash_index_state:
+            try:
+                collection.create_index("_hash", unique=True)
+                _hash_index_state[key] = True
+            except OperationFailure as e:
+                # Legacy duplicates block the unique index; dedup with a lookup per batch instead
+                print(f"[WARNING] Could not create unique _hash index on {key}: {e}")
+                _hash_index_state[key] = False
+        return _hash_index_state[key]
+
+def ensure_video_id_index(collection):
+    key = collection.full_name
+    with _hash_index_lock:
+        if key in _video_id_indexed:
+            return
+        try:
+            # Partial, so items stored without a video_id never collide
+            collection.create_index("video_id", unique=True, partialFilterExpression={"video_id": {"$type": "string"}})
+        except OperationFailure as e:
+            # Legacy copies of a video block uniqueness; upserts still match one of them by video_id
+            print(f"[WARNING] Could not create unique video_id index on {key}: {e}")
+            collection.create_index("video_id")
+        _video_id_indexed.add(key)
+
+def upsert_by_video_id(collection, documents):
+    # Inserts only videos not stored yet; a stored video's document is left as it is
+    if not documents:
+        return []
+    updates = [
+        UpdateOne(
+            {"video_id": document["video_id"]},
+            {"$setOnInsert": {field: value for field, value in document.items() if field != "_id"}},
+            upsert=True
+        )
+        for document in documents
+    ]
+    try:
+        return list(collection.bulk_write(updates, ordered=False).upserted_ids.values())
+    except BulkWriteError as e:
+        # Two writers inserting one video at once, or another video with the same hash: a dedup hit
+        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+            raise
+        return [upserted["_id"] for upserted in e.details.get("upserted", [])]
+
+def insert_unique(collection, documents):
+    # Unordered insert where duplicate-key rejections count as dedup hits, not failures
+    if not documents:
+        return []
+    try:
+        collection.insert_many(documents, ordered=False)
+        return [document["_id"] for document in documents]
+    except BulkWriteError as e:
+        write_errors = e.details.get("writeErrors", [])
+        if any(error.get("code") != DUPLICATE_KEY_ERROR for error in write_errors):
+            raise
+        rejected = {error["index"] for error in write_errors}
+        return [document["_id"] for index, document in enumerate(documents) if index not in rejected]
+
+def store_items_to_collection(collection_tuple_or_object, items, index_tags=True):
     try:
         if isinstance(collection_tuple_or_object, tuple):
             collection = collection_tuple_or_object[0]
@@ -41,23 +113,51 @@ def store_items_to_collection(collection_tuple_or_object, items):
         if isinstance(items, dict):
             items = [items]
 
-        inserted_count = 0
+        has_unique_index = ensure_hash_index(collection)
+        ensure_video_id_index(collection)
         inserted_ids = []
+        duplicate_count = 0
+
+        for start in range(0, len(items), INSERT_BATCH_SIZE):
+            batch = {}
+            video_ids = set()
+            for item in items[start:start + INSERT_BATCH_SIZE]:
+                # Prevent duplicates based on a unique hash
+                item["_hash"] = generate_hash(item)
+                if item["_hash"] in batch or item.get("video_id") in video_ids:
+                    duplicate_count += 1
+                    continue
+                batch[item["_hash"]] = item
+                if item.get("video_id"):
+                    video_ids.add(item["video_id"])
+            # Duplicates are indexed too, which refreshes the counts their postings rank by
+            candidates = list(batch.values())
+
+            if not has_unique_index:
+                existing = collection.find({"_hash": {"$in": list(batch)}}, {"_hash": 1})
+                for document in existing:
+                    batch.pop(document["_hash"], None)
+                    duplicate_count += 1
 
-        for item in items:
-            # Prevent duplicates based on a unique hash
-            item_hash = generate_hash(item)
-            if collection.find_one({"_hash": item_hash}):
-                print(f"[INFO] Duplicate detected: {item['title']}")
-                continue
+            with timed("mongo_write"):
+                batch_ids = upsert_by_video_id(collection, [item for item in batch.values() if item.get("video_id")])
+                batch_ids += insert_unique(collection, [item for item in batch.values() if not item.get("video_id")])
+            duplicate_count += len(batch) - len(batch_ids)
+            inserted_ids.extend(batch_ids)
 
-            item["_hash"] = item_hash
-            result = collection.insert_one(item)
-            inserted_count += 1
-            inserted_ids.append(result.inserted_id)
+            if index_tags:
+                try:
+                    update_tag_index(collection.database, candidates)
+                except Exception as e:
+                    # The videos are stored; a rebuild with db.tag_index --rebuild repairs any gap
+                    print(f"[ERROR] Failed to update the tag index: {e}")
 
-        print(f"[INFO] Inserted {inserted_count} new items.")
-        return {"inserted_count": inserted_count, "ids": inserted_ids}
+        count("mongo_inserted_total", len(inserted_ids))
+        count("mongo_duplicates_total", duplicate_count)
+        if duplicate_count:
+            print(f"[INFO] Skipped {duplicate_count} duplicate items.")
+        print(f"[INFO] Inserted {len(inserted_ids)} new items.")
+        return {"inserted_count": len(inserted_ids), "ids": inserted_ids}
     except Exception as e:
         print(f"[ERROR] Failed to insert items into collection: {e}")
         raise
@@ -0,0 +1,105 @@
+"""
+This file keeps an in-memory index of YouTube video IDs that are already in
+MongoDB, preloaded from the trending_video_data collection. The scraper
+checks it before queueing a video so known videos are never fetched again.
+With a refresh TTL, entries older than the TTL count as unknown so those
+videos are scraped again. A video's age is taken from its latest count
+snapshot, falling back to when its document was stored. A claim made before scraping is held until the
+video is stored. It is released if the scrape or the write fails, so the
+video can be tried again later in the same process.
+"""
+
+import time
+from threading import Lock
+from .snapshots import SNAPSHOT_COLLECTION
+
+LOAD_BATCH_SIZE = 5000
+
+
+class KnownVideoIndex:
+    def __init__(self, refresh_ttl=None):
+        self.refresh_ttl = refresh_ttl
+        self._last_seen = {}
+        # Videos claimed for scraping but not yet stored, mapped to the entry the claim replaced
+        self._claimed = {}
+        self._lock = Lock()
+
+    def __len__(self):
+        return len(self._last_seen)
+
+    def load(self, collection):
+        # The ObjectId creation time stands in for when the video was stored
+        cursor = collection.find({"video_id": {"$exists": True}}, {"video_id": 1}).batch_size(LOAD_BATCH_SIZE)
+        loaded = 0
+        with self._lock:
+            for document in cursor:
+                stored_at = document["_id"].generation_time.timestamp()
+                video_id = document["video_id"]
+                if stored_at > self._last_seen.get(video_id, 0):
+                    self._last_seen[video_id] = stored_at
+                loaded += 1
+            if self.refresh_ttl is not None:
+                # A re-scrape only appends a snapshot, so the stored document's age says nothing about it
+                for document in collection.database[SNAPSHOT_COLLECTION].aggregate([
+                    {"$group": {"_id": "$video_id", "last_seen": {"$max": "$last.t"}}}
+                ]):
+                    if document["last_seen"] and document["last_seen"] > self._last_seen.get(document["_id"], 0):
+                        self._last_seen[document["_id"]] = document["last_seen"]
+        print(f"[INFO] Loaded {loaded} known videos ({len(self._last_seen)} unique IDs).")
+        return self
+
+    def _is_fresh(self, video_id):
+        last_seen = self._last_seen.get(video_id)
+        if last_seen is None:
+            return False
+        return self.refresh_ttl is None or time.time() - last_seen < self.refresh_ttl
+
+    def is_known(self, video_id):
+        with self._lock:
+            return self._is_fresh(video_id)
+
+    def claim(self, video_id):
+        # Marks the video as seen and reports whether it still needs scraping
+        with self._lock:
+            if self._is_fresh(video_id):
+                return False
+            self._claimed[video_id] = self._last_seen.get(video_id)
+            self._last_seen[video_id] = time.time()
+            return True
+
+    def release(self, video_id):
+        # Gives up a claim whose video was not stored, restoring what the index knew before it
+        with self._lock:
+            if video_id not in self._claimed:
+                return
+            previous = self._claimed.pop(video_id)
+            if previous is None:
+                self._last_seen.pop(video_id, None)
+            else:
+                self._last_seen[video_id] = previous
+
+    def mark_stored(self, video_ids):
+        with self._lock:
+            for video_id in video_ids:
+                self._claimed.pop(video_id, None)
+                self._last_seen[video_id] = time.time()
+
+    def is_stored(self, video_id):
+        # Fresh and not merely claimed: loaded from MongoDB or written by this process
+        with self._lock:
+            return self._is_fresh(video_id) and video_id not in self._claimed
+
+
+_shared_index = None
+_shared_index_lock = Lock()
+
+
+def get_known_video_index(collection, refresh_ttl=None):
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = KnownVideoIndex(refresh_ttl).load(collection)
+        elif _shared_index.refresh_ttl != refresh_ttl:
+            raise ValueError(f"The known video index was created with refresh_ttl={_shared_index.refresh_ttl}, "
+                             f"not {refresh_ttl}.")
+        return _shared_index
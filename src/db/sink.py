@@ -0,0 +1,125 @@
+"""
+This file streams scraped items into MongoDB as they arrive. Producers push
+into a bounded queue and a background thread writes micro-batches whenever
+enough items have piled up or the flush interval has passed. A full queue
+blocks producers until MongoDB catches up, and closing the sink drains it.
+Raw view and like strings are parsed into counts once per batch. With a
+snapshot collection, every item's counts are also appended to its time
+series, whether the item was new or a duplicate of a stored video.
+"""
+
+import time
+from queue import Empty, Queue
+from threading import Thread
+from video_scraper.stats_parser import normalize_stats
+from .db import store_items_to_collection
+from .snapshots import record_snapshots
+
+FLUSH_BATCH_SIZE = 50
+FLUSH_INTERVAL = 5
+MAX_PENDING_ITEMS = 500
+FLUSH_RETRIES = 3
+
+_STOP = object()
+
+
+class WriteBehindSink:
+    def __init__(self, collection, batch_size=FLUSH_BATCH_SIZE, flush_interval=FLUSH_INTERVAL, max_pending=MAX_PENDING_ITEMS,
+                 on_flush=None, on_error=None, snapshots=None):
+        self.collection = collection
+        # Collection that receives a view and like reading for every item flushed
+        self.snapshots = snapshots
+        # Called with each batch after it has been written successfully
+        self.on_flush = on_flush
+        # Called with each batch that could not be written after every retry
+        self.on_error = on_error
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.received_count = 0
+        self.inserted_count = 0
+        self.failed_count = 0
+        self._queue = Queue(maxsize=max_pending)
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, item):
+        # Blocks while the queue is full, which throttles producers to the write rate
+        self._queue.put(item)
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+        print(f"[INFO] Sink closed. Received {self.received_count} items, inserted {self.inserted_count}, failed {self.failed_count}.")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            try:
+                item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+            except Empty:
+                item = None
+
+            if item is _STOP:
+                self._flush(batch)
+                return
+            if item is not None:
+                batch.append(item)
+                self.received_count += 1
+
+            if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(batch)
+                batch = []
+                deadline = time.monotonic() + self.flush_interval
+
+    def _flush(self, batch):
+        if not batch:
+            return
+        try:
+            self._write(batch)
+        except Exception as e:
+            # The batch fails instead of the thread, which keeps draining so producers and close() never hang
+            print(f"[ERROR] Failed to process a batch of {len(batch)} items: {e}")
+            self._fail(batch)
+
+    def _fail(self, batch):
+        self.failed_count += len(batch)
+        if self.on_error:
+            try:
+                self.on_error(batch)
+            except Exception as e:
+                print(f"[ERROR] Flush error callback failed: {e}")
+
+    def _write(self, batch):
+        # One vectorized pass turns the batch's raw view and like strings into counts
+        normalize_stats(batch)
+        for attempt in range(1, FLUSH_RETRIES + 1):
+            try:
+                result = store_items_to_collection(self.collection, batch)
+                self.inserted_count += result["inserted_count"]
+                break
+            except Exception as e:
+                print(f"[ERROR] Failed to flush {len(batch)} items (attempt {attempt}/{FLUSH_RETRIES}): {e}")
+                time.sleep(attempt)
+        else:
+            self._fail(batch)
+            return
+
+        if self.snapshots is not None:
+            try:
+                record_snapshots(self.snapshots, batch)
+            except Exception as e:
+                # The videos themselves are stored; a missed reading only leaves a gap in the series
+                print(f"[ERROR] Failed to record snapshots for {len(batch)} items: {e}")
+
+        if self.on_flush:
+            try:
+                self.on_flush(batch)
+            except Exception as e:
+                print(f"[ERROR] Flush callback failed: {e}")
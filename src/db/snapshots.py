@@ -0,0 +1,110 @@
+"""
+This file records how each video's view and like counts change over time.
+The video's static metadata stays in trending_video_data, written once; only
+the readings go here. Readings are grouped into one bucket document per
+video per UTC day. A bucket keeps the day's first value of each count, and
+every reading is appended as deltas from the reading before it. A video that
+is scraped again and again therefore grows a few small integer arrays, not
+a pile of full copies. Each reading is appended with one pipeline update, so
+workers never have to read a bucket before writing it.
+"""
+
+import time
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from metrics import count, timed
+from .db import DUPLICATE_KEY_ERROR
+
+SNAPSHOT_COLLECTION = "video_snapshots"
+SNAPSHOT_FIELDS = ("view_count", "likes")
+
+
+def bucket_day(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime("%Y-%m-%d")
+
+
+def bucket_id(video_id, day):
+    return f"{video_id}:{day}"
+
+
+def _delta(field, value):
+    # The first reading of a count in a bucket has delta 0; a missing reading has no delta
+    if value is None:
+        return None
+    return {"$subtract": [value, {"$ifNull": [f"$last.{field}", value]}]}
+
+
+def _append_reading(video_id, timestamp, readings):
+    day = bucket_day(timestamp)
+    appended = {"t": {"$subtract": [timestamp, {"$ifNull": ["$last.t", timestamp]}]}}
+    appended.update({field: _delta(field, value) for field, value in readings.items()})
+    return UpdateOne(
+        {"_id": bucket_id(video_id, day)},
+        [
+            {"$set": {
+                "video_id": {"$literal": video_id},
+                "day": day,
+                "start": {"$ifNull": ["$start", timestamp]},
+                **{f"first.{field}": {"$ifNull": [f"$first.{field}", value]} for field, value in readings.items()},
+                **{
+                    f"deltas.{key}": {"$concatArrays": [{"$ifNull": [f"$deltas.{key}", []]}, [expression]]}
+                    for key, expression in appended.items()
+                },
+                "count": {"$add": [{"$ifNull": ["$count", 0]}, 1]},
+            }},
+            # A separate stage, so the deltas above are taken against the previous last reading
+            {"$set": {
+                "last.t": timestamp,
+                **{f"last.{field}": {"$ifNull": [value, f"$last.{field}"]} for field, value in readings.items()},
+            }},
+        ],
+        upsert=True
+    )
+
+
+def record_snapshots(collection, items, timestamp=None):
+    """Append one reading per video in `items`, new or already stored."""
+    timestamp = int(timestamp or time.time())
+    # One reading per video per call; a video repeated within a batch keeps its latest counts
+    readings = {}
+    for item in items:
+        if item.get("video_id"):
+            readings[item["video_id"]] = {field: item.get(field) for field in SNAPSHOT_FIELDS}
+    if not readings:
+        return 0
+
+    updates = [_append_reading(video_id, timestamp, values) for video_id, values in readings.items()]
+    with timed("snapshot_write"):
+        try:
+            collection.bulk_write(updates, ordered=False)
+        except BulkWriteError as e:
+            # Two writers upserting a new bucket at once: the loser's update now finds the bucket
+            write_errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in write_errors):
+                raise
+            collection.bulk_write([updates[error["index"]] for error in write_errors], ordered=False)
+    count("snapshots_recorded_total", len(updates))
+    return len(updates)
+
+
+def get_series(collection, video_id, since=None, until=None):
+    """Rebuild a video's readings as (timestamp, view_count, likes) tuples, oldest first."""
+    query = {"_id": {"$gte": bucket_id(video_id, bucket_day(since) if since else ""), "$lt": f"{video_id};"}}
+    series = []
+    for bucket in collection.find(query).sort("_id", 1):
+        timestamp = bucket["start"]
+        values = {field: bucket.get("first", {}).get(field) for field in SNAPSHOT_FIELDS}
+        running = dict.fromkeys(SNAPSHOT_FIELDS, None)
+        deltas = bucket.get("deltas", {})
+        for index, step in enumerate(deltas.get("t", [])):
+            timestamp += step
+            reading = []
+            for field in SNAPSHOT_FIELDS:
+                delta = deltas.get(field, [])[index] if index < len(deltas.get(field, [])) else None
+                if delta is not None:
+                    running[field] = (values[field] if running[field] is None else running[field]) + delta
+                reading.append(running[field] if delta is not None else None)
+            if (since is None or timestamp >= since) and (until is None or timestamp < until):
+                series.append((timestamp, *reading))
+    return series
@@ -0,0 +1,251 @@
+"""
+This file maintains an inverted index from video tags to the stored videos.
+It is updated by store_items_to_collection on every batch, so it stays
+current while scraping runs. There is one small posting document per tag
+and video. It holds the video's ID, hash and latest counts, and nothing
+else of the video, so tag lookups are index reads. Per-tag video counts and
+tag pair co-occurrence counts are incremented only for postings that did
+not exist yet, which makes re-storing a video idempotent. Postings are keyed
+by video_id, falling back to the hash only for items without one, so a
+re-scraped video whose title or counts changed updates its postings instead
+of being counted again. A tag the re-scraped video no longer carries has
+its posting deleted and its counts decremented.
+
+Usage (from src/), to index videos stored before the index existed:
+    python -m db.tag_index --rebuild --collection trending_video_data
+"""
+
+import argparse
+import re
+import sys
+from collections import Counter
+from itertools import combinations
+from threading import Lock
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from metrics import count, timed
+from .client import close_client
+
+TAG_POSTINGS_COLLECTION = "tag_postings"
+TAG_COUNTS_COLLECTION = "tag_counts"
+TAG_PAIRS_COLLECTION = "tag_pairs"
+MAX_TAGS_PER_VIDEO = 50
+# Pairs grow with the square of the tag count, so co-occurrence only looks at a video's first tags
+MAX_PAIR_TAGS = 20
+REBUILD_BATCH_SIZE = 1000
+# Joins tag and video key into a posting _id, and a tag pair into a pair _id
+KEY_SEPARATOR = "\x1f"
+
+_whitespace = re.compile(r"\s+")
+_indexed_databases = set()
+_indexed_databases_lock = Lock()
+
+
+def normalize_tag(tag):
+    return _whitespace.sub(" ", tag).strip().lower() if isinstance(tag, str) else ""
+
+
+def video_tags(item):
+    tags = []
+    for tag in item.get("tags") or []:
+        tag = normalize_tag(tag)
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags[:MAX_TAGS_PER_VIDEO]
+
+
+def video_key(item):
+    return item.get("video_id") or item.get("_hash")
+
+
+def ensure_tag_indexes(database):
+    with _indexed_databases_lock:
+        if database.name in _indexed_databases:
+            return
+        database[TAG_POSTINGS_COLLECTION].create_index([("tag", ASCENDING), ("view_count", DESCENDING)])
+        database[TAG_POSTINGS_COLLECTION].create_index([("video_key", ASCENDING)])
+        database[TAG_COUNTS_COLLECTION].create_index([("video_count", DESCENDING)])
+        database[TAG_PAIRS_COLLECTION].create_index([("tags", ASCENDING), ("count", DESCENDING)])
+        _indexed_databases.add(database.name)
+
+
+def posting_id(tag, key):
+    return f"{tag}{KEY_SEPARATOR}{key}"
+
+
+def tag_pairs(tags):
+    return {tuple(sorted(pair)) for pair in combinations(tags[:MAX_PAIR_TAGS], 2)}
+
+
+def update_tag_index(database, items):
+    """Bring every item's postings in line with its tags, then count the postings added and removed."""
+    # A video repeated within the batch is posted once, with its latest tags and counts
+    videos = {}
+    for item in items:
+        if video_key(item):
+            videos[video_key(item)] = item
+    if not videos:
+        return 0
+
+    ensure_tag_indexes(database)
+    postings = database[TAG_POSTINGS_COLLECTION]
+    with timed("tag_index_write"):
+        # The tags each video is posted under now, with their position in its tag list
+        previous = {}
+        for posting in postings.find({"video_key": {"$in": list(videos)}}, {"video_key": 1, "tag": 1, "rank": 1}):
+            previous.setdefault(posting["video_key"], {})[posting["tag"]] = posting.get("rank", 0)
+
+        updates = []
+        posted = {}
+        removed = []
+        for key, item in videos.items():
+            tags = video_tags(item)
+            for rank, tag in enumerate(tags):
+                updates.append(UpdateOne(
+                    {"_id": posting_id(tag, key)},
+                    {
+                        "$set": {"view_count": item.get("view_count"), "likes": item.get("likes"),
+                                 "_hash": item.get("_hash"), "rank": rank},
+                        "$setOnInsert": {"tag": tag, "video_id": item.get("video_id"), "video_key": key},
+                    },
+                    upsert=True
+                ))
+                posted[posting_id(tag, key)] = (key, tag)
+            removed.extend((key, tag) for tag in previous.get(key, {}) if tag not in tags)
+
+        added_tags = {}
+        if updates:
+            result = postings.bulk_write(updates, ordered=False)
+            # Upserted _ids are the posting ids, which name the video and tag that were added
+            for upserted_id in result.upserted_ids.values():
+                key, tag = posted[upserted_id]
+                added_tags.setdefault(key, []).append(tag)
+        removed_tags = {}
+        for key, tag in removed:
+            # Deleted one by one, so a tag dropped by two writers at once is only counted down once
+            if postings.delete_one({"_id": posting_id(tag, key)}).deleted_count:
+                removed_tags.setdefault(key, []).append(tag)
+
+        tag_counts = Counter(tag for tags in added_tags.values() for tag in tags)
+        tag_counts.subtract(tag for tags in removed_tags.values() for tag in tags)
+        _apply_deltas(database[TAG_COUNTS_COLLECTION], "video_count", tag_counts)
+
+        # Only videos whose postings this writer changed move the pair counts; a reordered tag list does not
+        pair_counts = Counter()
+        for key in added_tags.keys() | removed_tags.keys():
+            old_tags = sorted(previous.get(key, {}), key=previous.get(key, {}).get)
+            old_pairs = tag_pairs(old_tags)
+            new_pairs = tag_pairs(video_tags(videos[key]))
+            pair_counts.update(new_pairs - old_pairs)
+            pair_counts.subtract(old_pairs - new_pairs)
+        _apply_deltas(database[TAG_PAIRS_COLLECTION], "count",
+                      Counter({KEY_SEPARATOR.join(pair): delta for pair, delta in pair_counts.items()}),
+                      lambda pair_id: {"tags": pair_id.split(KEY_SEPARATOR)})
+
+    added = sum(len(tags) for tags in added_tags.values())
+    count("tag_postings_added_total", added)
+    count("tag_postings_removed_total", sum(len(tags) for tags in removed_tags.values()))
+    return added
+
+
+def _apply_deltas(collection, field, deltas, on_insert=None):
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    updates = []
+    for key, delta in deltas.items():
+        update = {"$inc": {field: delta}}
+        if on_insert:
+            update["$setOnInsert"] = on_insert(key)
+        updates.append(UpdateOne({"_id": key}, update, upsert=True))
+    collection.bulk_write(updates, ordered=False)
+    # A tag or pair no video carries any more is dropped rather than left at zero
+    decremented = [key for key, delta in deltas.items() if delta < 0]
+    if decremented:
+        collection.delete_many({"_id": {"$in": decremented}, field: {"$lte": 0}})
+
+
+def top_videos_for_tag(database, tag, k=10):
+    """The k most viewed stored videos with this tag, as posting documents."""
+    cursor = database[TAG_POSTINGS_COLLECTION].find(
+        {"tag": normalize_tag(tag)}, {"_id": 0, "video_id": 1, "_hash": 1, "view_count": 1, "likes": 1}
+    )
+    return list(cursor.sort("view_count", DESCENDING).limit(k))
+
+
+def cooccurring_tags(database, tag, k=10):
+    """The k tags that appear most often on the same videos as this tag, as (tag, count) pairs."""
+    tag = normalize_tag(tag)
+    cursor = database[TAG_PAIRS_COLLECTION].find({"tags": tag}, {"tags": 1, "count": 1})
+    return [
+        (next((other for other in pair["tags"] if other != tag), tag), pair["count"])
+        for pair in cursor.sort("count", DESCENDING).limit(k)
+    ]
+
+
+def tag_video_count(database, tag):
+    document = database[TAG_COUNTS_COLLECTION].find_one({"_id": normalize_tag(tag)})
+    return document["video_count"] if document else 0
+
+
+def top_tags(database, k=10):
+    cursor = database[TAG_COUNTS_COLLECTION].find()
+    return [(document["_id"], document["video_count"]) for document in cursor.sort("video_count", DESCENDING).limit(k)]
+
+
+def rebuild_tag_index(collection, batch_size=REBUILD_BATCH_SIZE):
+    """Drop the index and rebuild it from every stored video, streaming in _id order."""
+    database = collection.database
+    for name in (TAG_POSTINGS_COLLECTION, TAG_COUNTS_COLLECTION, TAG_PAIRS_COLLECTION):
+        database.drop_collection(name)
+    with _indexed_databases_lock:
+        _indexed_databases.discard(database.name)
+
+    projection = {"tags": 1, "video_id": 1, "_hash": 1, "view_count": 1, "likes": 1}
+    cursor = collection.find({"tags.0": {"$exists": True}}, projection).sort("_id", ASCENDING).batch_size(batch_size)
+    scanned = added = 0
+    batch = []
+    for document in cursor:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            added += update_tag_index(database, batch)
+            scanned += len(batch)
+            batch = []
+            print(f"[INFO] Indexed tags of {scanned} videos ({added} postings).")
+    if batch:
+        added += update_tag_index(database, batch)
+        scanned += len(batch)
+    print(f"[INFO] Tag index rebuilt from {scanned} videos with {added} postings.")
+    return {"scanned_count": scanned, "posting_count": added}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query or rebuild the tag inverted index.")
+    parser.add_argument("--collection", default="trending_video_data", help="Collection of stored videos")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the index from the stored videos")
+    parser.add_argument("--tag", help="Show the top videos and co-occurring tags for this tag")
+    parser.add_argument("-k", type=int, default=10, help="Number of results")
+    args = parser.parse_args(argv)
+
+    # Imported here because db.py imports this module to update the index
+    from .db import get_db
+    collection, _ = get_db(args.collection)
+    database = collection.database
+    try:
+        if args.rebuild:
+            rebuild_tag_index(collection)
+        if args.tag:
+            print(f"[INFO] '{args.tag}' is on {tag_video_count(database, args.tag)} videos.")
+            for video in top_videos_for_tag(database, args.tag, args.k):
+                print(f"  {video.get('video_id')}  views={video.get('view_count')}")
+            for other, together in cooccurring_tags(database, args.tag, args.k):
+                print(f"  with '{other}': {together}")
+        elif not args.rebuild:
+            for tag, videos in top_tags(database, args.k):
+                print(f"  {tag}: {videos}")
+    finally:
+        close_client()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
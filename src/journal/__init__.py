@@ -0,0 +1,3 @@
+from .work_journal import WorkJournal
+
+__all__ = ["WorkJournal"]
@@ -0,0 +1,191 @@
+"""
+This file keeps an on-disk journal of scraping work in SQLite (WAL mode). It
+tracks each topic, the video URLs discovered for it, and the state of every
+URL (pending, in_flight, done, failed) with attempt counts. An interrupted
+run can resume exactly where it stopped instead of redoing whole batches.
+It also keeps each topic source's read checkpoint, so a CSV is never
+re-parsed from the start.
+"""
+
+import json
+import sqlite3
+import time
+from threading import Lock
+
+JOURNAL_FILE = "work_journal.sqlite3"
+MAX_URL_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS topics (
+    topic TEXT PRIMARY KEY,
+    source TEXT,
+    position INTEGER,
+    state TEXT NOT NULL DEFAULT 'pending',
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS urls (
+    video_key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    updated_at REAL
+);
+CREATE TABLE IF NOT EXISTS sources (
+    source TEXT PRIMARY KEY,
+    checkpoint TEXT,
+    updated_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_topics_source_state ON topics (source, state, position);
+CREATE INDEX IF NOT EXISTS idx_urls_topic_state ON urls (topic, state);
+"""
+
+
+class WorkJournal:
+    def __init__(self, path=JOURNAL_FILE, max_attempts=MAX_URL_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+        self._recover()
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def _recover(self):
+        # Anything in flight when the last process died goes back to pending
+        recovered = self._connection.execute(
+            "UPDATE urls SET state = 'pending', updated_at = ? WHERE state = 'in_flight'", (time.time(),)
+        ).rowcount
+        if recovered:
+            print(f"[INFO] Work journal recovered {recovered} in-flight URL(s) from an interrupted run.")
+
+    def add_topics(self, topics, source=None, checkpoint=None):
+        # The source checkpoint is saved in the same transaction as the topics it covers
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT COALESCE(MAX(position), -1) FROM topics WHERE source IS ?", (source,)
+            ).fetchone()
+            first_position = position = row[0] + 1
+            with self._connection:
+                self._connection.execute("BEGIN")
+                for topic in topics:
+                    cursor = self._connection.execute(
+                        "INSERT OR IGNORE INTO topics (topic, source, position, updated_at) VALUES (?, ?, ?, ?)",
+                        (topic, source, position, now)
+                    )
+                    position += cursor.rowcount
+                if checkpoint is not None:
+                    self._connection.execute(
+                        "INSERT INTO sources (source, checkpoint, updated_at) VALUES (?, ?, ?) "
+                        "ON CONFLICT(source) DO UPDATE SET checkpoint = excluded.checkpoint, updated_at = excluded.updated_at",
+                        (source, json.dumps(checkpoint), now)
+                    )
+        return position - first_position
+
+    def get_checkpoint(self, source):
+        rows = self._execute("SELECT checkpoint FROM sources WHERE source = ?", (source,))
+        return json.loads(rows[0][0]) if rows and rows[0][0] else None
+
+    def next_topics(self, limit, source=None):
+        rows = self._execute(
+            "SELECT topic FROM topics WHERE source IS ? AND state != 'done' ORDER BY position LIMIT ?",
+            (source, limit)
+        )
+        return [row[0] for row in rows]
+
+    def is_discovered(self, topic):
+        rows = self._execute("SELECT state FROM topics WHERE topic = ?", (topic,))
+        return bool(rows) and rows[0][0] != "pending"
+
+    def record_discovered(self, topic, urls_by_key, complete=True):
+        # With complete=False the URLs are recorded while discovery is still running
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "INSERT OR IGNORE INTO urls (video_key, url, topic, updated_at) VALUES (?, ?, ?, ?)",
+                [(key, url, topic, now) for key, url in urls_by_key.items()]
+            )
+            if not complete:
+                return
+            self._connection.execute(
+                "INSERT INTO topics (topic, state, updated_at) VALUES (?, 'discovered', ?) "
+                "ON CONFLICT(topic) DO UPDATE SET state = 'discovered', updated_at = excluded.updated_at",
+                (topic, now)
+            )
+
+    def pending_urls(self, topic):
+        rows = self._execute(
+            "SELECT video_key, url FROM urls WHERE topic = ? AND "
+            "(state = 'pending' OR (state = 'failed' AND attempts < ?))",
+            (topic, self.max_attempts)
+        )
+        return dict(rows)
+
+    def mark_in_flight(self, video_key):
+        self._execute(
+            "UPDATE urls SET state = 'in_flight', attempts = attempts + 1, updated_at = ? WHERE video_key = ?",
+            (time.time(), video_key)
+        )
+
+    def mark_done(self, video_keys):
+        if isinstance(video_keys, str):
+            video_keys = [video_keys]
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "UPDATE urls SET state = 'done', last_error = NULL, updated_at = ? WHERE video_key = ?",
+                [(now, key) for key in video_keys]
+            )
+
+    def mark_failed(self, video_keys, error=None):
+        if isinstance(video_keys, str):
+            video_keys = [video_keys]
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany(
+                "UPDATE urls SET state = 'failed', last_error = ?, updated_at = ? WHERE video_key = ?",
+                [(error, now, key) for key in video_keys]
+            )
+
+    def finish_topics(self, topics):
+        # A discovered topic is done once none of its URLs are pending, in flight or retryable
+        finished = []
+        for topic in topics:
+            rows = self._execute(
+                "SELECT COUNT(*) FROM urls WHERE topic = ? AND "
+                "(state IN ('pending', 'in_flight') OR (state = 'failed' AND attempts < ?))",
+                (topic, self.max_attempts)
+            )
+            if self.is_discovered(topic) and rows[0][0] == 0:
+                self._execute("UPDATE topics SET state = 'done', updated_at = ? WHERE topic = ?", (time.time(), topic))
+                finished.append(topic)
+        return finished
+
+    def counts(self, source=None):
+        topic_rows = self._execute("SELECT state, COUNT(*) FROM topics WHERE source IS ? GROUP BY state", (source,))
+        url_rows = self._execute(
+            "SELECT urls.state, COUNT(*) FROM urls JOIN topics ON urls.topic = topics.topic "
+            "WHERE topics.source IS ? GROUP BY urls.state",
+            (source,)
+        )
+        return {"topics": dict(topic_rows), "urls": dict(url_rows)}
+
+    def reset(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM urls")
+            self._connection.execute("DELETE FROM topics")
+            self._connection.execute("DELETE FROM sources")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
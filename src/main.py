@@ -4,34 +4,78 @@ processing, and storing results in MongoDB. It supports batch processing
 from a CSV file and provides an interactive menu for user actions.
 """
 
-import time
 import os
-import json
+import time
 from vpn import connect_to_vpn, disconnect_vpn
-from video_scraper import scrape_trending_videos
-from db import get_db, store_items_to_collection
-from trends import get_randomized_youtube_trending_topics, extract_trends_from_csv
-
-# File to persist the processed topics index
-INDEX_FILE = "processed_topics_index.json"
-
-def load_processed_index():
-    if os.path.exists(INDEX_FILE):
-        with open(INDEX_FILE, "r") as file:
-            return json.load(file)
-    return {"last_index": 0}
-
-def save_processed_index(index):
-    with open(INDEX_FILE, "w") as file:
-        json.dump({"last_index": index}, file)
+from video_scraper import ScrapeScheduler, AdaptiveConcurrency, get_driver_pool, shutdown_driver_pool
+from video_scraper.comments import harvest_comments
+from db import get_db, close_client, WriteBehindSink, get_known_video_index, SNAPSHOT_COLLECTION
+from trends import get_randomized_youtube_trending_topics, CsvTopicSource
+from journal import WorkJournal
+from metrics import enable_metrics, start_prometheus_server, start_json_dump
+from work_queue import QueueWorker, enqueue_topics, get_work_queue
+
+# Seconds after which a stored video may be scraped again, adding a reading to its snapshot series; None never re-scrapes
+KNOWN_VIDEO_TTL = float(os.environ["KNOWN_VIDEO_TTL"]) if os.getenv("KNOWN_VIDEO_TTL") else None
+
+# The thread count is the ceiling; the active worker count adapts between these limits
+ADAPTIVE_CONCURRENCY = True
+MIN_WORKERS = 1
+
+# Discovery keeps paging through search results until this many new videos are queued per topic
+VIDEOS_PER_TOPIC = int(os.getenv("VIDEOS_PER_TOPIC", "35"))
+
+# With a work queue backend ("sqlite" or "mongo"), CSV topics are enqueued for queue workers instead of scraped here
+WORK_QUEUE_BACKEND = os.getenv("WORK_QUEUE_BACKEND")
+
+# Topics read from a CSV per journal transaction
+CSV_INGEST_BATCH = 1000
+
+_journal = None
+_concurrency = None
+
+def get_journal():
+    global _journal
+    if _journal is None:
+        _journal = WorkJournal()
+    return _journal
+
+def get_concurrency(threads):
+    # Kept across sessions so a CSV run does not restart from the floor on every batch
+    global _concurrency
+    ceiling = threads or 1
+    if not ADAPTIVE_CONCURRENCY:
+        return None
+    if _concurrency is None or _concurrency.ceiling != ceiling:
+        _concurrency = AdaptiveConcurrency(floor=min(MIN_WORKERS, ceiling), ceiling=ceiling, initial=max(1, ceiling // 2))
+    return _concurrency
 
 def reset_processed_index():
-    save_processed_index(0)
-    print("[INFO] Processed index has been reset to the start.")
-
-def start_scraping_session(threads=7, topics=None):
+    get_journal().reset()
+    print("[INFO] Work journal has been reset to the start.")
+
+def make_sink_callbacks(known_videos, journal=None):
+    # Journaled videos are marked done only once their batch is written to MongoDB
+    def on_flush(batch):
+        video_ids = [video["video_id"] for video in batch if video.get("video_id")]
+        known_videos.mark_stored(video_ids)
+        if journal is not None:
+            journal.mark_done(video_ids)
+
+    def on_error(batch):
+        # Unstored videos are released and marked failed, so a resumed run scrapes them again and
+        # their topic can still finish once the retries are used up
+        video_ids = [video["video_id"] for video in batch if video.get("video_id")]
+        for video_id in video_ids:
+            known_videos.release(video_id)
+        if journal is not None:
+            journal.mark_failed(video_ids, "Failed to store video")
+
+    return on_flush, on_error
+
+def start_scraping_session(threads=7, topics=None, journal=None):
     if threads:
-        print(f"[INFO] Starting scraping session with {threads} thread(s)...")
+        print(f"[INFO] Starting scraping session with up to {threads} thread(s)...")
     else:
         print("[INFO] Starting scraping session without multithreading...")
 
@@ -41,30 +85,39 @@ def start_scraping_session(threads=7, topics=None):
 
     print(f"[INFO] Fetched Topics: {topics}")
 
-    all_results = []
     connect_to_vpn()
 
-    for topic in topics:
-        print(f"[INFO] Scraping videos for topic: {topic}")
+    # Warm browsers stay in the shared pool across topics and sessions
+    pool = get_driver_pool(threads)
+
+    # Each video is written behind as soon as it is scraped instead of at the end of the session
+    collection, _ = get_db("trending_video_data")
+    known_videos = get_known_video_index(collection, KNOWN_VIDEO_TTL)
+    on_flush, on_error = make_sink_callbacks(known_videos, journal)
+
+    # Re-scraped videos are duplicates in the collection, but their counts still extend the snapshot series
+    snapshots = collection.database[SNAPSHOT_COLLECTION]
+    with WriteBehindSink(collection, on_flush=on_flush, on_error=on_error, snapshots=snapshots) as sink:
+        scheduler = ScrapeScheduler(threads, pool, on_result=lambda topic, video: sink.put(video),
+                                    known_videos=known_videos, journal=journal,
+                                    concurrency=get_concurrency(threads), videos_per_topic=VIDEOS_PER_TOPIC)
         try:
-            topic_results = scrape_trending_videos(topic, threads)
-            all_results.extend(topic_results)
+            scheduler.run(topics)
         except Exception as e:
-            print(f"[ERROR] Failed to scrape videos for topic '{topic}': {e}")
+            print(f"[ERROR] Failed to scrape videos for topics {topics}: {e}")
 
     disconnect_vpn()
 
-    if all_results:
-        try:
-            collection = get_db("trending_video_data")
-            store_items_to_collection(collection, all_results)
-            print(f"[INFO] Scraped data successfully stored in MongoDB. Total videos: {len(all_results)}")
-        except Exception as e:
-            print(f"[ERROR] Failed to store data in MongoDB: {e}")
+    scraped_count = sum(scheduler.counts.values())
+    for topic, count in scheduler.counts.items():
+        print(f"[INFO] Topic '{topic}': {count} videos scraped.")
+
+    if scraped_count:
+        print(f"[INFO] Scraped data stored in MongoDB. Total videos: {scraped_count}, new: {sink.inserted_count}")
     else:
         print("[WARNING] No results to store.")
 
-    return all_results
+    return {"scraped_count": scraped_count, "inserted_count": sink.inserted_count, "failed_count": sink.failed_count}
 
 
 def process_csv_in_loop(csv_file, batch_size=5, interval=60, threads=7):
@@ -84,39 +137,92 @@ def process_csv_in_loop(csv_file, batch_size=5, interval=60, threads=7):
         print("[INFO] Loop mode terminated by user.")
 
 
+def read_csv_topics(csv_file, journal, queue=None):
+    # Only rows after the journal's checkpoint are parsed. Topics go into the journal together with
+    # the checkpoint, or to the work queue first, which is idempotent if a checkpoint is lost.
+    source = CsvTopicSource(csv_file, journal.get_checkpoint(csv_file))
+    read_count = 0
+    try:
+        for topics in source.batches(CSV_INGEST_BATCH):
+            if queue is not None:
+                read_count += enqueue_topics(queue, topics, source=csv_file)
+                topics = []
+            read_count += journal.add_topics(topics, source=csv_file, checkpoint=source.checkpoint)
+    except OSError as e:
+        print(f"[ERROR] Failed to process the CSV file: {e}")
+        return read_count
+    # Covers blank or duplicate rows read after the last batch
+    journal.add_topics([], source=csv_file, checkpoint=source.checkpoint)
+    return read_count
+
+
+def produce_csv_topics(csv_file):
+    queue = get_work_queue(WORK_QUEUE_BACKEND)
+    try:
+        enqueued = read_csv_topics(csv_file, get_journal(), queue)
+        print(f"[INFO] Enqueued {enqueued} new topic(s) from {csv_file}. Queue state: {queue.counts()}")
+    finally:
+        queue.close()
+    return enqueued
+
+
+def run_queue_worker(threads=7):
+    connect_to_vpn()
+    queue = get_work_queue(WORK_QUEUE_BACKEND)
+    collection, _ = get_db("trending_video_data")
+    worker = QueueWorker(queue, threads=threads, pool=get_driver_pool(threads), collection=collection,
+                         known_videos=get_known_video_index(collection, KNOWN_VIDEO_TTL),
+                         videos_per_topic=VIDEOS_PER_TOPIC)
+    try:
+        return worker.run(drain=True)
+    except KeyboardInterrupt:
+        worker.stop()
+        print("[INFO] Queue worker terminated by user.")
+    finally:
+        queue.close()
+        disconnect_vpn()
+
+
+def run_comment_harvest(limit=None, threads=8):
+    # Comments come over plain HTTP, so no browsers are started; videos already harvested to the end are skipped
+    connect_to_vpn()
+    try:
+        return harvest_comments(threads=threads, limit=limit)
+    except KeyboardInterrupt:
+        print("[INFO] Comment harvest terminated by user. It resumes from the saved tokens next time.")
+    finally:
+        disconnect_vpn()
+
+
 def process_csv_topics(csv_file, batch_size=5, threads=7):
-    topics = extract_trends_from_csv(csv_file)
-    processed_index = load_processed_index().get("last_index", 0)
+    if WORK_QUEUE_BACKEND:
+        # Producer only; queue workers on this or other hosts do the scraping
+        return produce_csv_topics(csv_file)
 
-    if processed_index >= len(topics):
+    journal = get_journal()
+    added = read_csv_topics(csv_file, journal)
+    print(f"[INFO] Read {added} new topic(s) from {csv_file}.")
+
+    # Snapshot the unfinished topics so a topic that keeps failing is tried once per call
+    topics = journal.next_topics(-1, source=csv_file)
+    if not topics:
         print("[INFO] All topics in the CSV file have already been processed.")
-        return
+        return 0
 
-    while processed_index < len(topics):
+    for start in range(0, len(topics), batch_size):
         # Get the next batch of topics
-        topics_to_process = topics[processed_index:processed_index + batch_size]
+        topics_to_process = topics[start:start + batch_size]
         print(f"[INFO] Processing topics: {topics_to_process}")
 
-        # Perform scraping for the batch
-        results = start_scraping_session(threads=threads, topics=topics_to_process)
+        # Perform scraping for the batch; the session stores its own results
+        start_scraping_session(threads=threads, topics=topics_to_process, journal=journal)
 
-        # Store the results and disconnect from the database
-        if results:
-            collection, client = get_db("trending_video_data")
-            try:
-                store_items_to_collection(collection, results)
-                print(f"[INFO] Stored {len(results)} items in the database.")
-            finally:
-                client.close()
-
-        # Update and save the processed index
-        processed_index += len(topics_to_process)
-        save_processed_index(processed_index)
-
-        # Wait before the next batch (in loop mode)
-        print("[INFO] Batch processing complete.")
+        finished = journal.finish_topics(topics_to_process)
+        print(f"[INFO] Batch processing complete. Finished {len(finished)} of {len(topics_to_process)} topics.")
+        print(f"[INFO] Remaining work: {journal.counts(source=csv_file)}")
 
     print("[INFO] Completed processing all topics in the CSV file.")
+    return len(topics)
 
 def display_menu():
     """Display the interactive menu."""
@@ -126,11 +232,25 @@ def display_menu():
     print("3. Disconnect from VPN (Mac Only)")
     print("4. Process topics from CSV")
     print("5. Reset processed index")
-    print("6. Exit")
+    print("6. Run as work queue worker")
+    print("7. Harvest comments for scraped videos")
+    print("8. Exit")
     print()
 
 
+def start_metrics_exporters():
+    # METRICS_PORT serves Prometheus text, METRICS_JSON_PATH writes periodic JSON snapshots
+    port = os.getenv("METRICS_PORT")
+    json_path = os.getenv("METRICS_JSON_PATH")
+    if port or json_path:
+        enable_metrics()
+    if port:
+        start_prometheus_server(int(port))
+    if json_path:
+        start_json_dump(json_path)
+
 def main():
+    start_metrics_exporters()
     while True:
         display_menu()
         choice = input("[INPUT] Enter your choice: ")
@@ -153,12 +273,8 @@ def main():
             print("[INFO] Starting Single Mode...")
             topics = get_randomized_youtube_trending_topics()
             print(f"[INFO] Topics to scrape: {topics}")
-            trending_video_stats = start_scraping_session(threads=num_threads, topics=topics)
-
-            if trending_video_stats:
-                print("[INFO] Scraped Video Details:")
-                for video in trending_video_stats:
-                    print(video)
+            session_summary = start_scraping_session(threads=num_threads, topics=topics)
+            print(f"[INFO] Session summary: {session_summary}")
 
         elif choice == "2":
             print("[INFO] Connecting to VPN (Mac Only)...")
@@ -183,7 +299,22 @@ def main():
             process_csv_in_loop(csv_file, batch_size=batch_size, interval=interval)
 
         elif choice == "5":
+            reset_processed_index()
+
+        elif choice == "6":
+            num_threads_input = input("[INPUT] Enter the number of worker threads: ").strip()
+            num_threads = int(num_threads_input) if num_threads_input.isdigit() and int(num_threads_input) > 0 else 7
+            print(f"[INFO] Worker summary: {run_queue_worker(threads=num_threads)}")
+
+        elif choice == "7":
+            limit_input = input("[INPUT] Enter the number of most recent videos to harvest (leave blank for all): ").strip()
+            limit = int(limit_input) if limit_input.isdigit() and int(limit_input) > 0 else None
+            print(f"[INFO] Harvest summary: {run_comment_harvest(limit=limit)}")
+
+        elif choice == "8":
             print("[INFO] Exiting the program. Goodbye!")
+            shutdown_driver_pool()
+            close_client()
             break
 
         else:
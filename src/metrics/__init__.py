@@ -0,0 +1,7 @@
+from .instrumentation import registry, timed, count, set_topic, log_event, enable_metrics
+from .exporters import start_prometheus_server, start_json_dump, write_json_snapshot
+
+__all__ = [
+    "registry", "timed", "count", "set_topic", "log_event", "enable_metrics",
+    "start_prometheus_server", "start_json_dump", "write_json_snapshot"
+]
@@ -0,0 +1,62 @@
+"""
+This file exports the metrics registry, either as a Prometheus text endpoint
+served from a background thread or as a JSON snapshot rewritten on an
+interval.
+"""
+
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Event, Thread
+from .instrumentation import registry
+
+DEFAULT_PROMETHEUS_PORT = 9108
+DEFAULT_DUMP_INTERVAL = 30
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        payload = registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_prometheus_server(port=DEFAULT_PROMETHEUS_PORT, host="0.0.0.0"):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[INFO] Serving Prometheus metrics on http://{host}:{port}/metrics")
+    return server
+
+
+def write_json_snapshot(path):
+    # Write to a temporary file first so readers never see a partial snapshot
+    temp_path = f"{path}.tmp"
+    with open(temp_path, "w") as file:
+        json.dump(registry.snapshot(), file)
+    os.replace(temp_path, path)
+
+
+def start_json_dump(path, interval=DEFAULT_DUMP_INTERVAL):
+    stopped = Event()
+
+    def run():
+        while not stopped.wait(interval):
+            try:
+                write_json_snapshot(path)
+            except OSError as e:
+                print(f"[ERROR] Failed to write metrics snapshot to {path}: {e}")
+        write_json_snapshot(path)
+
+    Thread(target=run, daemon=True).start()
+    print(f"[INFO] Writing metrics snapshots to {path} every {interval} seconds.")
+    return stopped
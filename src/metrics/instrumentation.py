@@ -0,0 +1,169 @@
+"""
+This file provides lightweight timers, counters and histograms for the
+scraping pipeline. Labels are limited to topic, stage and outcome, and topics
+beyond MAX_TOPIC_LABELS are folded into "other" to keep cardinality bounded.
+When metrics are disabled every call returns immediately, so the hooks can
+stay in hot paths.
+"""
+
+import json
+import os
+import threading
+import time
+
+METRICS_ENABLED = os.getenv("SCRAPER_METRICS", "0") == "1"
+STRUCTURED_LOGS = os.getenv("SCRAPER_STRUCTURED_LOGS", "0") == "1"
+MAX_TOPIC_LABELS = 50
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+_context = threading.local()
+
+
+class Registry:
+    def __init__(self, buckets=LATENCY_BUCKETS, max_topics=MAX_TOPIC_LABELS):
+        self.buckets = buckets
+        self.max_topics = max_topics
+        self._counters = {}
+        self._histograms = {}
+        self._topics = set()
+        self._lock = threading.Lock()
+
+    def topic_label(self, topic):
+        if not topic:
+            return ""
+        with self._lock:
+            if topic in self._topics:
+                return topic
+            if len(self._topics) < self.max_topics:
+                self._topics.add(topic)
+                return topic
+        return "other"
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram["buckets"][index] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    def snapshot(self):
+        with self._lock:
+            counters = [{"name": name, "labels": dict(labels), "value": value} for (name, labels), value in self._counters.items()]
+            histograms = [
+                {"name": name, "labels": dict(labels), "buckets": dict(zip(map(str, self.buckets), data["buckets"])),
+                 "sum": data["sum"], "count": data["count"]}
+                for (name, labels), data in self._histograms.items()
+            ]
+        return {"timestamp": time.time(), "counters": counters, "histograms": histograms}
+
+    def render_prometheus(self):
+        def format_labels(labels, extra=None):
+            pairs = list(labels) + (extra or [])
+            if not pairs:
+                return ""
+            escaped = ('{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"')) for key, value in pairs)
+            return "{" + ",".join(escaped) + "}"
+
+        lines = []
+        typed = set()
+        with self._lock:
+            for (name, labels), value in sorted(self._counters.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{format_labels(labels)} {value}")
+            for (name, labels), data in sorted(self._histograms.items()):
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                for bound, bucket_count in zip(self.buckets, data["buckets"]):
+                    lines.append(f"{name}_bucket{format_labels(labels, [('le', bound)])} {bucket_count}")
+                lines.append(f"{name}_bucket{format_labels(labels, [('le', '+Inf')])} {data['count']}")
+                lines.append(f"{name}_sum{format_labels(labels)} {data['sum']}")
+                lines.append(f"{name}_count{format_labels(labels)} {data['count']}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+class StageTimer:
+    def __init__(self, stage, topic):
+        self.stage = stage
+        self.topic = topic
+        self.outcome = "ok"
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        elapsed = time.perf_counter() - self._started
+        if exc_type is not None:
+            self.outcome = "error"
+        topic = registry.topic_label(self.topic if self.topic is not None else current_topic())
+        registry.observe("scraper_stage_seconds", elapsed, stage=self.stage, topic=topic, outcome=self.outcome)
+        registry.inc("scraper_stage_total", stage=self.stage, topic=topic, outcome=self.outcome)
+        if STRUCTURED_LOGS:
+            log_event("stage", stage=self.stage, topic=topic, outcome=self.outcome, seconds=round(elapsed, 4))
+        return False
+
+
+class NoopTimer:
+    outcome = "ok"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def __setattr__(self, name, value):
+        pass
+
+
+_NOOP_TIMER = NoopTimer()
+
+
+def timed(stage, topic=None):
+    if not METRICS_ENABLED:
+        return _NOOP_TIMER
+    return StageTimer(stage, topic)
+
+
+def count(name, value=1, topic=None, **labels):
+    if not METRICS_ENABLED:
+        return
+    registry.inc(name, value, topic=registry.topic_label(topic if topic is not None else current_topic()), **labels)
+
+
+def set_topic(topic):
+    # Lets stages deep in the call stack attribute themselves to the topic being scraped
+    _context.topic = topic
+
+
+def current_topic():
+    return getattr(_context, "topic", None)
+
+
+def log_event(event, **fields):
+    if not STRUCTURED_LOGS:
+        return
+    print(json.dumps({"ts": round(time.time(), 3), "event": event, **fields}, default=str))
+
+
+def enable_metrics(enabled=True, structured_logs=None):
+    global METRICS_ENABLED, STRUCTURED_LOGS
+    METRICS_ENABLED = enabled
+    if structured_logs is not None:
+        STRUCTURED_LOGS = structured_logs
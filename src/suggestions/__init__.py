@@ -0,0 +1,5 @@
+from .formatting import parse_suggestions
+from .generator import SuggestionGenerator, load_generator
+from .service import SuggestionBatcher, start_suggestion_server
+
+__all__ = ["parse_suggestions", "SuggestionGenerator", "load_generator", "SuggestionBatcher", "start_suggestion_server"]
@@ -0,0 +1,34 @@
+"""
+This file turns generated suggestion text into structured video ideas.
+Output in the few-shot format ("Video 1:", "Video Title: ...",
+"Description: ...", "Tags: ...") is parsed block by block. Output that only
+lists titles separated by commas, as the tag-and-titles training texts do,
+becomes one idea per title.
+"""
+
+import re
+
+_video_header = re.compile(r"^\s*Video\s+\d+\s*:\s*$", re.IGNORECASE | re.MULTILINE)
+_field = re.compile(r'^\s*(Video Title|Title|Description|Tags)\s*:\s*"?(.*?)"?\s*$', re.IGNORECASE | re.MULTILINE)
+FIELD_NAMES = {"video title": "title", "title": "title", "description": "description", "tags": "tags"}
+
+
+def parse_video_block(block):
+    video = {}
+    for match in _field.finditer(block):
+        name = FIELD_NAMES[match.group(1).lower()]
+        # The first occurrence wins; the model sometimes runs on into a repeated field
+        video.setdefault(name, match.group(2).strip())
+    if "tags" in video:
+        video["tags"] = [tag.strip() for tag in video["tags"].split(",") if tag.strip()]
+    return video if video.get("title") else None
+
+
+def parse_suggestions(text):
+    """Structured ideas from generated text: a list of {"title", "description", "tags"} dicts."""
+    if _field.search(text):
+        blocks = _video_header.split(text) if _video_header.search(text) else [text]
+        return [video for video in map(parse_video_block, blocks) if video]
+
+    # Plain comma-separated titles; the last one may have been cut off mid-generation
+    return [{"title": title.strip()} for title in text.split(",") if title.strip()]
@@ -0,0 +1,158 @@
+"""
+This file generates video ideas for tags with the fine-tuned GPT-2 model.
+Every prompt starts with the same few-shot prefix. Its past key values are
+computed once when the generator is built and copied into every batch, so
+the model only ever encodes each tag's short suffix. A batch of tags is
+decoded together. Each suffix is left-padded against the cached prefix,
+with position ids continuing from the prefix, so every row decodes exactly
+as it would on its own. The token history that the no-repeat n-gram rule
+checks holds the prefix followed by the row's suffix. The row's padding is
+moved ahead of both, so it never splits the n-grams that span them.
+"""
+
+import copy
+import os
+from threading import Lock
+import torch
+from transformers import (
+    AutoTokenizer, GPT2LMHeadModel, LogitsProcessorList, NoRepeatNGramLogitsProcessor, TemperatureLogitsWarper,
+    TopKLogitsWarper, TopPLogitsWarper
+)
+from metrics import count, timed
+from .formatting import parse_suggestions
+
+# Point SUGGESTION_MODEL at a checkpoint that GPT_2_Suggestion.ipynb's Trainer saved under ./results
+MODEL_PATH = os.getenv("SUGGESTION_MODEL", "gpt2")
+TOKENIZER_PATH = os.getenv("SUGGESTION_TOKENIZER", "gpt2")
+MAX_NEW_TOKENS = 200
+
+FEW_SHOT_PREFIX = """Input: "Give me video ideas about Python"
+Output:
+Video 1:
+Video Title: "Learn Python Basics for Beginners"
+Description: "An introductory tutorial for Python programming covering variables, loops, and functions."
+Tags: "python, programming, beginner, tutorial, loops, variables, functions"
+
+Video 2:
+Video Title: "Data Analysis with Python and Pandas"
+Description: "Learn how to use Python for data analysis with the Pandas library, covering data frames, filtering, and visualization."
+Tags: "python, data analysis, pandas, data frames, visualization, tutorial"
+
+"""
+
+
+def build_prompt(tag):
+    # Only this part differs between requests; it follows the cached prefix
+    return f'Input: "Give me video ideas about {tag}"\nOutput:\n'
+
+
+class SuggestionGenerator:
+    def __init__(self, model, tokenizer, prefix=FEW_SHOT_PREFIX, max_new_tokens=MAX_NEW_TOKENS, do_sample=True,
+                 temperature=1.0, top_k=50, top_p=0.95, no_repeat_ngram_size=2):
+        self.model = model.eval()
+        self.tokenizer = tokenizer
+        self.max_new_tokens = max_new_tokens
+        self.do_sample = do_sample
+        self.eos_token_id = tokenizer.eos_token_id
+        self.pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        self.device = next(model.parameters()).device
+        self.max_positions = model.config.n_positions
+
+        self.processors = LogitsProcessorList()
+        if no_repeat_ngram_size:
+            self.processors.append(NoRepeatNGramLogitsProcessor(no_repeat_ngram_size))
+        if do_sample:
+            self.processors.extend([TemperatureLogitsWarper(temperature), TopKLogitsWarper(top_k), TopPLogitsWarper(top_p)])
+
+        self.prefix_ids = tokenizer(prefix, return_tensors="pt")["input_ids"].to(self.device)
+        self.prefix_length = self.prefix_ids.shape[1]
+        with torch.inference_mode():
+            self._prefix_cache = model(self.prefix_ids, use_cache=True).past_key_values
+        # One batch at a time; CPU inference gains nothing from overlapping forward passes
+        self._lock = Lock()
+
+    def _encode_suffixes(self, tags):
+        budget = self.max_positions - self.prefix_length - self.max_new_tokens
+        if budget <= 0:
+            raise ValueError("The few-shot prefix leaves no room for generation; shorten it or lower max_new_tokens.")
+        suffixes = [ids[-budget:] for ids in self.tokenizer([build_prompt(tag) for tag in tags])["input_ids"]]
+        length = max(len(ids) for ids in suffixes)
+
+        input_ids = torch.full((len(tags), length), self.pad_token_id, dtype=torch.long)
+        suffix_mask = torch.zeros((len(tags), length), dtype=torch.long)
+        # The whole prompt as the n-gram processor sees it: padding, then the prefix, then the suffix
+        history = torch.full((len(tags), self.prefix_length + length), self.pad_token_id, dtype=torch.long)
+        prefix_ids = self.prefix_ids[0].cpu()
+        for row, ids in enumerate(suffixes):
+            # Left padding keeps every row's last token in the last column
+            padding = length - len(ids)
+            input_ids[row, padding:] = torch.tensor(ids, dtype=torch.long)
+            suffix_mask[row, padding:] = 1
+            history[row, padding:padding + self.prefix_length] = prefix_ids
+            history[row, padding + self.prefix_length:] = input_ids[row, padding:]
+        return input_ids.to(self.device), suffix_mask.to(self.device), history.to(self.device)
+
+    def generate(self, tags):
+        """The generated continuation for each tag, decoded in one batch."""
+        if not tags:
+            return []
+        input_ids, suffix_mask, history = self._encode_suffixes(tags)
+        batch_size = len(tags)
+        attention_mask = torch.cat(
+            [torch.ones((batch_size, self.prefix_length), dtype=torch.long, device=self.device), suffix_mask], dim=1
+        )
+        # Positions continue from the prefix for each row's real tokens; padded positions are masked anyway
+        position_ids = self.prefix_length + (suffix_mask.cumsum(dim=1) - 1).clamp(min=0)
+        generated = []
+        finished = torch.zeros(batch_size, dtype=torch.bool, device=self.device)
+
+        with self._lock, torch.inference_mode(), timed("suggestion_generate"):
+            cache = copy.deepcopy(self._prefix_cache)
+            cache.batch_repeat_interleave(batch_size)
+            step_ids = input_ids
+            for _ in range(self.max_new_tokens):
+                outputs = self.model(
+                    input_ids=step_ids, past_key_values=cache, attention_mask=attention_mask,
+                    position_ids=position_ids, use_cache=True
+                )
+                cache = outputs.past_key_values
+                scores = self.processors(history, outputs.logits[:, -1, :].float())
+                if self.do_sample:
+                    next_ids = torch.multinomial(torch.softmax(scores, dim=-1), num_samples=1).squeeze(1)
+                else:
+                    next_ids = scores.argmax(dim=-1)
+                next_ids = next_ids.masked_fill(finished, self.pad_token_id)
+                generated.append(next_ids)
+                finished |= next_ids == self.eos_token_id
+                if finished.all():
+                    break
+
+                step_ids = next_ids.unsqueeze(1)
+                history = torch.cat([history, step_ids], dim=1)
+                attention_mask = torch.cat([attention_mask, torch.ones_like(step_ids)], dim=1)
+                position_ids = position_ids[:, -1:] + 1
+
+        tokens = torch.stack(generated, dim=1).tolist()
+        texts = []
+        for row in tokens:
+            if self.eos_token_id in row:
+                row = row[:row.index(self.eos_token_id)]
+            texts.append(self.tokenizer.decode(row, skip_special_tokens=True))
+        count("suggestion_tags_total", batch_size)
+        return texts
+
+    def suggest(self, tags):
+        """Structured video ideas for each tag, in order."""
+        return [parse_suggestions(text) for text in self.generate(tags)]
+
+
+def load_generator(model_path=MODEL_PATH, tokenizer_path=TOKENIZER_PATH, **options):
+    tokenizer = AutoTokenizer.from_pretrained(tokenizer_path)
+    if tokenizer.pad_token is None:
+        # The notebook fine-tunes with an added [PAD] token and resizes the embeddings to match
+        tokenizer.add_special_tokens({"pad_token": "[PAD]"})
+    model = GPT2LMHeadModel.from_pretrained(model_path)
+    if model.get_input_embeddings().num_embeddings < len(tokenizer):
+        model.resize_token_embeddings(len(tokenizer))
+    print(f"[INFO] Loaded suggestion model from {model_path}.")
+    return SuggestionGenerator(model, tokenizer, **options)
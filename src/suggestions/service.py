@@ -0,0 +1,193 @@
+"""
+This file serves video-idea suggestions over HTTP from one loaded model.
+Concurrent requests are batched dynamically. A background thread takes the
+first waiting tag, collects whatever else arrives within a short window (up
+to the batch size), and decodes them all in one pass. A request for a
+whole tag list therefore lands in as few batches as its length allows,
+rather than one generation per tag.
+
+Usage (from src/):
+    SUGGESTION_MODEL=./results/checkpoint-1500 python -m suggestions.service --port 8088
+    curl -X POST localhost:8088/suggestions -d '{"tags": ["python", "cooking"]}'
+"""
+
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty, Queue
+from threading import Thread
+from urllib.parse import parse_qs, urlparse
+from metrics import count
+from .generator import load_generator
+
+MAX_BATCH_SIZE = 16
+# How long the first tag in a batch waits for others to join it
+MAX_BATCH_WAIT = 0.02
+DEFAULT_PORT = 8088
+MAX_TAGS_PER_REQUEST = 256
+
+_STOP = object()
+
+
+class SuggestionBatcher:
+    def __init__(self, generator, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_BATCH_WAIT):
+        self.generator = generator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._queue = Queue()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, tag):
+        future = Future()
+        self._queue.put((tag, future))
+        return future
+
+    def suggest(self, tags, timeout=None):
+        """Ideas for every tag, keyed by tag; the tags are queued together so they share batches."""
+        futures = {tag: self.submit(tag) for tag in dict.fromkeys(tags)}
+        return {tag: future.result(timeout) for tag, future in futures.items()}
+
+    def close(self):
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+            except Empty:
+                break
+            if item is _STOP:
+                # Put it back so the loop stops after this batch
+                self._queue.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch = self._collect(first)
+            # The same tag requested twice within a batch is generated once
+            waiting = {}
+            for tag, future in batch:
+                waiting.setdefault(tag, []).append(future)
+            tags = list(waiting)
+            count("suggestion_batches_total")
+            try:
+                results = self.generator.suggest(tags)
+            except Exception as e:
+                print(f"[ERROR] Failed to generate suggestions for {len(tags)} tags: {e}")
+                for futures in waiting.values():
+                    for future in futures:
+                        future.set_exception(e)
+                continue
+            for tag, ideas in zip(tags, results):
+                for future in waiting[tag]:
+                    future.set_result(ideas)
+
+
+def make_handler(batcher):
+    class SuggestionHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, body):
+            payload = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _respond(self, tags):
+            tags = [tag.strip() for tag in tags if isinstance(tag, str) and tag.strip()]
+            if not tags:
+                self._send_json(400, {"error": "Provide at least one tag."})
+                return
+            if len(tags) > MAX_TAGS_PER_REQUEST:
+                self._send_json(400, {"error": f"At most {MAX_TAGS_PER_REQUEST} tags per request."})
+                return
+            try:
+                self._send_json(200, {"suggestions": batcher.suggest(tags)})
+            except Exception as e:
+                self._send_json(500, {"error": str(e)})
+
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            elif parsed.path == "/suggestions":
+                self._respond(parse_qs(parsed.query).get("tag", []))
+            else:
+                self.send_error(404)
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/suggestions":
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                tags = json.loads(self.rfile.read(length) or b"{}").get("tags")
+            except (ValueError, AttributeError):
+                tags = None
+            if not isinstance(tags, list):
+                self._send_json(400, {"error": 'Expected a JSON body like {"tags": ["..."]}.'})
+                return
+            self._respond(tags)
+
+        def log_message(self, format, *args):
+            pass
+
+    return SuggestionHandler
+
+
+def start_suggestion_server(batcher, port=DEFAULT_PORT, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), make_handler(batcher))
+    server.daemon_threads = True
+    Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[INFO] Serving suggestions on http://{host}:{server.server_port}/suggestions")
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve video-idea suggestions from the fine-tuned GPT-2 model.")
+    parser.add_argument("--model", help="Model directory or name (default: SUGGESTION_MODEL or gpt2)")
+    parser.add_argument("--tokenizer", help="Tokenizer directory or name (default: SUGGESTION_TOKENIZER or gpt2)")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="Port to listen on")
+    parser.add_argument("--batch-size", type=int, default=MAX_BATCH_SIZE, help="Maximum tags per batch")
+    parser.add_argument("--tags", nargs="+", help="Print suggestions for these tags as JSON and exit")
+    args = parser.parse_args(argv)
+
+    options = {key: value for key, value in (("model_path", args.model), ("tokenizer_path", args.tokenizer)) if value}
+    generator = load_generator(**options)
+    with SuggestionBatcher(generator, args.batch_size) as batcher:
+        if args.tags:
+            print(json.dumps(batcher.suggest(args.tags), ensure_ascii=False, indent=2))
+            return 0
+        server = start_suggestion_server(batcher, args.port, args.host)
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print("[INFO] Stopping the suggestion server.")
+        finally:
+            server.shutdown()
+            server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
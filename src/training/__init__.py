@@ -0,0 +1,4 @@
+from .export import export_training_data, iter_training_texts, training_text_pipeline
+
+# TokenShardDataset and collate_examples live in training.dataset, which needs torch; the exporter does not
+__all__ = ["export_training_data", "iter_training_texts", "training_text_pipeline"]
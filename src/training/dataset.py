@@ -0,0 +1,81 @@
+"""
+This file reads the token shards written by export.py for training. The
+.bin shards are memory-mapped and the offset indexes are loaded with
+mmap_mode, so opening the dataset reads nothing but the manifest, and RAM
+use stays flat however large the export is. Items are either one example
+each, padded per batch by collate_examples to the longest example in that
+batch, or fixed-size blocks cut across example boundaries, which need no
+padding at all.
+"""
+
+import json
+import os
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+from .export import MANIFEST_FILE
+
+IGNORE_INDEX = -100
+
+
+class TokenShardDataset(Dataset):
+    def __init__(self, directory, block_size=None):
+        self.directory = directory
+        self.block_size = block_size
+        with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as file:
+            self.manifest = json.load(file)
+        dtype = np.dtype(self.manifest["dtype"])
+        self._tokens = []
+        self._offsets = []
+        for shard in self.manifest["shards"]:
+            path = os.path.join(directory, shard["tokens"])
+            # np.memmap cannot map an empty file
+            self._tokens.append(np.memmap(path, dtype=dtype, mode="r") if shard["token_count"] else np.empty(0, dtype))
+            self._offsets.append(np.load(os.path.join(directory, shard["offsets"]), mmap_mode="r"))
+
+        # Items per shard; a block never spans two shards, and a shard's trailing partial block is dropped
+        if block_size:
+            sizes = [shard["token_count"] // block_size for shard in self.manifest["shards"]]
+        else:
+            sizes = [shard["examples"] for shard in self.manifest["shards"]]
+        self._starts = np.concatenate([[0], np.cumsum(sizes, dtype=np.int64)])
+
+    def __len__(self):
+        return int(self._starts[-1])
+
+    def _locate(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        shard = int(np.searchsorted(self._starts, index, side="right")) - 1
+        return shard, index - int(self._starts[shard])
+
+    def tokens(self, index):
+        """The token ids of one item, as a read-only view into its shard."""
+        shard, position = self._locate(index)
+        if self.block_size:
+            start = position * self.block_size
+            return self._tokens[shard][start:start + self.block_size]
+        offsets = self._offsets[shard]
+        return self._tokens[shard][int(offsets[position]):int(offsets[position + 1])]
+
+    def __getitem__(self, index):
+        # The one copy made: widening the item's ids to the int64 the model's embedding expects
+        input_ids = torch.from_numpy(self.tokens(index).astype(np.int64))
+        if self.block_size:
+            return {"input_ids": input_ids, "labels": input_ids.clone()}
+        return {"input_ids": input_ids}
+
+
+def collate_examples(items, pad_token_id=0):
+    """Pad a batch to its own longest example; padded positions are masked and ignored by the loss."""
+    length = max(len(item["input_ids"]) for item in items)
+    input_ids = torch.full((len(items), length), pad_token_id, dtype=torch.long)
+    attention_mask = torch.zeros((len(items), length), dtype=torch.long)
+    for row, item in enumerate(items):
+        ids = item["input_ids"]
+        input_ids[row, :len(ids)] = ids
+        attention_mask[row, :len(ids)] = 1
+    labels = input_ids.masked_fill(attention_mask == 0, IGNORE_INDEX)
+    return {"input_ids": input_ids, "attention_mask": attention_mask, "labels": labels}
@@ -0,0 +1,191 @@
+"""
+This file exports the tag_clusters collection as a pre-tokenized training
+set for the GPT-2 suggester. MongoDB groups the associated video titles by
+tag and builds each training text with an aggregation, so documents stream
+out of the cursor one at a time and no tag map is held in Python. Texts
+are tokenized in batches with no padding, and an end-of-text token is
+appended to each one. The tokens are written back to back into .bin
+shards, and each shard gets a .npy index of example offsets. A manifest
+describes the shards for TokenShardDataset.
+
+Usage (from src/):
+    python -m training.export --output training_data --tokenizer gpt2
+"""
+
+import argparse
+import json
+import os
+import sys
+import numpy as np
+from db import close_client, get_client
+from metrics import count, timed
+
+TAG_CLUSTER_DATABASE = "youtube_comments"
+TAG_CLUSTER_COLLECTION = "tag_clusters"
+DEFAULT_OUTPUT = "training_data"
+MANIFEST_FILE = "manifest.json"
+MAX_LENGTH = 512
+TOKENIZE_BATCH_SIZE = 256
+CURSOR_BATCH_SIZE = 1000
+# Tokens per shard; 64M uint16 tokens is a 128 MB .bin file
+SHARD_TOKENS = 64 * 1024 * 1024
+# Titles kept per tag; more than this would be truncated at MAX_LENGTH tokens anyway
+MAX_TITLES_PER_TAG = 64
+
+
+def training_text_pipeline(max_titles=MAX_TITLES_PER_TAG):
+    """One "Tag: <tag> Associated Videos: <titles>" text per distinct tag, as the notebook built them."""
+    return [
+        {"$project": {"tag": {"$trim": {"input": {"$ifNull": ["$tag", ""]}}}, "titles": "$associated_videos.title"}},
+        {"$match": {"tag": {"$ne": ""}}},
+        # A tag with no titles keeps one document, so it still gets a text
+        {"$unwind": {"path": "$titles", "preserveNullAndEmptyArrays": True}},
+        # Capped while grouping, so a popular tag never builds a document near the 16 MB BSON limit
+        {"$group": {"_id": "$tag", "titles": {"$firstN": {"input": "$titles", "n": max_titles}}}},
+        {"$project": {
+            "_id": 0,
+            "text": {"$concat": [
+                "Tag: ", "$_id", " Associated Videos: ",
+                {"$reduce": {
+                    "input": "$titles",
+                    "initialValue": "",
+                    "in": {"$cond": [
+                        {"$eq": ["$$value", ""]},
+                        {"$ifNull": ["$$this", ""]},
+                        {"$concat": ["$$value", ", ", {"$ifNull": ["$$this", ""]}]}
+                    ]}
+                }}
+            ]}
+        }},
+    ]
+
+
+def iter_training_texts(collection):
+    # allowDiskUse lets the $group spill to disk on the server instead of failing on a large collection
+    cursor = collection.aggregate(training_text_pipeline(), allowDiskUse=True, batchSize=CURSOR_BATCH_SIZE)
+    for document in cursor:
+        yield document["text"]
+
+
+def iter_token_batches(texts, tokenizer, batch_size=TOKENIZE_BATCH_SIZE, max_length=MAX_LENGTH):
+    """Yield lists of token id lists, each ending in the end-of-text token."""
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) >= batch_size:
+            yield _tokenize(batch, tokenizer, max_length)
+            batch = []
+    if batch:
+        yield _tokenize(batch, tokenizer, max_length)
+
+
+def _tokenize(batch, tokenizer, max_length):
+    with timed("training_tokenize"):
+        # One slot is kept for the end-of-text token
+        encoded = tokenizer(batch, truncation=True, max_length=max_length - 1, padding=False)["input_ids"]
+    return [ids + [tokenizer.eos_token_id] for ids in encoded]
+
+
+def token_dtype(vocab_size):
+    return np.uint16 if vocab_size <= np.iinfo(np.uint16).max + 1 else np.uint32
+
+
+class ShardWriter:
+    """Append token id lists to fixed-size shards: tokens-NNNNN.bin plus tokens-NNNNN.idx.npy offsets."""
+
+    def __init__(self, directory, dtype, shard_tokens=SHARD_TOKENS):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        self.shard_tokens = shard_tokens
+        self.shards = []
+        os.makedirs(directory, exist_ok=True)
+        self._file = None
+        self._offsets = None
+
+    def _open_shard(self):
+        name = f"tokens-{len(self.shards):05d}"
+        self.shards.append({"tokens": f"{name}.bin", "offsets": f"{name}.idx.npy", "examples": 0, "token_count": 0})
+        self._file = open(os.path.join(self.directory, self.shards[-1]["tokens"]), "wb")
+        self._offsets = [0]
+
+    def _close_shard(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        np.save(os.path.join(self.directory, self.shards[-1]["offsets"]), np.asarray(self._offsets, dtype=np.int64))
+
+    def write(self, examples):
+        for ids in examples:
+            if self._file is None or self._offsets[-1] + len(ids) > self.shard_tokens and self._offsets[-1]:
+                self._close_shard()
+                self._open_shard()
+            np.asarray(ids, dtype=self.dtype).tofile(self._file)
+            self._offsets.append(self._offsets[-1] + len(ids))
+            shard = self.shards[-1]
+            shard["examples"] += 1
+            shard["token_count"] += len(ids)
+
+    def close(self):
+        self._close_shard()
+
+
+def export_training_data(collection, tokenizer, directory=DEFAULT_OUTPUT, batch_size=TOKENIZE_BATCH_SIZE,
+                         max_length=MAX_LENGTH, shard_tokens=SHARD_TOKENS):
+    dtype = token_dtype(len(tokenizer))
+    writer = ShardWriter(directory, dtype, shard_tokens)
+    examples = tokens = 0
+    try:
+        for token_batch in iter_token_batches(iter_training_texts(collection), tokenizer, batch_size, max_length):
+            writer.write(token_batch)
+            examples += len(token_batch)
+            tokens += sum(len(ids) for ids in token_batch)
+            count("training_examples_total", len(token_batch))
+            print(f"[INFO] Exported {examples} examples ({tokens} tokens).")
+    finally:
+        writer.close()
+
+    manifest = {
+        "dtype": writer.dtype.name,
+        "tokenizer": getattr(tokenizer, "name_or_path", None),
+        "vocab_size": len(tokenizer),
+        "eos_token_id": tokenizer.eos_token_id,
+        "max_length": max_length,
+        "examples": examples,
+        "token_count": tokens,
+        "shards": writer.shards,
+    }
+    # Written last, so a directory with a manifest always holds complete shards
+    with open(os.path.join(directory, MANIFEST_FILE), "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    print(f"[INFO] Training data written to {directory}: {examples} examples in {len(writer.shards)} shard(s).")
+    return manifest
+
+
+def load_tokenizer(name="gpt2"):
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(name)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export tag_clusters as tokenized training shards.")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Output directory")
+    parser.add_argument("--tokenizer", default="gpt2", help="Tokenizer name or path")
+    parser.add_argument("--database", default=TAG_CLUSTER_DATABASE, help="Source database")
+    parser.add_argument("--collection", default=TAG_CLUSTER_COLLECTION, help="Source collection")
+    parser.add_argument("--batch-size", type=int, default=TOKENIZE_BATCH_SIZE, help="Texts per tokenizer call")
+    parser.add_argument("--max-length", type=int, default=MAX_LENGTH, help="Maximum tokens per example")
+    parser.add_argument("--shard-tokens", type=int, default=SHARD_TOKENS, help="Maximum tokens per shard")
+    args = parser.parse_args(argv)
+
+    collection = get_client()[args.database][args.collection]
+    try:
+        export_training_data(collection, load_tokenizer(args.tokenizer), args.output, args.batch_size,
+                             args.max_length, args.shard_tokens)
+    finally:
+        close_client()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
-from .google_trends import get_randomized_youtube_trending_topics
-from .process_csv import extract_trends_from_csv
+from .google_trends import get_randomized_youtube_trending_topics, get_trending_topics, fetch_trending_topics
+from .process_csv import CsvTopicSource, extract_trends_from_csv
 
-__all__ = ["get_randomized_youtube_trending_topics", "extract_trends_from_csv"]
\ No newline at end of file
+__all__ = ["get_randomized_youtube_trending_topics", "get_trending_topics", "fetch_trending_topics",
+           "CsvTopicSource", "extract_trends_from_csv"]
\ No newline at end of file
@@ -0,0 +1,87 @@
+"""
+This file persists trend data between runs as small JSON files. TrendsCache
+stores the top chart topics fetched for a region and date, and entries expire
+after a TTL. SeenTopics is the bounded set of topics already handed out, with
+the oldest entries dropped first. Both files are rewritten atomically, so an
+interrupted write never leaves a corrupt cache behind.
+"""
+
+import json
+import os
+import time
+from collections import OrderedDict
+from threading import Lock
+
+TRENDS_CACHE_FILE = "trends_cache.json"
+TRENDS_CACHE_TTL = 6 * 60 * 60
+SEEN_TOPICS_FILE = "seen_topics.json"
+MAX_SEEN_TOPICS = 5000
+
+
+def load_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        print(f"[WARNING] Ignoring unreadable cache file {path}: {e}")
+        return default
+
+
+def write_json(path, data):
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+    os.replace(temporary_path, path)
+
+
+class TrendsCache:
+    def __init__(self, path=TRENDS_CACHE_FILE, ttl=TRENDS_CACHE_TTL):
+        self.path = path
+        self.ttl = ttl
+        self._lock = Lock()
+        self._entries = load_json(path, {})
+
+    @staticmethod
+    def key(region, date):
+        return f"{region}|{date}"
+
+    def get(self, region, date):
+        with self._lock:
+            entry = self._entries.get(self.key(region, date))
+        if entry and time.time() - entry["fetched_at"] < self.ttl:
+            return entry["topics"]
+        return None
+
+    def put(self, region, date, topics):
+        now = time.time()
+        with self._lock:
+            self._entries[self.key(region, date)] = {"fetched_at": now, "topics": topics}
+            # Expired entries are dropped on every write so the file does not grow without bound
+            self._entries = {key: entry for key, entry in self._entries.items() if now - entry["fetched_at"] < self.ttl}
+            write_json(self.path, self._entries)
+
+
+class SeenTopics:
+    def __init__(self, path=SEEN_TOPICS_FILE, max_size=MAX_SEEN_TOPICS):
+        self.path = path
+        self.max_size = max_size
+        self._lock = Lock()
+        self._topics = OrderedDict((topic, None) for topic in load_json(path, []))
+
+    def __contains__(self, topic):
+        with self._lock:
+            return topic.lower() in self._topics
+
+    def __len__(self):
+        return len(self._topics)
+
+    def add_all(self, topics):
+        with self._lock:
+            for topic in topics:
+                self._topics[topic.lower()] = None
+                self._topics.move_to_end(topic.lower())
+            while len(self._topics) > self.max_size:
+                self._topics.popitem(last=False)
+            write_json(self.path, list(self._topics))
@@ -3,14 +3,89 @@ This file uses the PyTrends API to fetch trending topics for specified regions
 and categories, filtering and randomizing the results for YouTube-related 
 trends. It provides functions to retrieve regions, filter previously seen 
 topics, fetch regional trends, and generate random topics from predefined categories.
+Regions are fetched concurrently through a shared rate limiter and cached on
+disk. The region threads are long-lived, and each one creates its pytrends
+client when it first makes a request, then keeps it for later fetches.
 """
 
 import random
-from pytrends.request import TrendReq
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from threading import Lock, local
+from .cache import SeenTopics, TrendsCache
 
-# Initialize pytrends globally
-pytrends = TrendReq(hl='en-US', tz=360)
-previous_topics = set()
+MAX_REGION_WORKERS = 3
+# Minimum seconds between two requests to Google Trends, across all threads
+MIN_REQUEST_INTERVAL = 1.0
+
+CATEGORIES = [
+    'Arts & Entertainment', 'Autos & Vehicles', 'Beauty & Fitness', 'Books & Literature', 'Business & Industrial',
+    'Computers & Electronics', 'Finance', 'Food & Drink', 'Games', 'Health', 'Hobbies & Leisure', 'Home & Garden',
+    'Internet & Telecom', 'Jobs & Education', 'Law & Government', 'News', 'Online Communities', 'People & Society',
+    'Pets & Animals', 'Real Estate', 'Reference', 'Science', 'Shopping', 'Sports', 'Travel'
+]
+
+# TrendReq keeps a requests session, so each thread gets its own client
+_clients = local()
+# Kept across calls so the region threads, and the clients they hold, are reused
+_region_executor = None
+_region_executor_size = None
+_trends_cache = None
+_previous_topics = None
+_state_lock = Lock()
+
+
+class RateLimiter:
+    def __init__(self, min_interval=MIN_REQUEST_INTERVAL):
+        self.min_interval = min_interval
+        self._lock = Lock()
+        self._next_allowed = 0.0
+
+    def wait(self):
+        # Reserves the next slot under the lock, then sleeps outside it
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_allowed)
+            self._next_allowed = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+_rate_limiter = RateLimiter()
+
+
+def get_pytrends():
+    if getattr(_clients, "pytrends", None) is None:
+        # Imported and connected on first use; TrendReq makes a network call when it is created
+        from pytrends.request import TrendReq
+        _rate_limiter.wait()
+        _clients.pytrends = TrendReq(hl='en-US', tz=360)
+    return _clients.pytrends
+
+def get_region_executor(max_workers=MAX_REGION_WORKERS):
+    global _region_executor, _region_executor_size
+    with _state_lock:
+        if _region_executor is None or _region_executor_size != max_workers:
+            if _region_executor is not None:
+                _region_executor.shutdown(wait=False)
+            _region_executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="trends")
+            _region_executor_size = max_workers
+        return _region_executor
+
+def get_trends_cache():
+    global _trends_cache
+    with _state_lock:
+        if _trends_cache is None:
+            _trends_cache = TrendsCache()
+        return _trends_cache
+
+def get_previous_topics():
+    global _previous_topics
+    with _state_lock:
+        if _previous_topics is None:
+            _previous_topics = SeenTopics()
+        return _previous_topics
 
 def get_all_specified_regions():
     regions = ['US', 'CA', 'GB', 'AU', 'IN']
@@ -18,33 +93,44 @@ def get_all_specified_regions():
     return regions
 
 def filter_topics(topics, n_topics):
-    global previous_topics
+    previous_topics = get_previous_topics()
     filtered_topics = []
+    selected = set()
     for topic in topics:
-        # Skip if the topic is already in the previous topics set
-        if topic.lower() in previous_topics:
+        # Skip if the topic was handed out before, in this run or an earlier one
+        if topic in previous_topics or topic.lower() in selected:
             continue
-        # Add to the filtered list and update the previously seen topics
         filtered_topics.append(topic)
-        previous_topics.add(topic.lower())
+        selected.add(topic.lower())
         if len(filtered_topics) >= n_topics:
             break
+    # Persisted once per call rather than once per topic
+    previous_topics.add_all(filtered_topics)
     return filtered_topics
 
-def fetch_trending_topics_for_region(region, categories):
+def fetch_trending_topics_for_region(region):
     try:
         print(f"[INFO] Fetching trending topics for region: {region}")
-        selected_category = random.choice(categories)
-        print(f"[DEBUG] Selected category: {selected_category} for region: {region}")
+
+        # top_charts is not filtered by category, so the cache entry is per region and day
+        cache = get_trends_cache()
+        today = date.today().isoformat()
+        topics = cache.get(region, today)
+        if topics is not None:
+            print(f"[INFO] Using {len(topics)} cached topics for region {region}.")
+            return topics
 
         # Fetch trending topics using pytrends
         print(f"[INFO] Connecting to Pytrends API for region {region}...")
+        pytrends = get_pytrends()
+        _rate_limiter.wait()
         trending_searches_df = pytrends.top_charts(2023, hl='en-US', tz=360, geo=region)
         print(f"[INFO] Received data for region {region}. Processing...")
 
         if trending_searches_df is not None and 'title' in trending_searches_df:
             topics = trending_searches_df['title'].tolist()
             print(f"[INFO] Extracted {len(topics)} topics for region {region}: {topics}")
+            cache.put(region, today, topics)
             return topics
         else:
             print(f"[WARNING] No trending topics found for region {region}.")
@@ -52,16 +138,22 @@ def fetch_trending_topics_for_region(region, categories):
         print(f"[ERROR] Error fetching topics for region {region}: {e}")
     return []
 
-def get_randomized_youtube_trending_topics(n_topics=5):
-    categories = [
-        'Arts & Entertainment', 'Autos & Vehicles', 'Beauty & Fitness', 'Books & Literature', 'Business & Industrial',
-        'Computers & Electronics', 'Finance', 'Food & Drink', 'Games', 'Health', 'Hobbies & Leisure', 'Home & Garden',
-        'Internet & Telecom', 'Jobs & Education', 'Law & Government', 'News', 'Online Communities', 'People & Society',
-        'Pets & Animals', 'Real Estate', 'Reference', 'Science', 'Shopping', 'Sports', 'Travel'
-    ]
+def fetch_trending_topics(regions=None, max_workers=MAX_REGION_WORKERS):
+    # Regions are fetched in parallel; the shared rate limiter still spaces out the requests
+    regions = regions or get_all_specified_regions()
+    executor = get_region_executor(max_workers)
+    results = executor.map(fetch_trending_topics_for_region, regions)
+    return dict(zip(regions, results))
 
+def get_trending_topics(n_topics=5, regions=None):
+    topics_by_region = fetch_trending_topics(regions)
+    topics = [topic for region_topics in topics_by_region.values() for topic in region_topics]
+    random.shuffle(topics)
+    return filter_topics(topics, n_topics)
+
+def get_randomized_youtube_trending_topics(n_topics=5):
     print("[INFO] Selecting random topics...")
-    return random.sample(categories, min(n_topics, len(categories)))
+    return random.sample(CATEGORIES, min(n_topics, len(CATEGORIES)))
 
 # Example usage
 if __name__ == "__main__":
@@ -1,28 +1,112 @@
 """
 This file extracts trending topics from a CSV file, defaulting to a predefined
-file path if none is provided. It reads the CSV, processes the first column of
-each row, and returns the extracted trends.
+file path if none is provided. It streams the first column of each row as a
+normalized, deduplicated topic, and tracks a byte-offset checkpoint, so a
+later pass can seek straight to new rows. A pass also picks up rows appended
+to the file since the last checkpoint, and starts over if the file was
+replaced. Only complete records are consumed; a partly written row at the
+end of the file is read again on the next pass.
 """
 
 import csv
+import hashlib
 import os
+import re
+import unicodedata
+
+DEFAULT_CSV_FILE = "./src/trends/data/trending_US_7d_20241125-1756.csv"
+# Bytes hashed to recognise the same file again; a replaced file has a different head
+FINGERPRINT_BYTES = 4096
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_topic(topic):
+    return _whitespace.sub(" ", unicodedata.normalize("NFKC", topic)).strip()
+
+
+def fingerprint(head, offset):
+    return hashlib.sha1(head[:min(offset, FINGERPRINT_BYTES)]).hexdigest()
+
+
+class CsvTopicSource:
+    """Iterate the topics after a checkpoint; `checkpoint` is updated as each row is consumed."""
+
+    def __init__(self, file_path=None, checkpoint=None):
+        self.file_path = file_path or os.path.abspath(DEFAULT_CSV_FILE)
+        # {"offset": bytes consumed, "fingerprint": hash of the file head at that point}
+        self.checkpoint = dict(checkpoint or {"offset": 0, "fingerprint": None})
+        self._seen = set()
+
+    def _start_offset(self, head, size):
+        offset = self.checkpoint.get("offset") or 0
+        if not offset:
+            return 0
+        if size < offset or fingerprint(head, offset) != self.checkpoint.get("fingerprint"):
+            print(f"[INFO] {self.file_path} was replaced since the last checkpoint. Reading it from the start.")
+            return 0
+        if size > offset:
+            print(f"[INFO] {self.file_path} grew by {size - offset} bytes. Continuing from the last checkpoint.")
+        return offset
+
+    def __iter__(self):
+        with open(self.file_path, "rb") as file:
+            size = os.fstat(file.fileno()).st_size
+            head = file.read(FINGERPRINT_BYTES)
+            offset = self._start_offset(head, size)
+            file.seek(offset)
+            if offset == 0:
+                # Skip the header row
+                offset += len(file.readline())
+                self.checkpoint = {"offset": offset, "fingerprint": fingerprint(head, offset)}
+
+            # Past the first FINGERPRINT_BYTES every checkpoint shares the same fingerprint
+            head_fingerprint = fingerprint(head, FINGERPRINT_BYTES)
+            # The reader pulls whole lines, so after each record `consumed` is the offset just past it
+            consumed = {"offset": offset, "exhausted": False}
+
+            def complete_lines():
+                for line in iter(file.readline, b""):
+                    if not line.endswith(b"\n"):
+                        # A line still being appended is left for the next pass
+                        break
+                    consumed["offset"] += len(line)
+                    yield line.decode("utf-8-sig")
+                consumed["exhausted"] = True
+
+            for row in csv.reader(complete_lines()):
+                if consumed["exhausted"]:
+                    # The file ended inside a quoted field, so the record is not complete yet
+                    break
+                offset = consumed["offset"]
+                topic = normalize_topic(row[0]) if row else ""
+                self.checkpoint = {
+                    "offset": offset,
+                    "fingerprint": head_fingerprint if offset >= FINGERPRINT_BYTES else fingerprint(head, offset)
+                }
+                if not topic or topic.casefold() in self._seen:
+                    continue
+                self._seen.add(topic.casefold())
+                yield topic
+
+    def batches(self, size):
+        """Yield lists of up to `size` topics; `checkpoint` covers every batch yielded so far."""
+        batch = []
+        for topic in self:
+            batch.append(topic)
+            if len(batch) >= size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
 
 def extract_trends_from_csv(file_path=None):
-    # Default file path if none is provided
-    if not file_path:
-        file_path = os.path.abspath("./src/trends/data/trending_US_7d_20241125-1756.csv")
-    
-    trends = []
     try:
-        with open(file_path, 'r', encoding='utf-8') as csvfile:
-            reader = csv.reader(csvfile)
-            next(reader)
-            for row in reader:
-                if row:
-                    trends.append(row[0])
+        return list(CsvTopicSource(file_path))
     except Exception as e:
         print(f"[ERROR] Failed to process the CSV file: {e}")
-    return trends
+        return []
 
 if __name__ == "__main__":
     user_file_path = input("[INPUT] Enter the path to the CSV file (leave blank to use default): ").strip()
@@ -1,3 +1,10 @@
-from .youtube_scraper import scrape_trending_videos
+from .scheduler import ScrapeScheduler, scrape_topics, scrape_trending_videos
+from .http_extractor import fetch_video_details, fetch_search_results, iter_search_results, parse_watch_page, parse_search_results
+from .concurrency import AdaptiveConcurrency, FixedConcurrency
+from .driver_pool import DriverPool, get_driver_pool, shutdown_driver_pool
 
-__all__ = ["scrape_trending_videos"]
\ No newline at end of file
+__all__ = [
+    "ScrapeScheduler", "scrape_topics", "scrape_trending_videos",
+    "fetch_video_details", "fetch_search_results", "iter_search_results", "parse_watch_page", "parse_search_results",
+    "AdaptiveConcurrency", "FixedConcurrency", "DriverPool", "get_driver_pool", "shutdown_driver_pool"
+]
@@ -0,0 +1,307 @@
+"""
+This file harvests the top-level comments of scraped videos over plain HTTP.
+The watch page embeds the token for the first page of comments. Each later
+page comes from the innertube "next" endpoint, fetched with the previous
+page's continuation token on the shared pooled session, so no browser
+scrolls the page. Comments are yielded a page at a time, which bounds
+memory to one page per video. They are written to MongoDB in unordered
+batches, deduplicated on comment_id. After each write the video's next
+continuation token is saved, so an interrupted harvest resumes where it
+stopped instead of starting over. A saved token that no longer works
+restarts the video from its watch page, and a video without a comments
+section is marked done.
+
+Usage (from src/):
+    python -m video_scraper.comments --limit 100 --threads 8
+    python -m video_scraper.comments --video-id dQw4w9WgXcQ
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from threading import Lock
+from pymongo import ASCENDING
+from db import close_client, get_client, get_db
+from db.db import insert_unique
+from metrics import count, timed
+from .http_extractor import (
+    build_watch_url, extract_embedded_json, fetch_html, find_continuation_token, iter_key, parse_innertube_config,
+    post_continuation
+)
+from .stats_parser import normalize_stats
+
+COMMENTS_DATABASE = "youtube_comments"
+COMMENTS_COLLECTION = "comments"
+COMMENT_PROGRESS_COLLECTION = "comment_progress"
+# Pages per video per harvest; a video with more keeps its token and continues on the next harvest
+MAX_COMMENT_PAGES = 50
+COMMENT_BATCH_SIZE = 500
+COMMENT_THREADS = 8
+# Videos submitted per harvest thread at a time, so a streamed ID source is never read ahead in full
+COMMENT_QUEUE_FACTOR = 2
+
+# The API key and client version are the same on every watch page, so one page's config serves all
+_innertube_config = None
+_innertube_config_lock = Lock()
+
+
+def remember_innertube_config(html):
+    global _innertube_config
+    config = parse_innertube_config(html)
+    if config:
+        with _innertube_config_lock:
+            _innertube_config = config
+    return config
+
+
+def find_comment_token(initial_data):
+    # The comments section is an itemSectionRenderer whose only content is a continuation placeholder
+    for section in iter_key(initial_data, "itemSectionRenderer"):
+        if isinstance(section, dict) and section.get("sectionIdentifier") == "comment-item-section":
+            return find_continuation_token(section)
+    return None
+
+
+def find_next_comment_token(data):
+    # The next page's token sits in a continuationItemRenderer at the end of the comment list;
+    # tokens inside threads load replies, and those in the header re-sort the list
+    token = None
+    for items in iter_key(data, "continuationItems"):
+        if isinstance(items, list) and items and isinstance(items[-1], dict) and "continuationItemRenderer" in items[-1]:
+            token = find_continuation_token(items[-1]) or token
+    return token
+
+
+def _text(value):
+    if not isinstance(value, dict):
+        return value if isinstance(value, str) else None
+    if "simpleText" in value:
+        return value["simpleText"]
+    return "".join(run.get("text", "") for run in value.get("runs", [])) or None
+
+
+def parse_comment_entity(payload):
+    # Current layout: comment data lives in frameworkUpdates entity mutations
+    properties = payload.get("properties") or {}
+    if not properties.get("commentId") or properties.get("replyLevel", 0):
+        return None
+    author = payload.get("author") or {}
+    toolbar = payload.get("toolbar") or {}
+    return {
+        "comment_id": properties["commentId"],
+        "text": (properties.get("content") or {}).get("content"),
+        "author": author.get("displayName"),
+        "author_channel_id": author.get("channelId"),
+        "published_time": properties.get("publishedTime"),
+        "raw_stats": {"like_count": toolbar.get("likeCountNotliked"), "reply_count": toolbar.get("replyCount")},
+    }
+
+
+def parse_comment_renderer(renderer):
+    # Older layout: each comment is a commentRenderer inside a commentThreadRenderer
+    if not renderer.get("commentId"):
+        return None
+    return {
+        "comment_id": renderer["commentId"],
+        "text": _text(renderer.get("contentText")),
+        "author": _text(renderer.get("authorText")),
+        "author_channel_id": renderer.get("authorEndpoint", {}).get("browseEndpoint", {}).get("browseId"),
+        "published_time": _text(renderer.get("publishedTimeText")),
+        "raw_stats": {"like_count": _text(renderer.get("voteCount")), "reply_count": renderer.get("replyCount")},
+    }
+
+
+def parse_comment_page(data, video_id):
+    """The top-level comments on one continuation response, and the token for the page after it."""
+    comments = {}
+    for payload in iter_key(data, "commentEntityPayload"):
+        comment = parse_comment_entity(payload) if isinstance(payload, dict) else None
+        if comment:
+            comments.setdefault(comment["comment_id"], comment)
+    for thread in iter_key(data, "commentThreadRenderer"):
+        renderer = thread.get("comment", {}).get("commentRenderer") if isinstance(thread, dict) else None
+        comment = parse_comment_renderer(renderer) if isinstance(renderer, dict) else None
+        if comment:
+            comments.setdefault(comment["comment_id"], comment)
+    for comment in comments.values():
+        comment["video_id"] = video_id
+    return list(comments.values()), find_next_comment_token(data)
+
+
+def fetch_comment_page(config, token):
+    return post_continuation("next", config, token, "http_comment_continuation")
+
+
+def iter_comment_pages(video_id, token=None, max_pages=MAX_COMMENT_PAGES):
+    """Yield (comments, next_token) per page, from the first page or from a saved continuation token."""
+    config = _innertube_config
+    if token is None or config is None:
+        html = fetch_html(build_watch_url(video_id))
+        if not html:
+            return
+        config = remember_innertube_config(html)
+        if token is None:
+            token = find_comment_token(extract_embedded_json(html, "ytInitialData") or {})
+            if token is None:
+                # No comments section (comments are off): one empty last page, so the video counts as done
+                yield [], None
+                return
+
+    for _ in range(max_pages):
+        if not config or not token:
+            return
+        data = fetch_comment_page(config, token)
+        if data is None:
+            return
+        with timed("http_parse_comments") as timer:
+            comments, token = parse_comment_page(data, video_id)
+            if not comments:
+                timer.outcome = "empty"
+        yield comments, token
+
+
+def iter_comments(video_id, token=None, max_pages=MAX_COMMENT_PAGES):
+    for comments, _ in iter_comment_pages(video_id, token, max_pages):
+        yield from comments
+
+
+def get_comment_collections():
+    database = get_client()[COMMENTS_DATABASE]
+    return database[COMMENTS_COLLECTION], database[COMMENT_PROGRESS_COLLECTION]
+
+
+class CommentHarvester:
+    def __init__(self, collection=None, progress=None, threads=COMMENT_THREADS, batch_size=COMMENT_BATCH_SIZE,
+                 max_pages=MAX_COMMENT_PAGES):
+        if collection is None or progress is None:
+            collection, progress = get_comment_collections()
+        self.collection = collection
+        # One document per video: the continuation token to resume from, or done once the last page is stored
+        self.progress = progress
+        self.threads = threads
+        self.batch_size = batch_size
+        self.max_pages = max_pages
+        self.collection.create_index([("comment_id", ASCENDING)], unique=True)
+        self.collection.create_index([("video_id", ASCENDING)])
+        self._counts_lock = Lock()
+        self.stored_count = 0
+        self.duplicate_count = 0
+
+    def harvest(self, video_ids):
+        videos = self.stored_count = self.duplicate_count = 0
+        pending = set()
+        with ThreadPoolExecutor(max_workers=self.threads) as executor:
+            video_ids = iter(video_ids)
+            while True:
+                # Refilled as videos finish, so at most COMMENT_QUEUE_FACTOR videos per thread are in flight
+                for video_id in video_ids:
+                    pending.add(executor.submit(self.harvest_video, video_id))
+                    if len(pending) >= self.threads * COMMENT_QUEUE_FACTOR:
+                        break
+                if not pending:
+                    break
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for _ in finished:
+                    videos += 1
+                    if videos % 50 == 0:
+                        print(f"[INFO] Harvested comments for {videos} videos ({self.stored_count} stored).")
+        print(f"[INFO] Comment harvest finished: {videos} videos, {self.stored_count} comments stored, "
+              f"{self.duplicate_count} duplicates skipped.")
+        return {"video_count": videos, "stored_count": self.stored_count, "duplicate_count": self.duplicate_count}
+
+    def harvest_video(self, video_id):
+        state = self.progress.find_one({"_id": video_id}) or {}
+        if state.get("done"):
+            return 0
+        token = state.get("token")
+        try:
+            stored, pages = self._harvest_pages(video_id, token)
+            if token is not None and not pages:
+                # The saved continuation has expired; duplicates from the restart are skipped on insert
+                print(f"[INFO] Saved comment token for {video_id} no longer works. Restarting from the watch page.")
+                count("comment_token_restarts_total")
+                stored, _ = self._harvest_pages(video_id, None)
+        except Exception as e:
+            print(f"[ERROR] Failed to harvest comments for {video_id}: {e}")
+            return 0
+        return stored
+
+    def _harvest_pages(self, video_id, token):
+        resumed = token is not None
+        stored = total_pages = pages = 0
+        buffer = []
+        for comments, next_token in iter_comment_pages(video_id, token, self.max_pages):
+            if resumed and not total_pages and not comments and next_token is None:
+                # An empty final page straight from a saved token means the token is stale, not that we are done
+                return stored, 0
+            buffer.extend(comments)
+            token = next_token
+            pages += 1
+            total_pages += 1
+            if len(buffer) >= self.batch_size:
+                stored += self._flush(video_id, buffer, token, pages)
+                buffer, pages = [], 0
+        if buffer or pages:
+            # With no next token the last page has been stored and the video is done
+            stored += self._flush(video_id, buffer, token, pages)
+        return stored, total_pages
+
+    def _flush(self, video_id, comments, token, pages):
+        inserted = []
+        if comments:
+            now = time.time()
+            for comment in comments:
+                comment["scraped_at"] = now
+            normalize_stats(comments, fields=("like_count", "reply_count"))
+            with timed("mongo_comment_write"):
+                inserted = insert_unique(self.collection, comments)
+        # Saved only after the comments before it are stored, so a resume never skips a page
+        self.progress.update_one(
+            {"_id": video_id},
+            {"$set": {"token": token, "done": token is None, "updated_at": time.time()},
+             "$inc": {"pages": pages, "comments": len(inserted)}},
+            upsert=True
+        )
+        count("comments_stored_total", len(inserted))
+        count("comments_duplicate_total", len(comments) - len(inserted))
+        with self._counts_lock:
+            self.stored_count += len(inserted)
+            self.duplicate_count += len(comments) - len(inserted)
+        return len(inserted)
+
+
+def iter_stored_video_ids(collection, limit=None):
+    """Video IDs of the scraped videos, newest first, streamed rather than loaded with distinct()."""
+    cursor = collection.find({"video_id": {"$exists": True}}, {"video_id": 1}).sort("_id", -1)
+    seen = set()
+    for document in cursor:
+        video_id = document.get("video_id")
+        if video_id and video_id not in seen:
+            seen.add(video_id)
+            yield video_id
+            if limit and len(seen) >= limit:
+                return
+
+
+def harvest_comments(video_ids=None, threads=COMMENT_THREADS, limit=None):
+    if video_ids is None:
+        video_ids = iter_stored_video_ids(get_db("trending_video_data")[0], limit)
+    return CommentHarvester(threads=threads).harvest(video_ids)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Harvest YouTube comments for scraped videos.")
+    parser.add_argument("--video-id", nargs="+", help="Harvest these videos instead of the stored ones")
+    parser.add_argument("--limit", type=int, help="Harvest at most this many stored videos, newest first")
+    parser.add_argument("--threads", type=int, default=COMMENT_THREADS, help="Videos harvested concurrently")
+    args = parser.parse_args(argv)
+    try:
+        harvest_comments(args.video_id, args.threads, args.limit)
+    finally:
+        close_client()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+This file adapts the number of active scraping workers with an AIMD
+controller. Workers take a slot before each video. After every window of
+results the limit grows additively while pages are healthy. It is cut
+multiplicatively when latency, timeouts, errors, host CPU load or free
+memory show the machine or YouTube is struggling. The limit always stays
+within the configured floor and ceiling.
+"""
+
+import os
+from threading import Condition
+
+WINDOW_SIZE = 10
+TARGET_LATENCY = 8.0
+MAX_ERROR_RATE = 0.2
+MAX_TIMEOUT_RATE = 0.1
+MAX_CPU_LOAD = 0.9
+MIN_FREE_MEMORY = 0.1
+DECREASE_FACTOR = 0.7
+
+
+def cpu_load():
+    # One-minute load average per core, or None where the platform has no load average
+    try:
+        return os.getloadavg()[0] / (os.cpu_count() or 1)
+    except (AttributeError, OSError):
+        return None
+
+
+def free_memory_fraction():
+    try:
+        with open("/proc/meminfo", "r") as file:
+            fields = dict(line.split(":", 1) for line in file)
+        total = int(fields["MemTotal"].split()[0])
+        available = int(fields["MemAvailable"].split()[0])
+        return available / total
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class AdaptiveConcurrency:
+    def __init__(self, floor=1, ceiling=8, initial=None, window=WINDOW_SIZE, target_latency=TARGET_LATENCY):
+        self.floor = max(1, floor)
+        self.ceiling = max(self.floor, ceiling)
+        self.limit = min(self.ceiling, max(self.floor, initial or self.floor))
+        self.window = window
+        self.target_latency = target_latency
+        self._active = 0
+        self._samples = []
+        # Double the limit each window until the first sign of overload, then grow by one
+        self._slow_start = True
+        self._condition = Condition()
+
+    def acquire(self):
+        with self._condition:
+            while self._active >= self.limit:
+                self._condition.wait()
+            self._active += 1
+
+    def release(self):
+        with self._condition:
+            self._active -= 1
+            self._condition.notify()
+
+    def record(self, latency, ok=True, timed_out=False):
+        with self._condition:
+            self._samples.append((latency, ok, timed_out))
+            if len(self._samples) >= self.window:
+                self._adjust()
+
+    def _overload_reason(self):
+        samples = self._samples
+        latencies = sorted(latency for latency, _, _ in samples)
+        p90_latency = latencies[int(0.9 * (len(latencies) - 1))]
+        error_rate = sum(1 for _, ok, _ in samples if not ok) / len(samples)
+        timeout_rate = sum(1 for _, _, timed_out in samples if timed_out) / len(samples)
+
+        if timeout_rate > MAX_TIMEOUT_RATE:
+            return f"timeout rate {timeout_rate:.0%}"
+        if error_rate > MAX_ERROR_RATE:
+            return f"error rate {error_rate:.0%}"
+        if p90_latency > self.target_latency:
+            return f"p90 latency {p90_latency:.1f}s"
+
+        load = cpu_load()
+        if load is not None and load > MAX_CPU_LOAD:
+            return f"CPU load {load:.2f} per core"
+        free_memory = free_memory_fraction()
+        if free_memory is not None and free_memory < MIN_FREE_MEMORY:
+            return f"free memory {free_memory:.0%}"
+        return None
+
+    def _adjust(self):
+        reason = self._overload_reason()
+        self._samples = []
+        previous = self.limit
+
+        if reason:
+            self._slow_start = False
+            self.limit = max(self.floor, int(self.limit * DECREASE_FACTOR))
+        elif self._slow_start:
+            self.limit = min(self.ceiling, self.limit * 2)
+        else:
+            self.limit = min(self.ceiling, self.limit + 1)
+
+        if self.limit != previous:
+            print(f"[INFO] Concurrency limit {previous} -> {self.limit}" + (f" ({reason})" if reason else ""))
+            self._condition.notify_all()
+
+
+class FixedConcurrency:
+    # Same interface with a constant limit, used when adaptive control is off
+    def __init__(self, limit):
+        self.floor = self.ceiling = self.limit = max(1, limit)
+
+    def acquire(self):
+        pass
+
+    def release(self):
+        pass
+
+    def record(self, latency, ok=True, timed_out=False):
+        pass
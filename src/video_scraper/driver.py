@@ -10,9 +10,16 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 import subprocess
 
-def create_driver():
+# "eager" returns from driver.get() at DOMContentLoaded instead of waiting for
+# every subresource; the extraction scripts wait for the elements they need
+PAGE_LOAD_STRATEGY = os.getenv("PAGE_LOAD_STRATEGY", "eager")
+SCRIPT_TIMEOUT = 15
+PAGE_LOAD_TIMEOUT = 30
+
+def create_driver(page_load_strategy=PAGE_LOAD_STRATEGY):
     try:
         options = Options()
+        options.page_load_strategy = page_load_strategy
         options.add_argument("--headless=new")
         options.add_argument("--incognito")
         options.add_argument("--disable-web-security")
@@ -37,6 +44,8 @@ def create_driver():
         # Initialize the WebDriver
         service = Service(driver_path)
         driver = webdriver.Chrome(service=service, options=options)
+        driver.set_script_timeout(SCRIPT_TIMEOUT)
+        driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
         return driver
 
     except Exception as e:
@@ -0,0 +1,156 @@
+"""
+This file keeps a bounded pool of warm Selenium WebDrivers that scraping
+threads check out and return. Drivers are reset between uses, recycled after
+a number of pages or after a crash, and shut down together at exit.
+"""
+
+import atexit
+import time
+from contextlib import contextmanager
+from threading import Condition, Lock
+from metrics import timed
+from .driver import create_driver
+
+DEFAULT_POOL_SIZE = 7
+MAX_PAGES_PER_DRIVER = 50
+
+CLEAR_STORAGE_SCRIPT = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+return true;
+"""
+
+
+class DriverPool:
+    def __init__(self, max_size=DEFAULT_POOL_SIZE, max_pages=MAX_PAGES_PER_DRIVER, driver_factory=create_driver):
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self._driver_factory = driver_factory
+        self._idle = []
+        self._page_counts = {}
+        self._created = 0
+        self._closed = False
+        self._condition = Condition()
+        self.drivers_started = 0
+        self.startup_seconds = 0.0
+
+    def acquire(self, timeout=None):
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Driver pool has been shut down.")
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.max_size:
+                    self._created += 1
+                    break
+                if not self._condition.wait(timeout):
+                    raise TimeoutError("Timed out waiting for a free WebDriver.")
+
+        # Launch the browser outside the lock so other threads are not blocked
+        started = time.perf_counter()
+        with timed("create_driver") as timer:
+            driver = self._driver_factory()
+            if not driver:
+                timer.outcome = "error"
+        elapsed = time.perf_counter() - started
+        if not driver:
+            with self._condition:
+                self._created -= 1
+                self.startup_seconds += elapsed
+                self._condition.notify()
+            return None
+
+        with self._condition:
+            self._page_counts[driver] = 0
+            self.drivers_started += 1
+            self.startup_seconds += elapsed
+        return driver
+
+    def release(self, driver, broken=False):
+        if driver is None:
+            return
+
+        with self._condition:
+            self._page_counts[driver] = self._page_counts.get(driver, 0) + 1
+            expired = self._page_counts[driver] >= self.max_pages
+            closed = self._closed
+
+        if broken or expired or closed or not self._reset(driver):
+            self._discard(driver)
+            return
+
+        with self._condition:
+            self._idle.append(driver)
+            self._condition.notify()
+
+    @contextmanager
+    def driver(self, timeout=None):
+        driver = self.acquire(timeout)
+        broken = False
+        try:
+            yield driver
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self.release(driver, broken=broken)
+
+    def _reset(self, driver):
+        # Doubles as a health check: a crashed browser fails these calls
+        try:
+            driver.execute_script(CLEAR_STORAGE_SCRIPT)
+            driver.delete_all_cookies()
+            return True
+        except Exception as e:
+            print(f"[WARNING] WebDriver failed health check, recycling it: {e}")
+            return False
+
+    def _discard(self, driver):
+        with self._condition:
+            self._page_counts.pop(driver, None)
+            self._created -= 1
+            self._condition.notify()
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"[ERROR] Failed to quit WebDriver: {e}")
+
+    def shutdown(self):
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+
+        for driver in idle:
+            self._discard(driver)
+        if idle:
+            print(f"[INFO] Driver pool shut down. Closed {len(idle)} WebDriver(s).")
+
+
+_shared_pool = None
+_shared_pool_lock = Lock()
+
+
+def get_driver_pool(max_size=None):
+    global _shared_pool
+    with _shared_pool_lock:
+        if _shared_pool is None or _shared_pool._closed:
+            _shared_pool = DriverPool(max_size=max_size or DEFAULT_POOL_SIZE)
+        elif max_size and max_size > _shared_pool.max_size:
+            with _shared_pool._condition:
+                _shared_pool.max_size = max_size
+                # Threads blocked in acquire() may now create a driver of their own
+                _shared_pool._condition.notify_all()
+        return _shared_pool
+
+
+def shutdown_driver_pool():
+    global _shared_pool
+    with _shared_pool_lock:
+        pool, _shared_pool = _shared_pool, None
+    if pool is not None:
+        pool.shutdown()
+
+
+atexit.register(shutdown_driver_pool)
@@ -0,0 +1,252 @@
+"""
+This file scrapes YouTube search and watch pages over plain HTTP. Every page
+already embeds its data as the ytInitialData and ytInitialPlayerResponse JSON
+objects, so parsing those out of the HTML gives the same fields as the
+Selenium scraper without launching a browser.
+"""
+
+import json
+import os
+import re
+from threading import Lock
+from urllib.parse import parse_qs, quote_plus, urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from archive.page_archive import archive_page
+from metrics import timed
+
+# Overridable so the benchmark can point the scraper at a local fixture server
+YOUTUBE_BASE_URL = os.getenv("YOUTUBE_BASE_URL", "https://www.youtube.com")
+REQUEST_TIMEOUT = 10
+HTTP_POOL_SIZE = 32
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/113.0.0.0 Safari/537.36"
+
+# Pre-accepted consent cookies so EU exits don't get the consent interstitial
+CONSENT_COOKIES = {"CONSENT": "YES+cb", "SOCS": "CAI"}
+
+# Continuation requests reuse the API key and client version embedded in the search page
+INNERTUBE_API_KEY_PATTERN = re.compile(r'"INNERTUBE_API_KEY"\s*:\s*"([^"]+)"')
+INNERTUBE_CLIENT_VERSION_PATTERN = re.compile(r'"INNERTUBE_CLIENT_VERSION"\s*:\s*"([^"]+)"')
+MAX_SEARCH_PAGES = 10
+
+_session = None
+_session_lock = Lock()
+_json_decoder = json.JSONDecoder()
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            retries = Retry(total=2, backoff_factor=0.3, status_forcelist=(429, 500, 502, 503, 504))
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE, max_retries=retries)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"User-Agent": USER_AGENT, "Accept-Language": "en-US,en;q=0.9"})
+            session.cookies.update(CONSENT_COOKIES)
+            _session = session
+        return _session
+
+
+def build_search_url(topic):
+    return f"{YOUTUBE_BASE_URL}/results?search_query={quote_plus(topic)}"
+
+
+def build_watch_url(video_id):
+    return f"{YOUTUBE_BASE_URL}/watch?v={video_id}"
+
+
+def extract_video_id(video_url):
+    parsed = urlparse(video_url)
+    if parsed.path == "/watch":
+        return parse_qs(parsed.query).get("v", [None])[0]
+    if parsed.path.startswith("/shorts/") or parsed.netloc.endswith("youtu.be"):
+        return parsed.path.rstrip("/").rsplit("/", 1)[-1] or None
+    return None
+
+
+def fetch_html(url, timeout=REQUEST_TIMEOUT, raise_timeout=False):
+    # With raise_timeout, a timed-out request raises requests.Timeout instead of returning None
+    with timed("http_fetch") as timer:
+        try:
+            response = get_session().get(url, timeout=timeout)
+            response.raise_for_status()
+            archive_page(url, response.text)
+            return response.text
+        except requests.Timeout as e:
+            timer.outcome = "timeout"
+            print(f"[ERROR] HTTP request timed out for {url}: {e}")
+            if raise_timeout:
+                raise
+            return None
+        except requests.RequestException as e:
+            timer.outcome = "error"
+            print(f"[ERROR] HTTP request failed for {url}: {e}")
+            return None
+
+
+def extract_embedded_json(html, variable_name):
+    # Matches both `var ytInitialData = {...};` and `window["ytInitialData"] = {...};`
+    pattern = re.compile(r"(?:var\s+|window\[[\"'])" + re.escape(variable_name) + r"(?:[\"']\])?\s*=\s*(?={)")
+    for match in pattern.finditer(html):
+        try:
+            data, _ = _json_decoder.raw_decode(html, match.end())
+            return data
+        except ValueError:
+            continue
+    return None
+
+
+def iter_key(data, key):
+    # Depth-first walk over nested dicts and lists, yielding every value stored under `key`
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if key in node:
+                yield node[key]
+            stack.extend(reversed(list(node.values())))
+        elif isinstance(node, list):
+            stack.extend(reversed(node))
+
+
+def find_like_text(initial_data):
+    for like_model in iter_key(initial_data, "likeButtonViewModel"):
+        for button in iter_key(like_model, "buttonViewModel"):
+            if isinstance(button, dict) and button.get("title"):
+                return button["title"]
+    return None
+
+
+def parse_watch_page(html):
+    player_response = extract_embedded_json(html, "ytInitialPlayerResponse")
+    if not player_response:
+        return None
+
+    video_details = player_response.get("videoDetails") or {}
+    if not video_details.get("title"):
+        return None
+
+    microformat = player_response.get("microformat", {}).get("playerMicroformatRenderer", {})
+    like_text = find_like_text(extract_embedded_json(html, "ytInitialData") or {})
+
+    return {
+        "title": video_details["title"],
+        "description": video_details.get("shortDescription") or "No description available",
+        "tags": video_details.get("keywords", []),
+        "upload_date": microformat.get("publishDate") or microformat.get("uploadDate") or "Unknown",
+        # Parsed into view_count and likes a batch at a time by stats_parser.normalize_stats
+        "raw_stats": {"view_count": video_details.get("viewCount"), "likes": like_text}
+    }
+
+
+def extract_video_urls(data):
+    video_urls = []
+    for renderer in iter_key(data, "videoRenderer"):
+        video_id = renderer.get("videoId") if isinstance(renderer, dict) else None
+        if not video_id:
+            continue
+        endpoint_url = (
+            renderer.get("navigationEndpoint", {})
+            .get("commandMetadata", {})
+            .get("webCommandMetadata", {})
+            .get("url", "")
+        )
+        if "/shorts/" in endpoint_url:
+            continue
+        video_url = build_watch_url(video_id)
+        if video_url not in video_urls:
+            video_urls.append(video_url)
+    return video_urls
+
+
+def find_continuation_token(data):
+    # The last continuation on a page is the one that loads the next batch of results
+    token = None
+    for command in iter_key(data, "continuationCommand"):
+        if isinstance(command, dict) and command.get("token"):
+            token = command["token"]
+    return token
+
+
+def parse_search_results(html):
+    initial_data = extract_embedded_json(html, "ytInitialData")
+    if not initial_data:
+        return None
+    return extract_video_urls(initial_data)
+
+
+def parse_innertube_config(html):
+    api_key = INNERTUBE_API_KEY_PATTERN.search(html)
+    client_version = INNERTUBE_CLIENT_VERSION_PATTERN.search(html)
+    if not api_key or not client_version:
+        return None
+    return {"api_key": api_key.group(1), "client_version": client_version.group(1)}
+
+
+def fetch_video_details(video_url, timeout=REQUEST_TIMEOUT, raise_timeout=False):
+    html = fetch_html(video_url, timeout, raise_timeout)
+    if not html:
+        return None
+    with timed("http_parse_watch") as timer:
+        video_data = parse_watch_page(html)
+        if not video_data:
+            timer.outcome = "empty"
+    return video_data
+
+
+def post_continuation(endpoint, config, token, stage):
+    url = f"{YOUTUBE_BASE_URL}/youtubei/v1/{endpoint}?key={config['api_key']}&prettyPrint=false"
+    payload = {
+        "context": {"client": {"clientName": "WEB", "clientVersion": config["client_version"], "hl": "en", "gl": "US"}},
+        "continuation": token
+    }
+    with timed(stage) as timer:
+        try:
+            response = get_session().post(url, json=payload, timeout=REQUEST_TIMEOUT)
+            response.raise_for_status()
+            return response.json()
+        except (requests.RequestException, ValueError) as e:
+            timer.outcome = "error"
+            print(f"[ERROR] Continuation request to {endpoint} failed: {e}")
+            return None
+
+
+def fetch_search_continuation(config, token):
+    return post_continuation("search", config, token, "http_search_continuation")
+
+
+def iter_search_results(topic, max_pages=MAX_SEARCH_PAGES):
+    """Yield watch URLs page by page, following search continuations until the caller stops."""
+    html = fetch_html(build_search_url(topic))
+    if not html:
+        return
+    initial_data = extract_embedded_json(html, "ytInitialData")
+    if not initial_data:
+        return
+
+    yield from extract_video_urls(initial_data)
+
+    config = parse_innertube_config(html)
+    token = find_continuation_token(initial_data)
+    for _ in range(max_pages - 1):
+        if not config or not token:
+            return
+        data = fetch_search_continuation(config, token)
+        if not data:
+            return
+        yield from extract_video_urls(data)
+        token = find_continuation_token(data)
+
+
+def fetch_search_results(topic):
+    html = fetch_html(build_search_url(topic))
+    if not html:
+        return None
+    with timed("http_parse_search", topic) as timer:
+        video_urls = parse_search_results(html)
+        if not video_urls:
+            timer.outcome = "empty"
+    return video_urls
@@ -0,0 +1,94 @@
+"""
+This file holds the JavaScript injected into YouTube pages by the Selenium
+scraper. Each script waits for its page in the browser and returns every
+field in one payload, so a page costs a single WebDriver round-trip.
+"""
+
+# Arguments: wait timeout in milliseconds, async callback
+WATCH_PAGE_SCRIPT = """
+var timeoutMs = arguments[0];
+var done = arguments[arguments.length - 1];
+var started = Date.now();
+
+function textAt(xpath) {
+    var node = document.evaluate(xpath, document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+    return node ? node.innerText : null;
+}
+
+function collect(title) {
+    var keywords = document.querySelector('meta[name="keywords"]');
+    done({
+        title: title,
+        description: textAt('//yt-attributed-string[@id="attributed-snippet-text"]') || textAt('//span[@id="plain-snippet-text"]'),
+        tags: keywords ? keywords.getAttribute('content') : null,
+        upload_date: textAt('//span[@class="style-scope yt-formatted-string bold"][3]'),
+        view_count: textAt('//span[@class="style-scope yt-formatted-string bold"][1]'),
+        likes: textAt('//*[@id="top-level-buttons-computed"]/segmented-like-dislike-button-view-model/yt-smartimation/div/div/like-button-view-model/toggle-button-view-model/button-view-model/button/div[2]')
+    });
+}
+
+function waitForTitle() {
+    var title = textAt('//h1[@class="style-scope ytd-watch-metadata"]/yt-formatted-string');
+    if (!title) {
+        if (Date.now() - started < timeoutMs) {
+            setTimeout(waitForTitle, 100);
+        } else {
+            done(null);
+        }
+        return;
+    }
+
+    // Expand the description so the date and view count spans are rendered
+    var expand = document.querySelector('tp-yt-paper-button#expand');
+    if (expand) {
+        try { expand.click(); } catch (e) {}
+        setTimeout(function () { collect(title); }, 100);
+    } else {
+        collect(title);
+    }
+}
+
+waitForTitle();
+"""
+
+# Arguments: wait timeout in milliseconds, async callback
+# Returns only the result links not returned by an earlier call on the same page.
+# When every rendered result has been returned, scrolls to load more and waits
+# for them; an empty list means the results stopped growing within the timeout.
+SEARCH_RESULTS_SCRIPT = """
+var timeoutMs = arguments[0];
+var done = arguments[arguments.length - 1];
+var started = Date.now();
+var scrolled = false;
+
+function collectNew() {
+    var renderers = document.querySelectorAll('ytd-video-renderer:not([data-scraper-seen])');
+    var links = [];
+    for (var i = 0; i < renderers.length; i++) {
+        renderers[i].setAttribute('data-scraper-seen', '1');
+        var anchor = renderers[i].querySelector('a#video-title');
+        links.push(anchor ? anchor.href : null);
+    }
+    return links;
+}
+
+function poll() {
+    var links = collectNew();
+    if (links.length) {
+        done(links);
+        return;
+    }
+    if (Date.now() - started >= timeoutMs) {
+        done([]);
+        return;
+    }
+    // Nothing new is rendered yet, so scroll once to trigger the next continuation
+    if (!scrolled && document.querySelector('ytd-video-renderer')) {
+        scrolled = true;
+        window.scrollTo(0, document.documentElement.scrollHeight);
+    }
+    setTimeout(poll, 100);
+}
+
+poll();
+"""
@@ -0,0 +1,328 @@
+"""
+This file schedules a whole scraping session at once. Search discovery runs
+for every topic concurrently and feeds each video URL into one shared pool of
+workers, so a session takes as long as its total work instead of the sum of
+each topic's slowest video. Results are attributed back to their topic and
+either collected in memory or handed to an on_result callback as they finish.
+Discovery pages through search results and queues each new video as soon as
+it is found. It stops once videos_per_topic new videos are queued.
+
+Each URL gets a deadline budget that starts with its first attempt. Failed
+attempts are retried with jittered exponential backoff. Once an attempt has
+run longer than the recent p95 latency, a hedged duplicate is queued for
+another worker, and whichever attempt finishes first wins.
+"""
+
+import itertools
+import random
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from threading import Condition, Event, Lock, Thread, Timer
+from metrics import count, set_topic, timed
+from .concurrency import FixedConcurrency
+from .driver_pool import get_driver_pool, shutdown_driver_pool
+from .http_extractor import extract_video_id
+from .stats_parser import normalize_stats
+from .youtube_scraper import MAX_VIDEOS, ScrapeTimeout, iter_video_urls, scrape_video_details
+
+MAX_DISCOVERY_THREADS = 4
+URL_DEADLINE = 30
+MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 1.0
+RETRY_MAX_DELAY = 8.0
+HEDGE_PERCENTILE = 0.95
+HEDGE_MIN_SAMPLES = 20
+HEDGE_CHECK_INTERVAL = 0.25
+LATENCY_HISTORY = 200
+
+
+class UrlTask:
+    def __init__(self, topic, video_key, url):
+        self.topic = topic
+        self.video_key = video_key
+        self.url = url
+        self.deadline = None
+        self.attempts = 0
+        self.in_flight = 0
+        self.hedged = False
+        self.done = False
+        self.last_error = None
+
+
+class ScrapeScheduler:
+    def __init__(self, thread_count=7, pool=None, discovery_threads=MAX_DISCOVERY_THREADS, on_result=None,
+                 known_videos=None, journal=None, concurrency=None, url_deadline=URL_DEADLINE,
+                 max_attempts=MAX_ATTEMPTS, hedging=True, videos_per_topic=MAX_VIDEOS):
+        # An AdaptiveConcurrency controller varies the active workers; otherwise thread_count is fixed
+        self.concurrency = concurrency or FixedConcurrency(thread_count or 1)
+        self.thread_count = self.concurrency.ceiling
+        self.discovery_threads = discovery_threads
+        self.pool = pool or get_driver_pool(self.thread_count)
+        # With a callback, results are streamed out and only per-topic counts are kept
+        self.on_result = on_result
+        # Videos already stored are filtered out before they reach the queue
+        self.known_videos = known_videos
+        # Optional WorkJournal recording discovered URLs and their per-URL state
+        self.journal = journal
+        # Discovery stops once this many new videos are queued for a topic
+        self.videos_per_topic = videos_per_topic
+        self.url_deadline = url_deadline
+        self.max_attempts = max_attempts
+        self.hedging = hedging
+        self.counts = {}
+        self._video_queue = Queue()
+        self._lock = Lock()
+        self._results = {}
+        self._seen_urls = set()
+        # Tasks not yet finished, including ones waiting on a retry timer
+        self._outstanding = 0
+        self._outstanding_changed = Condition(self._lock)
+        self._attempts = {}
+        self._attempt_ids = itertools.count()
+        self._latencies = deque(maxlen=LATENCY_HISTORY)
+        self._stopped = Event()
+
+    def run(self, topics):
+        topics = list(dict.fromkeys(topics))
+        self._results = {topic: [] for topic in topics}
+        self.counts = {topic: 0 for topic in topics}
+        if not topics:
+            return self._results
+
+        self._stopped.clear()
+        workers = [Thread(target=self._worker, daemon=True) for _ in range(self.thread_count)]
+        for thread in workers:
+            thread.start()
+        if self.hedging:
+            Thread(target=self._hedge_loop, daemon=True).start()
+
+        # Workers start scraping as soon as the first topic's URLs are queued
+        with ThreadPoolExecutor(max_workers=min(self.discovery_threads, len(topics))) as executor:
+            for topic in topics:
+                executor.submit(self._discover, topic)
+
+        with self._outstanding_changed:
+            while self._outstanding:
+                self._outstanding_changed.wait()
+
+        self._stopped.set()
+        for _ in workers:
+            self._video_queue.put(None)
+        for thread in workers:
+            thread.join()
+
+        return self._results
+
+    def _discover(self, topic):
+        set_topic(topic)
+        # A journaled topic resumes from its remaining URLs instead of searching again
+        resumed = self.journal is not None and self.journal.is_discovered(topic)
+        search = None
+        if resumed:
+            video_urls = self.journal.pending_urls(topic).values()
+        else:
+            search = video_urls = iter_video_urls(topic, self.pool)
+            if self.journal is not None:
+                # URLs left over from a discovery that was interrupted count towards the target first
+                video_urls = itertools.chain(self.journal.pending_urls(topic).values(), search)
+
+        queued = 0
+        try:
+            with timed("discover", topic):
+                for url in video_urls:
+                    if not resumed and queued >= self.videos_per_topic:
+                        break
+                    if self._accept(topic, url, resumed):
+                        queued += 1
+        except Exception as e:
+            print(f"[ERROR] Failed to find videos for topic '{topic}': {e}")
+            return
+        finally:
+            if search is not None:
+                # Stops the search generator, releasing its WebDriver
+                search.close()
+
+        if self.journal is not None and not resumed:
+            self.journal.record_discovered(topic, {})
+
+        print(f"[INFO] Queued {queued} videos for topic '{topic}'.")
+
+    def _accept(self, topic, url, resumed):
+        with self._lock:
+            # A video found under several topics is scraped once, for the first topic
+            if url in self._seen_urls:
+                return False
+            self._seen_urls.add(url)
+
+        video_id = extract_video_id(url)
+        video_key = video_id or url
+        if self.known_videos is not None and video_id and not self.known_videos.claim(video_id):
+            count("videos_skipped_known_total", topic=topic)
+            if self.journal is not None and self.known_videos.is_stored(video_id):
+                # Stored by an interrupted run before it could be marked done. A video that is only
+                # claimed stays pending, since its scrape may still fail and be released.
+                self.journal.mark_done(video_key)
+            return False
+
+        if self.journal is not None and not resumed:
+            self.journal.record_discovered(topic, {video_key: url}, complete=False)
+
+        # Queued right away so workers scrape while discovery keeps searching
+        with self._lock:
+            self._outstanding += 1
+        self._video_queue.put(UrlTask(topic, video_key, url))
+        return True
+
+    def _worker(self):
+        while True:
+            self.concurrency.acquire()
+            task = self._video_queue.get()
+            if task is None:  # Exit condition
+                self.concurrency.release()
+                break
+            try:
+                self._attempt(task)
+            finally:
+                self.concurrency.release()
+
+    def _attempt(self, task):
+        with self._lock:
+            # A hedge or retry can arrive after another attempt already finished the task
+            if task.done:
+                return
+            if task.deadline is None:
+                task.deadline = time.monotonic() + self.url_deadline
+            task.attempts += 1
+            task.in_flight += 1
+            attempt_id = next(self._attempt_ids)
+            self._attempts[attempt_id] = (task, time.monotonic())
+
+        set_topic(task.topic)
+        if self.journal is not None:
+            self.journal.mark_in_flight(task.video_key)
+
+        started = time.perf_counter()
+        video_data = None
+        timed_out = False
+        try:
+            with timed("scrape_video", task.topic) as timer:
+                video_data = scrape_video_details(task.url, self.pool, deadline=task.deadline)
+                if not video_data:
+                    timer.outcome = "empty"
+                    task.last_error = "No video details extracted"
+        except ScrapeTimeout as e:
+            timed_out = True
+            task.last_error = str(e)
+            print(f"[ERROR] Timed out scraping video {task.url}: {e}")
+        except Exception as e:
+            task.last_error = str(e)
+            print(f"[ERROR] Failed to scrape video {task.url}: {e}")
+
+        elapsed = time.perf_counter() - started
+        self.concurrency.record(elapsed, ok=video_data is not None, timed_out=timed_out)
+
+        with self._lock:
+            self._attempts.pop(attempt_id, None)
+            task.in_flight -= 1
+            won = bool(video_data) and not task.done
+            if won:
+                task.done = True
+                self._latencies.append(elapsed)
+            # A failed attempt only decides the task's fate when no hedge is still running
+            settle = not task.done and task.in_flight == 0
+
+        if won:
+            self._record(task.topic, task.video_key, video_data)
+            self._finish(task)
+        elif settle:
+            self._retry_or_fail(task)
+
+    def _retry_or_fail(self, task):
+        # Full jitter: a random delay up to the capped exponential backoff
+        delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (task.attempts - 1)))
+        if task.attempts < self.max_attempts and time.monotonic() + delay < task.deadline:
+            count("video_retries_total", topic=task.topic)
+            timer = Timer(delay, self._video_queue.put, args=(task,))
+            timer.daemon = True
+            timer.start()
+            return
+
+        with self._lock:
+            # A leftover hedge copy can settle the same task a second time
+            if task.done:
+                return
+            task.done = True
+        print(f"[ERROR] Giving up on {task.url} after {task.attempts} attempt(s): {task.last_error}")
+        count("video_failures_total", topic=task.topic)
+        if self.known_videos is not None:
+            # Lets a later session in this process try the video again
+            self.known_videos.release(task.video_key)
+        if self.journal is not None:
+            self.journal.mark_failed(task.video_key, task.last_error)
+        self._finish(task)
+
+    def _finish(self, task):
+        with self._outstanding_changed:
+            self._outstanding -= 1
+            self._outstanding_changed.notify_all()
+
+    def _hedge_threshold(self):
+        with self._lock:
+            if len(self._latencies) < HEDGE_MIN_SAMPLES:
+                return None
+            latencies = sorted(self._latencies)
+        return latencies[int(HEDGE_PERCENTILE * (len(latencies) - 1))]
+
+    def _hedge_loop(self):
+        while not self._stopped.wait(HEDGE_CHECK_INTERVAL):
+            threshold = self._hedge_threshold()
+            if threshold is None:
+                continue
+
+            now = time.monotonic()
+            with self._lock:
+                slow_tasks = [
+                    task for task, started in self._attempts.values()
+                    if not task.done and not task.hedged and now - started > threshold
+                ]
+                for task in slow_tasks:
+                    task.hedged = True
+
+            for task in slow_tasks:
+                count("video_hedges_total", topic=task.topic)
+                self._video_queue.put(task)
+
+    def _record(self, topic, video_key, video_data):
+        if self.on_result:
+            # The consumer marks the video done in the journal once it is durably stored
+            self.on_result(topic, video_data)
+        elif self.journal is not None:
+            self.journal.mark_done(video_key)
+        with self._lock:
+            self.counts[topic] += 1
+            if not self.on_result:
+                self._results[topic].append(video_data)
+
+
+def scrape_topics(topics, thread_count=7, pool=None):
+    print(f"[INFO] Scraping {len(topics)} topic(s) with {thread_count or 1} worker thread(s).")
+    results = ScrapeScheduler(thread_count, pool).run(topics)
+    for topic, topic_results in results.items():
+        normalize_stats(topic_results)
+        print(f"[INFO] Scraping completed for topic: {topic}. Total videos scraped: {len(topic_results)}")
+    return results
+
+
+def scrape_trending_videos(topic, thread_count=10, pool=None):
+    print(f"[INFO] Starting YouTube video scraper for topic: {topic}")
+    return scrape_topics([topic], thread_count, pool).get(topic, [])
+
+
+if __name__ == "__main__":
+    topics = ["Minimalist Art", "Independent Films", "Urban Street Art", "Theatre Acting Techniques", "Jazz Improvisation"]
+    try:
+        print(scrape_topics(topics, 1))
+    finally:
+        shutdown_driver_pool()
@@ -1,50 +1,122 @@
 """
 This file contains utility functions for parsing and converting numerical
-strings related to likes, view counts, and other formatted numbers into 
-integers.
+strings related to likes, view counts, and other formatted numbers into
+integers. Strings are parsed a whole column at a time with pandas string
+operations. Suffix tables cover the abbreviations YouTube uses in common
+locales ("1.2K", "1,2 k", "3,4 Mio.", "1.2万", "5 тыс."). A value that
+cannot be parsed becomes None rather than 0.
 """
 
+import re
+import numpy as np
+import pandas as pd
+
+# Multipliers for the count abbreviations YouTube renders, per interface language
+SUFFIX_TABLES = {
+    "en": {"k": 1e3, "m": 1e6, "b": 1e9, "thousand": 1e3, "million": 1e6, "billion": 1e9},
+    "de": {"tsd": 1e3, "mio": 1e6, "mrd": 1e9},
+    "es": {"mil": 1e3, "m": 1e6, "mm": 1e9},
+    "fr": {"k": 1e3, "m": 1e6, "md": 1e9, "mds": 1e9},
+    "pt": {"mil": 1e3, "mi": 1e6, "bi": 1e9},
+    "it": {"mln": 1e6, "mld": 1e9},
+    "ru": {"тыс": 1e3, "млн": 1e6, "млрд": 1e9},
+    "hi": {"हज़ार": 1e3, "लाख": 1e5, "करोड़": 1e7, "lakh": 1e5, "crore": 1e7},
+    "ja": {"千": 1e3, "万": 1e4, "億": 1e8},
+    "zh": {"千": 1e3, "万": 1e4, "萬": 1e4, "亿": 1e8, "億": 1e8},
+    "ko": {"천": 1e3, "만": 1e4, "억": 1e8},
+}
+# Without a known locale every table applies; they agree wherever suffixes overlap
+DEFAULT_SUFFIXES = {suffix: value for table in SUFFIX_TABLES.values() for suffix, value in table.items()}
+
+_patterns = {}
+
+
+def _count_pattern(suffixes):
+    # Word suffixes must not run into further letters ("m" in "mil", "k" in "kijken"); CJK suffixes may
+    words = sorted((s for s in suffixes if s.isascii() or not _is_cjk(s)), key=len, reverse=True)
+    characters = [s for s in suffixes if not s.isascii() and _is_cjk(s)]
+    alternatives = [rf"(?:{'|'.join(map(re.escape, words))})(?![^\W\d_])"] if words else []
+    if characters:
+        alternatives.append(f"[{''.join(characters)}]")
+    return re.compile(rf"(?P<number>\d(?:[\d.,' ]*\d)?)\s*(?P<suffix>{'|'.join(alternatives)})?")
+
+
+def _is_cjk(text):
+    return all("\u3040" <= character <= "\u9fff" or "\uac00" <= character <= "\ud7af" for character in text)
+
+
+def _suffix_table(locale):
+    if locale is None:
+        return DEFAULT_SUFFIXES
+    return SUFFIX_TABLES.get(locale.split("-")[0].lower(), DEFAULT_SUFFIXES)
+
+
+def parse_counts(values, locale=None):
+    """Parse a column of raw count strings into a nullable Int64 Series; unparseable values are <NA>."""
+    suffixes = _suffix_table(locale)
+    pattern = _patterns.get(id(suffixes))
+    if pattern is None:
+        pattern = _patterns[id(suffixes)] = _count_pattern(suffixes)
+
+    series = values if isinstance(values, pd.Series) else pd.Series(list(values), dtype="object")
+    # Counts repeat heavily ("1.2K", "10K"), so each distinct string is parsed once and broadcast back
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    if not len(uniques):
+        return pd.Series(pd.array([pd.NA] * len(series), dtype="Int64"), index=series.index)
+    parsed = _parse_unique(pd.Series(uniques, dtype="object"), suffixes, pattern).to_numpy()
+    result = pd.array(np.where(codes >= 0, parsed.take(np.maximum(codes, 0)), pd.NA), dtype="Int64")
+    return pd.Series(result, index=series.index)
+
+
+def _parse_unique(series, suffixes, pattern):
+    # Python storage keeps the re semantics the patterns rely on, even where pyarrow would back "string"
+    text = series.astype(pd.StringDtype("python")).str.lower().str.replace(r"[\u00a0\u202f\n]", " ", regex=True)
+    parts = text.str.extract(pattern)
+
+    number = parts["number"].str.replace(r"[ ']", "", regex=True)
+    multiplier = parts["suffix"].map(suffixes).astype("float64")
+    has_suffix = multiplier.notna()
+
+    # "1,2 k" and "1.2K" are decimals; "1,234,567" and "1.234.567" are digit groups
+    split = number.str.extract(r"^(?P<whole>.*?)(?:[.,](?P<fraction>\d+))?$")
+    decimal = pd.to_numeric(
+        split["whole"].str.replace(r"[.,]", "", regex=True) + "." + split["fraction"].fillna("0"), errors="coerce"
+    )
+    grouped = pd.to_numeric(number.str.replace(r"[.,]", "", regex=True), errors="coerce")
+
+    return grouped.where(~has_suffix, decimal * multiplier).round().astype("Int64")
+
+
+def to_python_counts(parsed):
+    # MongoDB needs plain ints, and <NA> is stored as None
+    return [None if pd.isna(value) else int(value) for value in parsed]
+
+
+def normalize_stats(items, fields=("view_count", "likes"), locale=None):
+    """Fill each item's count fields from its raw_stats, one vectorized pass per field, then drop raw_stats."""
+    if not items:
+        return items
+    for field in fields:
+        raw = [(item.get("raw_stats") or {}).get(field, item.get(field)) for item in items]
+        for item, value in zip(items, to_python_counts(parse_counts(raw, locale))):
+            item[field] = value
+    for item in items:
+        item.pop("raw_stats", None)
+    return items
+
+
+def parse_count(value, locale=None):
+    if isinstance(value, int):
+        return value
+    return to_python_counts(parse_counts([value], locale))[0]
+
+
 def parse_likes(likes_string):
-    try:
-        # Ensure the input is a string
-        if isinstance(likes_string, int):
-            return likes_string  # It's already an integer
-
-        # Remove newline characters and extra spaces
-        cleaned_string = likes_string.replace('\n', '').replace(' ', '')
-
-        # Parse likes string
-        if 'K' in cleaned_string:
-            value = float(cleaned_string.replace('K', '')) * 1_000
-        elif 'M' in cleaned_string:
-            value = float(cleaned_string.replace('M', '')) * 1_000_000
-        elif 'B' in cleaned_string:
-            value = float(cleaned_string.replace('B', '')) * 1_000_000_000
-        else:
-            value = int(''.join(filter(str.isdigit, cleaned_string)))
-
-        return int(value)
-    except ValueError as e:
-        print(f"[ERROR] Failed to parse likes string: {likes_string} - {e}")
-        return 0  # Return a fallback value instead of None
-
-    
+    return parse_count(likes_string)
+
+
 def parse_view_count(view_count_string):
-    try:
-        cleaned_string = ''.join(filter(str.isdigit, view_count_string))
-        return int(cleaned_string)
-    except ValueError as e:
-        print(f"[ERROR] Failed to parse view count string: {view_count_string} - {e}")
-        return 0  # Return 0 if view count parsing fails
+    return parse_count(view_count_string)
 
 def convert_to_int(number_string):
-    try:
-        # If it's already an integer, return it directly
-        if isinstance(number_string, int):
-            return number_string
-
-        # Remove commas and convert to integer
-        return int(number_string.replace(',', ''))
-    except ValueError as e:
-        print(f"[ERROR] Failed to convert string to int: {number_string} - {e}")
-        return 0  # Return 0 as fallback in case of conversion failure
\ No newline at end of file
+    return parse_count(number_string)
@@ -1,178 +1,169 @@
 """
 This file automates the scraping of YouTube video metadata, including title,
-description, tags, upload date, view count, and likes, using Selenium WebDriver.
+description, tags, upload date, view count, and likes, for a single search or
+watch page. Pages are parsed over plain HTTP first, with Selenium WebDriver as
+a fallback. A video that could not be scraped because a request, the driver
+pool, a page load or the caller's deadline ran out raises ScrapeTimeout
+instead of returning None, so callers can tell slowness from other failures.
 """
 
-from concurrent.futures import ThreadPoolExecutor
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from .driver import create_driver
-from queue import Queue
-from threading import Lock
-from .stats_parser import parse_likes, parse_view_count
-
+import time
+from itertools import islice
+import requests
+from selenium.common.exceptions import TimeoutException
+from archive.page_archive import archive_page, get_page_archive
+from metrics import timed
+from .driver import PAGE_LOAD_TIMEOUT
+from .driver_pool import get_driver_pool
+from .http_extractor import REQUEST_TIMEOUT, build_search_url, extract_video_id, fetch_video_details, iter_search_results
+from .page_scripts import SEARCH_RESULTS_SCRIPT, WATCH_PAGE_SCRIPT
+
+# Default number of new videos discovered per topic
 MAX_VIDEOS = 35
+WATCH_PAGE_TIMEOUT = 3
+SEARCH_PAGE_TIMEOUT = 10
+MAX_SEARCH_SCROLLS = 10
+USE_HTTP_FAST_PATH = True
 
 
-def scrape_video_details(video_url):
-    print(f"[INFO] Scraping video details for: {video_url}")
-
-    driver = create_driver()
-    if not driver:
-        print(f"[ERROR] Failed to create WebDriver for: {video_url}")
-        return None
-
-    try:
-        driver.get(video_url)
+class ScrapeTimeout(Exception):
+    pass
 
-        # Wait for the video page to load
-        WebDriverWait(driver, 3).until(
-            EC.presence_of_element_located((By.XPATH, '//h1[@class="style-scope ytd-watch-metadata"]/yt-formatted-string'))
-        )
 
-        # Scrape title
-        try:
-            title = driver.find_element(By.XPATH, '//h1[@class="style-scope ytd-watch-metadata"]/yt-formatted-string').text
-        except Exception:
-            title = "No title available"
+def remaining_time(deadline, limit):
+    # Caps a step's timeout at what is left of the caller's deadline (time.monotonic based)
+    if deadline is None:
+        return limit
+    return min(limit, deadline - time.monotonic())
 
-        # Scrape description
-        try:
-            description = driver.find_element(By.XPATH, '//yt-attributed-string[@id="attributed-snippet-text"]').text
-        except Exception:
-            try:
-                description = driver.find_element(By.XPATH, '//span[@id="plain-snippet-text"]').text
-            except Exception:
-                description = "No description available"
 
-        try:
-            WebDriverWait(driver, 3).until(EC.element_to_be_clickable((By.XPATH, "//tp-yt-paper-button[@id='expand']"))).click()
-        except Exception as e:
-            print(f"[ERROR] Could not click 'More' button: {e}")
-
-        # Scrape tags from meta keywords
-        try:
-            tags = driver.execute_script(
-                "return document.querySelector('meta[name=\"keywords\"]').getAttribute('content');"
-            )
-            tags = tags.split(",") if tags else []
-        except Exception:
-            tags = []
+def scrape_video_details(video_url, pool=None, deadline=None):
+    print(f"[INFO] Scraping video details for: {video_url}")
 
+    video_data = None
+    timed_out = False
+    if USE_HTTP_FAST_PATH:
+        timeout = remaining_time(deadline, REQUEST_TIMEOUT)
+        if timeout <= 0:
+            raise ScrapeTimeout(f"Deadline passed before fetching {video_url}")
         try:
-            # Assuming the upload date is the first bold formatted-string span
-            upload_date = driver.find_element(By.XPATH, '//span[@class="style-scope yt-formatted-string bold"][3]').text
-        except Exception:
-            upload_date = "Unknown"
+            video_data = fetch_video_details(video_url, timeout, raise_timeout=True)
+        except requests.Timeout:
+            timed_out = True
+        if not video_data:
+            print(f"[WARNING] HTTP extraction failed for {video_url}, falling back to WebDriver.")
+
+    if not video_data:
+        video_data = scrape_video_details_with_driver(video_url, pool, deadline)
+
+    if not video_data:
+        if timed_out:
+            raise ScrapeTimeout(f"HTTP request timed out and the WebDriver found nothing for {video_url}")
+        return None
+    video_data["video_id"] = extract_video_id(video_url)
+    return video_data
+
+def scrape_video_details_with_driver(video_url, pool=None, deadline=None):
+    pool = pool or get_driver_pool()
+    wait = remaining_time(deadline, PAGE_LOAD_TIMEOUT)
+    if wait <= 0:
+        raise ScrapeTimeout(f"Deadline passed before a WebDriver was requested for {video_url}")
+    try:
+        driver = pool.acquire(timeout=wait if deadline is not None else None)
+    except TimeoutError:
+        raise ScrapeTimeout(f"No WebDriver became free before the deadline for {video_url}")
+    if not driver:
+        print(f"[ERROR] Failed to create WebDriver for: {video_url}")
+        return None
 
+    try:
+        page_load_timeout = remaining_time(deadline, PAGE_LOAD_TIMEOUT)
+        if page_load_timeout <= 0:
+            raise ScrapeTimeout(f"Deadline passed before loading {video_url}")
+        if deadline is not None:
+            driver.set_page_load_timeout(page_load_timeout)
         try:
-            # Get the view count from the 'div#view-count' container
-            view_count = driver.find_element(By.XPATH, '//span[@class="style-scope yt-formatted-string bold"][1]').text
-        except Exception as e:
-            print(f"[ERROR] Failed to fetch view count: {e}")
-            view_count = "Unknown"
+            with timed("driver_get"):
+                driver.get(video_url)
+        finally:
+            if deadline is not None:
+                driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+
+        script_timeout = remaining_time(deadline, WATCH_PAGE_TIMEOUT)
+        if script_timeout <= 0:
+            raise ScrapeTimeout(f"Deadline passed before the watch page script ran for {video_url}")
+
+        # Every field comes back from one injected script instead of a round-trip per element
+        with timed("watch_script") as timer:
+            fields = driver.execute_async_script(WATCH_PAGE_SCRIPT, int(script_timeout * 1000))
+            if not fields:
+                timer.outcome = "timeout"
+        if not fields:
+            raise ScrapeTimeout(f"Video page did not load in time: {video_url}")
+        if get_page_archive() is not None:
+            # page_source is a full extra round-trip, so it is only fetched when archiving
+            archive_page(video_url, driver.page_source, "watch")
+
+        tags = fields.get("tags")
 
-        # Scrape likes
-        try:
-            likes = driver.find_element(By.XPATH, '//*[@id="top-level-buttons-computed"]/segmented-like-dislike-button-view-model/yt-smartimation/div/div/like-button-view-model/toggle-button-view-model/button-view-model/button/div[2]').text
-        except Exception:
-            likes = "No description available"
-        
         return {
-            "title": title,
-            "description": description,
-            "tags": tags,
-            "upload_date": upload_date,
-            "view_count": parse_view_count(view_count),
-            "likes": parse_likes(likes)
+            "title": fields.get("title") or "No title available",
+            "description": fields.get("description") or "No description available",
+            "tags": tags.split(",") if tags else [],
+            "upload_date": fields.get("upload_date") or "Unknown",
+            # Parsed into view_count and likes a batch at a time by stats_parser.normalize_stats
+            "raw_stats": {"view_count": fields.get("view_count"), "likes": fields.get("likes")}
         }
+    except ScrapeTimeout:
+        raise
+    except TimeoutException as e:
+        raise ScrapeTimeout(f"Video page load timed out for {video_url}: {e.msg}")
     except Exception as e:
         print(f"[ERROR] Failed to scrape video details: {e}")
         return None
     finally:
-        driver.quit()
-
-def worker(queue, results, lock):
-    while not queue.empty():
-        video_url = queue.get()
-        if video_url is None:  # Exit condition
-            break
-
-        video_data = scrape_video_details(video_url)
-        if video_data:
-            with lock:
-                results.append(video_data)
-
-        queue.task_done()
-
-def scrape_trending_videos(topic, thread_count=10):
-    print(f"[INFO] Starting YouTube video scraper for topic: {topic}")
-    driver = create_driver()
+        pool.release(driver)
 
+def iter_video_urls_with_driver(topic, pool, max_scrolls=MAX_SEARCH_SCROLLS):
+    driver = pool.acquire()
     if not driver:
-        print("[ERROR] WebDriver could not be created. Exiting.")
-        return []
+        print("[ERROR] WebDriver could not be created for the search page.")
+        return
 
     try:
         # Navigate to the YouTube search page for the topic
-        search_url = f"https://www.youtube.com/results?search_query={'+'.join(topic.split())}"
-        driver.get(search_url)
-
-        # Wait for video elements to load
-        WebDriverWait(driver, 10).until(
-            EC.presence_of_all_elements_located((By.XPATH, '//ytd-video-renderer'))
-        )
-
-        videos = driver.find_elements(By.XPATH, '//ytd-video-renderer')[:MAX_VIDEOS]
-        print(f"[INFO] Found {len(videos)} videos for topic '{topic}'.")
-
-        # Extract video URLs
-        video_urls = []
-        for video in videos:
-            try:
-                video_url = video.find_element(By.XPATH, './/a[@id="video-title"]').get_attribute("href")
-                if "/shorts/" not in video_url:
-                    video_urls.append(video_url)
-            except Exception as e:
-                print(f"[ERROR] Failed to extract video URL: {e}")
-
-        # Prepare threading components
-        video_queue = Queue()
-        results = []
-        lock = Lock()
-
-        # Add video URLs to the queue
-        for url in video_urls:
-            video_queue.put(url)
-
-        print(f"[INFO] Queue initialized with {len(video_urls)} videos.")
-
-        # Create and start threads
-        with ThreadPoolExecutor(max_workers=thread_count) as executor:
-            for _ in range(thread_count):
-                executor.submit(worker, video_queue, results, lock)
-
-        # Wait for all tasks to complete
-        video_queue.join()
-
-        print(f"[INFO] Scraping completed for topic: {topic}. Total videos scraped: {len(results)}")
-        return results
-
-    except Exception as e:
-        print(f"[ERROR] Failed to scrape videos for topic '{topic}': {e}")
-        return []
+        search_url = build_search_url(topic)
+        with timed("search_driver_get", topic):
+            driver.get(search_url)
+        if get_page_archive() is not None:
+            archive_page(search_url, driver.page_source, "search")
+
+        # Each pass returns only the links rendered since the previous one, scrolling for more when needed
+        for _ in range(max_scrolls):
+            with timed("search_script", topic):
+                links = driver.execute_async_script(SEARCH_RESULTS_SCRIPT, SEARCH_PAGE_TIMEOUT * 1000)
+            if not links:
+                break
+            for link in links:
+                if link and "/shorts/" not in link:
+                    yield link
     finally:
-        driver.quit()
-
-if __name__ == "__main__":
-    topics = ["Minimalist Art", "Independent Films", "Urban Street Art", "Theatre Acting Techniques", "Jazz Improvisation"]
-    all_results = []
-    for topic in topics:
-        try: 
-            topic_results = scrape_trending_videos(topic, 1)
-            all_results.extend(topic_results)
-        except Exception as e:
-            print(f"[ERROR] Failed to scrape videos for topic '{topic}': {e}")
-        finally:
-            print(all_results)
+        pool.release(driver)
+
+def iter_video_urls(topic, pool):
+    """Yield a topic's search results as they are found; the caller stops once it has enough."""
+    if USE_HTTP_FAST_PATH:
+        found = False
+        for video_url in iter_search_results(topic):
+            found = True
+            yield video_url
+        if found:
+            return
+        print(f"[WARNING] HTTP search parsing failed for '{topic}', falling back to WebDriver.")
+
+    yield from iter_video_urls_with_driver(topic, pool)
+
+def find_video_urls(topic, pool, limit=MAX_VIDEOS):
+    video_urls = list(dict.fromkeys(islice(iter_video_urls(topic, pool), limit)))
+    print(f"[INFO] Found {len(video_urls)} videos for topic '{topic}'.")
+    return video_urls
@@ -0,0 +1,7 @@
+from .lease import Lease, TOPIC, VIDEO
+from .sqlite_queue import SQLiteLeaseQueue
+from .mongo_queue import MongoLeaseQueue
+from .worker import QueueWorker, enqueue_topics, get_work_queue
+
+__all__ = ["Lease", "TOPIC", "VIDEO", "SQLiteLeaseQueue", "MongoLeaseQueue", "QueueWorker", "enqueue_topics",
+           "get_work_queue"]
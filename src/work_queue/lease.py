@@ -0,0 +1,38 @@
+"""
+This file defines the lease handed out by the work queues. A lease gives one
+worker exclusive use of a queue item until its visibility timeout expires.
+The worker renews it with heartbeats while it is working. If the worker dies,
+the item becomes leasable again, and the lease token stops late heartbeats or
+failures from a worker that lost its lease.
+"""
+
+import os
+import socket
+import uuid
+
+VISIBILITY_TIMEOUT = 120
+MAX_LEASE_ATTEMPTS = 3
+
+TOPIC = "topic"
+VIDEO = "video"
+
+
+class Lease:
+    def __init__(self, kind, key, payload, token, attempts, expires_at):
+        self.kind = kind
+        self.key = key
+        self.payload = payload
+        self.token = token
+        self.attempts = attempts
+        self.expires_at = expires_at
+
+    def __repr__(self):
+        return f"Lease({self.kind}:{self.key}, attempt {self.attempts})"
+
+
+def new_lease_token():
+    return uuid.uuid4().hex
+
+
+def default_owner():
+    return f"{socket.gethostname()}:{os.getpid()}"
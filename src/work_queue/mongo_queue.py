@@ -0,0 +1,127 @@
+"""
+This file implements the lease queue on a MongoDB collection, so workers on
+several hosts can share topics and video URLs. Every item is one document
+keyed by kind and key. Leases are taken with find_one_and_update, so each
+claim is atomic on the server.
+"""
+
+import time
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError
+from db import get_db
+from db.db import DUPLICATE_KEY_ERROR
+from .lease import MAX_LEASE_ATTEMPTS, VISIBILITY_TIMEOUT, Lease, new_lease_token
+
+QUEUE_COLLECTION = "work_queue"
+
+
+class MongoLeaseQueue:
+    def __init__(self, collection=None, max_attempts=MAX_LEASE_ATTEMPTS):
+        # Any pymongo-compatible collection works, including a mongomock one for local tests
+        if collection is None:
+            collection, _ = get_db(QUEUE_COLLECTION)
+        self.collection = collection
+        self.max_attempts = max_attempts
+        self.collection.create_index([("kind", ASCENDING), ("state", ASCENDING), ("created_at", ASCENDING)])
+
+    @staticmethod
+    def _id(kind, key):
+        return f"{kind}:{key}"
+
+    def enqueue(self, kind, items):
+        # Re-enqueueing an existing key is a no-op, so producers can safely repeat themselves
+        if not items:
+            return 0
+        now = time.time()
+        documents = [
+            {
+                "_id": self._id(kind, key), "kind": kind, "key": key, "payload": payload, "state": "pending",
+                "attempts": 0, "created_at": now, "updated_at": now
+            }
+            for key, payload in items.items()
+        ]
+        try:
+            return len(self.collection.insert_many(documents, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            # Keys already in the queue are rejected on _id and count as enqueued before
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                raise
+            return e.details.get("nInserted", 0)
+
+    def lease(self, kind, owner, limit=1, visibility_timeout=VISIBILITY_TIMEOUT):
+        now = time.time()
+        expires_at = now + visibility_timeout
+        # Expired leases that already used every attempt are given up on instead of handed out again
+        self.collection.update_many(
+            {"kind": kind, "state": "leased", "lease_expires": {"$lt": now}, "attempts": {"$gte": self.max_attempts}},
+            {"$set": {"state": "failed", "lease_token": None, "updated_at": now}}
+        )
+
+        leases = []
+        for _ in range(limit):
+            token = new_lease_token()
+            document = self.collection.find_one_and_update(
+                {
+                    "kind": kind,
+                    "attempts": {"$lt": self.max_attempts},
+                    "$or": [{"state": "pending"}, {"state": "leased", "lease_expires": {"$lt": now}}]
+                },
+                {
+                    "$set": {"state": "leased", "owner": owner, "lease_token": token,
+                             "lease_expires": expires_at, "updated_at": now},
+                    "$inc": {"attempts": 1}
+                },
+                sort=[("created_at", ASCENDING)],
+                return_document=ReturnDocument.AFTER
+            )
+            if document is None:
+                break
+            leases.append(Lease(kind, document["key"], document.get("payload"), token, document["attempts"], expires_at))
+        return leases
+
+    def heartbeat(self, lease, visibility_timeout=VISIBILITY_TIMEOUT):
+        # Fails once the lease has expired and been handed to another worker
+        expires_at = time.time() + visibility_timeout
+        result = self.collection.update_one(
+            {"_id": self._id(lease.kind, lease.key), "state": "leased", "lease_token": lease.token},
+            {"$set": {"lease_expires": expires_at, "updated_at": time.time()}}
+        )
+        if result.modified_count:
+            lease.expires_at = expires_at
+        return bool(result.modified_count)
+
+    def complete(self, lease):
+        # Idempotent: the item is done even if the lease expired and another worker is on it
+        result = self.collection.update_one(
+            {"_id": self._id(lease.kind, lease.key), "state": {"$ne": "done"}},
+            {"$set": {"state": "done", "lease_token": None, "last_error": None, "updated_at": time.time()}}
+        )
+        return bool(result.modified_count)
+
+    def fail(self, lease, error=None):
+        state = "failed" if lease.attempts >= self.max_attempts else "pending"
+        result = self.collection.update_one(
+            {"_id": self._id(lease.kind, lease.key), "state": "leased", "lease_token": lease.token},
+            {"$set": {"state": state, "lease_token": None, "last_error": error, "updated_at": time.time()}}
+        )
+        return bool(result.modified_count)
+
+    def outstanding(self, kind=None):
+        query = {"state": {"$in": ["pending", "leased"]}}
+        if kind is not None:
+            query["kind"] = kind
+        return self.collection.count_documents(query)
+
+    def counts(self):
+        counts = {}
+        pipeline = [{"$group": {"_id": {"kind": "$kind", "state": "$state"}, "count": {"$sum": 1}}}]
+        for row in self.collection.aggregate(pipeline):
+            counts.setdefault(row["_id"]["kind"], {})[row["_id"]["state"]] = row["count"]
+        return counts
+
+    def reset(self):
+        self.collection.delete_many({})
+
+    def close(self):
+        # The collection's client is shared and closed with db.close_client()
+        pass
@@ -0,0 +1,141 @@
+"""
+This file implements the lease queue on a local SQLite file (WAL mode) for
+running several worker processes on a single host. Each process opens its
+own connection. Leasing happens inside a BEGIN IMMEDIATE transaction, so two
+processes can never lease the same item.
+"""
+
+import json
+import sqlite3
+import time
+from threading import Lock
+from .lease import MAX_LEASE_ATTEMPTS, VISIBILITY_TIMEOUT, Lease, new_lease_token
+
+QUEUE_FILE = "work_queue.sqlite3"
+BUSY_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    kind TEXT NOT NULL,
+    key TEXT NOT NULL,
+    payload TEXT,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner TEXT,
+    lease_token TEXT,
+    lease_expires REAL,
+    last_error TEXT,
+    created_at REAL,
+    updated_at REAL,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS idx_items_kind_state ON items (kind, state, lease_expires);
+"""
+
+
+class SQLiteLeaseQueue:
+    def __init__(self, path=QUEUE_FILE, max_attempts=MAX_LEASE_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = Lock()
+        self._connection = sqlite3.connect(path, timeout=BUSY_TIMEOUT, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(SCHEMA)
+
+    def _execute(self, sql, params=()):
+        with self._lock:
+            cursor = self._connection.execute(sql, params)
+            return cursor.rowcount, cursor.fetchall()
+
+    def enqueue(self, kind, items):
+        # Re-enqueueing an existing key is a no-op, so producers can safely repeat themselves
+        now = time.time()
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            inserted = 0
+            for key, payload in items.items():
+                inserted += self._connection.execute(
+                    "INSERT OR IGNORE INTO items (kind, key, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                    (kind, key, json.dumps(payload), now, now)
+                ).rowcount
+        return inserted
+
+    def lease(self, kind, owner, limit=1, visibility_timeout=VISIBILITY_TIMEOUT):
+        now = time.time()
+        expires_at = now + visibility_timeout
+        leases = []
+        with self._lock, self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            # Expired leases that already used every attempt are given up on instead of handed out again
+            self._connection.execute(
+                "UPDATE items SET state = 'failed', lease_token = NULL, updated_at = ? "
+                "WHERE kind = ? AND state = 'leased' AND lease_expires < ? AND attempts >= ?",
+                (now, kind, now, self.max_attempts)
+            )
+            rows = self._connection.execute(
+                "SELECT key, payload, attempts FROM items WHERE kind = ? AND attempts < ? AND "
+                "(state = 'pending' OR (state = 'leased' AND lease_expires < ?)) "
+                "ORDER BY created_at LIMIT ?",
+                (kind, self.max_attempts, now, limit)
+            ).fetchall()
+            for key, payload, attempts in rows:
+                token = new_lease_token()
+                self._connection.execute(
+                    "UPDATE items SET state = 'leased', attempts = attempts + 1, owner = ?, lease_token = ?, "
+                    "lease_expires = ?, updated_at = ? WHERE kind = ? AND key = ?",
+                    (owner, token, expires_at, now, kind, key)
+                )
+                leases.append(Lease(kind, key, json.loads(payload), token, attempts + 1, expires_at))
+        return leases
+
+    def heartbeat(self, lease, visibility_timeout=VISIBILITY_TIMEOUT):
+        # Fails once the lease has expired and been handed to another worker
+        expires_at = time.time() + visibility_timeout
+        renewed, _ = self._execute(
+            "UPDATE items SET lease_expires = ?, updated_at = ? "
+            "WHERE kind = ? AND key = ? AND state = 'leased' AND lease_token = ?",
+            (expires_at, time.time(), lease.kind, lease.key, lease.token)
+        )
+        if renewed:
+            lease.expires_at = expires_at
+        return bool(renewed)
+
+    def complete(self, lease):
+        # Idempotent: the item is done even if the lease expired and another worker is on it
+        completed, _ = self._execute(
+            "UPDATE items SET state = 'done', lease_token = NULL, last_error = NULL, updated_at = ? "
+            "WHERE kind = ? AND key = ? AND state != 'done'",
+            (time.time(), lease.kind, lease.key)
+        )
+        return bool(completed)
+
+    def fail(self, lease, error=None):
+        failed, _ = self._execute(
+            "UPDATE items SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+            "lease_token = NULL, last_error = ?, updated_at = ? "
+            "WHERE kind = ? AND key = ? AND state = 'leased' AND lease_token = ?",
+            (self.max_attempts, error, time.time(), lease.kind, lease.key, lease.token)
+        )
+        return bool(failed)
+
+    def outstanding(self, kind=None):
+        _, rows = self._execute(
+            "SELECT COUNT(*) FROM items WHERE state IN ('pending', 'leased') AND (? IS NULL OR kind = ?)",
+            (kind, kind)
+        )
+        return rows[0][0]
+
+    def counts(self):
+        _, rows = self._execute("SELECT kind, state, COUNT(*) FROM items GROUP BY kind, state")
+        counts = {}
+        for kind, state, total in rows:
+            counts.setdefault(kind, {})[state] = total
+        return counts
+
+    def reset(self):
+        self._execute("DELETE FROM items")
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
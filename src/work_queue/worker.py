@@ -0,0 +1,269 @@
+"""
+This file runs a scraping worker against a shared lease queue. Several
+processes, possibly on different hosts, can run it at once. Each worker
+leases topics and runs discovery on them, then pushes the discovered video
+URLs back onto the queue. Any worker can lease those URLs and scrape them. A
+heartbeat thread renews every held lease. A video lease is completed only
+after the video has been written to MongoDB, so a crashed worker's items
+become leasable again once their visibility timeout expires.
+
+Usage (from src/):
+    python -m work_queue.worker --backend sqlite --path work_queue.sqlite3 --threads 4 --drain
+"""
+
+import argparse
+import os
+import sys
+import time
+from threading import Event, Lock, Thread
+from db import SNAPSHOT_COLLECTION, WriteBehindSink, close_client, get_db, get_known_video_index
+from metrics import count, set_topic, timed
+from video_scraper.driver_pool import get_driver_pool, shutdown_driver_pool
+from video_scraper.http_extractor import extract_video_id
+from video_scraper.scheduler import URL_DEADLINE
+from video_scraper.youtube_scraper import MAX_VIDEOS, ScrapeTimeout, iter_video_urls, scrape_video_details
+from .lease import TOPIC, VIDEO, VISIBILITY_TIMEOUT, default_owner
+from .mongo_queue import MongoLeaseQueue
+from .sqlite_queue import QUEUE_FILE, SQLiteLeaseQueue
+
+WORKER_THREADS = 7
+POLL_INTERVAL = 2
+# Longest wait between attempts while the queue itself keeps failing, e.g. a locked SQLite file
+MAX_QUEUE_ERROR_BACKOFF = 30
+RESULTS_COLLECTION = "trending_video_data"
+
+
+def get_work_queue(backend=None, path=None):
+    # WORK_QUEUE_BACKEND is "sqlite" for one host or "mongo" to share the queue between hosts
+    backend = backend or os.getenv("WORK_QUEUE_BACKEND", "sqlite")
+    if backend == "mongo":
+        return MongoLeaseQueue()
+    if backend == "sqlite":
+        return SQLiteLeaseQueue(path or os.getenv("WORK_QUEUE_PATH", QUEUE_FILE))
+    raise ValueError(f"Unknown work queue backend: {backend}")
+
+
+def enqueue_topics(queue, topics, source=None):
+    return queue.enqueue(TOPIC, {topic: {"topic": topic, "source": source} for topic in topics})
+
+
+class QueueWorker:
+    def __init__(self, queue, threads=WORKER_THREADS, owner=None, pool=None, collection=None, known_videos=None,
+                 visibility_timeout=VISIBILITY_TIMEOUT, poll_interval=POLL_INTERVAL, videos_per_topic=MAX_VIDEOS):
+        self.queue = queue
+        self.threads = threads or 1
+        self.owner = owner or default_owner()
+        self.pool = pool or get_driver_pool(self.threads)
+        self.collection = collection
+        # Local filter only; the queue's unique keys stop hosts from enqueueing a video twice
+        self.known_videos = known_videos
+        self.visibility_timeout = visibility_timeout
+        self.poll_interval = poll_interval
+        self.videos_per_topic = videos_per_topic
+        self.scraped_count = 0
+        self.failed_count = 0
+        self._held = {}
+        # Scraped videos waiting in the sink, by object identity, mapped to their lease
+        self._unstored = {}
+        self._held_lock = Lock()
+        self._stopped = Event()
+
+    def run(self, drain=False):
+        """Work until stop() is called, or with drain=True until the queue has nothing left."""
+        if self.collection is None:
+            self.collection, _ = get_db(RESULTS_COLLECTION)
+        self._stopped.clear()
+        heartbeat = Thread(target=self._heartbeat_loop, daemon=True)
+        heartbeat.start()
+
+        print(f"[INFO] Queue worker {self.owner} started with {self.threads} thread(s).")
+        snapshots = self.collection.database[SNAPSHOT_COLLECTION]
+        with WriteBehindSink(self.collection, on_flush=self._on_flush, on_error=self._on_error,
+                             snapshots=snapshots) as self._sink:
+            workers = [Thread(target=self._work_loop, args=(drain,), daemon=True) for _ in range(self.threads)]
+            for thread in workers:
+                thread.start()
+            for thread in workers:
+                thread.join()
+
+        self._stopped.set()
+        heartbeat.join()
+        print(f"[INFO] Queue worker {self.owner} stopped. Scraped {self.scraped_count}, failed {self.failed_count}.")
+        return {"scraped_count": self.scraped_count, "failed_count": self.failed_count}
+
+    def stop(self):
+        self._stopped.set()
+
+    def _work_loop(self, drain):
+        queue_errors = 0
+        while not self._stopped.is_set():
+            try:
+                lease = self._lease_next()
+                # Leases held by this or other workers still count, since they can expire back to pending
+                if lease is None and drain and self.queue.outstanding() == 0:
+                    return
+            except Exception as e:
+                # The thread backs off and stays in the pool instead of dying with the error
+                queue_errors += 1
+                backoff = min(MAX_QUEUE_ERROR_BACKOFF, self.poll_interval * 2 ** (queue_errors - 1))
+                print(f"[ERROR] Failed to lease work from the queue, retrying in {backoff:.1f}s: {e}")
+                count("queue_lease_errors_total")
+                self._stopped.wait(backoff)
+                continue
+            queue_errors = 0
+            if lease is None:
+                self._stopped.wait(self.poll_interval)
+                continue
+
+            try:
+                if lease.kind == TOPIC:
+                    self._discover(lease)
+                else:
+                    self._scrape(lease)
+            except Exception as e:
+                print(f"[ERROR] Failed to process {lease}: {e}")
+                if lease.kind == VIDEO:
+                    self._forget_known([lease.key])
+                self._release(lease, error=str(e))
+
+    def _lease_next(self):
+        # Videos first, so discovered work is drained before more topics are expanded
+        for kind in (VIDEO, TOPIC):
+            leases = self.queue.lease(kind, self.owner, 1, self.visibility_timeout)
+            if leases:
+                count("queue_leases_total", kind=kind)
+                with self._held_lock:
+                    self._held[(kind, leases[0].key)] = leases[0]
+                return leases[0]
+        return None
+
+    def _release(self, lease, error=None):
+        with self._held_lock:
+            self._held.pop((lease.kind, lease.key), None)
+        if error is None:
+            self.queue.complete(lease)
+        else:
+            self.queue.fail(lease, error)
+
+    def _discover(self, lease):
+        topic = lease.payload["topic"]
+        set_topic(topic)
+        found = queued = 0
+        video_urls = iter_video_urls(topic, self.pool)
+        try:
+            with timed("discover", topic):
+                for url in video_urls:
+                    if queued >= self.videos_per_topic:
+                        break
+                    found += 1
+                    video_id = extract_video_id(url)
+                    if self.known_videos is not None and video_id and not self.known_videos.claim(video_id):
+                        count("videos_skipped_known_total", topic=topic)
+                        continue
+                    # Enqueued one at a time so other workers can start scraping during discovery
+                    queued += self.queue.enqueue(VIDEO, {video_id or url: {"topic": topic, "url": url}})
+        except Exception as e:
+            # The retry searches again; videos queued so far are kept, and enqueueing them again is a no-op
+            print(f"[ERROR] Discovery failed for topic '{topic}' after queueing {queued} videos: {e}")
+            self._release(lease, error=f"Discovery failed: {e}")
+            return
+        finally:
+            video_urls.close()
+
+        if not found:
+            # Both search paths swallow their errors, so a search that found nothing at all is treated as failed
+            print(f"[WARNING] Search found no videos for topic '{topic}'.")
+            self._release(lease, error="Search found no videos")
+            return
+
+        print(f"[INFO] Queued {queued} videos for topic '{topic}'.")
+        self._release(lease)
+
+    def _scrape(self, lease):
+        topic, url = lease.payload["topic"], lease.payload["url"]
+        set_topic(topic)
+        deadline = time.monotonic() + min(URL_DEADLINE, self.visibility_timeout)
+        error = "No video details extracted"
+        with timed("scrape_video", topic) as timer:
+            try:
+                video_data = scrape_video_details(url, self.pool, deadline=deadline)
+            except ScrapeTimeout as e:
+                video_data, error = None, str(e)
+            if not video_data:
+                timer.outcome = "empty"
+        if not video_data:
+            with self._held_lock:
+                self.failed_count += 1
+            self._forget_known([lease.key])
+            self._release(lease, error=error)
+            return
+
+        # The lease stays held, and heartbeated, until the sink has written the video
+        with self._held_lock:
+            self.scraped_count += 1
+            self._unstored[id(video_data)] = lease
+        self._sink.put(video_data)
+
+    def _take_batch_leases(self, batch):
+        leases = []
+        with self._held_lock:
+            for video in batch:
+                lease = self._unstored.pop(id(video), None)
+                if lease is not None:
+                    self._held.pop((lease.kind, lease.key), None)
+                    leases.append(lease)
+        return leases
+
+    def _forget_known(self, video_ids):
+        # A claim is released when its video is not stored, so this process can scrape it when it is leased again
+        if self.known_videos is not None:
+            for video_id in video_ids:
+                self.known_videos.release(video_id)
+
+    def _on_flush(self, batch):
+        if self.known_videos is not None:
+            self.known_videos.mark_stored([video["video_id"] for video in batch if video.get("video_id")])
+        for lease in self._take_batch_leases(batch):
+            self.queue.complete(lease)
+
+    def _on_error(self, batch):
+        self._forget_known([video["video_id"] for video in batch if video.get("video_id")])
+        for lease in self._take_batch_leases(batch):
+            self.queue.fail(lease, "Failed to store video")
+
+    def _heartbeat_loop(self):
+        while not self._stopped.wait(self.visibility_timeout / 3):
+            with self._held_lock:
+                held = list(self._held.values())
+            for lease in held:
+                if not self.queue.heartbeat(lease, self.visibility_timeout):
+                    # Expired and handed to another worker; completing it later is still harmless
+                    print(f"[WARNING] Lost lease on {lease}.")
+                    with self._held_lock:
+                        self._held.pop((lease.kind, lease.key), None)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a scraping worker against a shared work queue.")
+    parser.add_argument("--backend", choices=["sqlite", "mongo"], help="Queue backend (default: WORK_QUEUE_BACKEND or sqlite)")
+    parser.add_argument("--path", help="SQLite queue file (default: WORK_QUEUE_PATH or work_queue.sqlite3)")
+    parser.add_argument("--threads", type=int, default=WORKER_THREADS, help="Worker threads in this process")
+    parser.add_argument("--drain", action="store_true", help="Exit once the queue has no pending or leased items")
+    args = parser.parse_args(argv)
+
+    queue = get_work_queue(args.backend, args.path)
+    known_videos = get_known_video_index(get_db(RESULTS_COLLECTION)[0])
+    worker = QueueWorker(queue, threads=args.threads, known_videos=known_videos)
+    try:
+        worker.run(drain=args.drain)
+    except KeyboardInterrupt:
+        worker.stop()
+    finally:
+        shutdown_driver_pool()
+        close_client()
+        queue.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,23 @@
+import inspect
+import os
+import sys
+
+import pytest
+
+# The packages live in src/ and import each other as top-level modules
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+
+@pytest.fixture
+def mongo_database(monkeypatch):
+    """An in-memory mongomock database standing in for MongoDB."""
+    mongomock = pytest.importorskip("mongomock")
+    from mongomock.collection import BulkOperationBuilder
+
+    # pymongo 4.11+ passes sort= when queueing an UpdateOne, which older mongomock releases reject
+    add_update = BulkOperationBuilder.add_update
+    if "sort" not in inspect.signature(add_update).parameters:
+        def add_update_without_sort(self, *args, sort=None, **kwargs):
+            return add_update(self, *args, **kwargs)
+        monkeypatch.setattr(BulkOperationBuilder, "add_update", add_update_without_sort)
+    return mongomock.MongoClient()["youtube_statistics"]
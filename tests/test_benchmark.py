@@ -0,0 +1,37 @@
+"""
+The offline benchmark runs the HTTP fast path end to end against the
+fixture server and the recorded pages in fixtures/. Every synthetic topic
+has to discover and scrape videos, and a run compared against its own
+results must not be reported as a regression.
+"""
+
+import json
+
+import pytest
+
+from benchmark import run_benchmark
+from video_scraper import http_extractor, youtube_scraper
+
+
+@pytest.fixture(autouse=True)
+def restore_scraper_settings(monkeypatch):
+    # main() points the scraper at the fixture server; put it back for the other tests
+    monkeypatch.setattr(http_extractor, "YOUTUBE_BASE_URL", http_extractor.YOUTUBE_BASE_URL)
+    monkeypatch.setattr(youtube_scraper, "USE_HTTP_FAST_PATH", youtube_scraper.USE_HTTP_FAST_PATH)
+
+
+def test_benchmark_on_recorded_pages(tmp_path):
+    output = str(tmp_path / "results.json")
+    assert run_benchmark.main(["--threads", "1", "2", "--topics", "2", "--output", output]) == 0
+    with open(output) as file:
+        report = json.load(file)
+
+    assert report["mode"] == "http"
+    assert [run["threads"] for run in report["runs"]] == [1, 2]
+    for run in report["runs"]:
+        assert run["videos_scraped"] > 0
+        assert run["pages"] == run["videos_scraped"] + run["topics"]
+        assert run["drivers_started"] == 0
+
+    assert run_benchmark.main(["--threads", "1", "--topics", "2", "--output", str(tmp_path / "again.json"),
+                               "--compare", output, "--tolerance", "1"]) == 0
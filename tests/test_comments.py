@@ -0,0 +1,128 @@
+"""
+Comment pages are innertube continuation responses. The recorded ones under
+fixtures/comments/ cover both layouts: the first page keeps its comments in
+frameworkUpdates entity mutations, and the second uses the older
+commentRenderer threads. The harvester is run against them with mongomock,
+including a resume from a saved token that has expired.
+"""
+
+import json
+import os
+
+import pytest
+
+from video_scraper import comments as comments_module
+from video_scraper.comments import CommentHarvester, find_next_comment_token, parse_comment_page
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+VIDEO_ID = "rUxyKA_-grg"
+FIRST_TOKEN = "Eg0SC3JVeHlLQV8tZ3JnGAYyJSIRIgtyVXh5S0FfLWdyZzAAeAJCEGNvbW1lbnRzLXNlY3Rpb24"
+SECOND_TOKEN = "Eg0SC3JVeHlLQV8tZ3JnGAYy0wEKrQFnZXRfcmFua2VkX3N0cmVhbXMtLUNxWUJDSUFFRlJl"
+
+
+def read_fixture(*path):
+    with open(os.path.join(FIXTURES, *path), "r", encoding="utf-8") as file:
+        return file.read()
+
+
+@pytest.fixture
+def pages():
+    return {token: json.loads(read_fixture("comments", f"{token}.json")) for token in (FIRST_TOKEN, SECOND_TOKEN)}
+
+
+@pytest.fixture
+def youtube(pages, monkeypatch):
+    """Serves the recorded watch pages and comment continuations, and logs every request."""
+    requests = []
+
+    def fetch_html(url, *args, **kwargs):
+        requests.append(url)
+        video_id = url.rsplit("v=", 1)[-1]
+        path = os.path.join(FIXTURES, "watch", f"{video_id}.html")
+        return read_fixture("watch", f"{video_id}.html") if os.path.exists(path) else None
+
+    def fetch_comment_page(config, token):
+        requests.append(token)
+        # An expired token gets an empty response rather than an error
+        return pages.get(token, {"responseContext": {"visitorData": "CgtYd1RQ"}})
+
+    monkeypatch.setattr(comments_module, "fetch_html", fetch_html)
+    monkeypatch.setattr(comments_module, "fetch_comment_page", fetch_comment_page)
+    monkeypatch.setattr(comments_module, "_innertube_config", None)
+    return requests
+
+
+@pytest.fixture
+def harvester(mongo_database):
+    return CommentHarvester(mongo_database["comments"], mongo_database["comment_progress"], threads=2, batch_size=2)
+
+
+def test_parse_entity_page(pages):
+    comments, token = parse_comment_page(pages[FIRST_TOKEN], VIDEO_ID)
+    # The reply is left out, and so are the tokens that load replies or re-sort the list
+    assert token == SECOND_TOKEN
+    assert comments == [
+        {"comment_id": "UgzRkF2ZsMxK5v3Jt5p4AaABAg", "text": "this got me through finals week", "author": "@nightowl",
+         "author_channel_id": "UCa1b2c3d4e5f6g7h8i9j0k", "published_time": "4 years ago",
+         "raw_stats": {"like_count": "12K", "reply_count": "87"}, "video_id": VIDEO_ID},
+        {"comment_id": "UgyW0bqE3tTzS8mXm7R4AaABAg", "text": "the rain sounds at 23:10 🌧", "author": "@quietdesk",
+         "author_channel_id": "UCz9y8x7w6v5u4t3s2r1q0p", "published_time": "2 years ago",
+         "raw_stats": {"like_count": " ", "reply_count": ""}, "video_id": VIDEO_ID},
+    ]
+
+
+def test_parse_renderer_page(pages):
+    comments, token = parse_comment_page(pages[SECOND_TOKEN], VIDEO_ID)
+    assert token is None
+    assert comments[0] == {
+        "comment_id": "UgxH7p9dQ2LrNw1c1Yx4AaABAg", "text": "studying for the bar exam with this on loop",
+        "author": "@barprep", "author_channel_id": "UCm1n2b3v4c5x6z7l8k9j0h", "published_time": "1 year ago",
+        "raw_stats": {"like_count": "1.5K", "reply_count": 4}, "video_id": VIDEO_ID
+    }
+    assert [comment["comment_id"] for comment in comments] == ["UgxH7p9dQ2LrNw1c1Yx4AaABAg", "UgyW0bqE3tTzS8mXm7R4AaABAg"]
+
+
+def test_find_next_comment_token_ignores_replies_and_sorting(pages):
+    header, body = pages[FIRST_TOKEN]["onResponseReceivedEndpoints"]
+    assert find_next_comment_token(header) is None
+    threads = {"continuationItems": body["reloadContinuationItemsCommand"]["continuationItems"][:-1]}
+    assert find_next_comment_token(threads) is None
+    assert find_next_comment_token(body) == SECOND_TOKEN
+
+
+def test_harvest_video(harvester, youtube, mongo_database):
+    assert harvester.harvest([VIDEO_ID]) == {"video_count": 1, "stored_count": 3, "duplicate_count": 1}
+    assert youtube == [f"https://www.youtube.com/watch?v={VIDEO_ID}", FIRST_TOKEN, SECOND_TOKEN]
+
+    stored = {comment["comment_id"]: comment for comment in mongo_database["comments"].find()}
+    assert stored["UgzRkF2ZsMxK5v3Jt5p4AaABAg"]["like_count"] == 12000
+    assert stored["UgxH7p9dQ2LrNw1c1Yx4AaABAg"]["reply_count"] == 4
+    assert "raw_stats" not in stored["UgxH7p9dQ2LrNw1c1Yx4AaABAg"]
+    progress = mongo_database["comment_progress"].find_one({"_id": VIDEO_ID})
+    assert progress["done"] is True and progress["token"] is None
+    assert progress["pages"] == 2 and progress["comments"] == 3
+
+    # A finished video is not fetched again
+    assert harvester.harvest_video(VIDEO_ID) == 0
+    assert len(youtube) == 3
+
+
+def test_resume_from_saved_token(harvester, youtube, mongo_database):
+    mongo_database["comment_progress"].insert_one({"_id": VIDEO_ID, "token": SECOND_TOKEN, "done": False})
+    assert harvester.harvest_video(VIDEO_ID) == 2
+    # The watch page is still fetched once for the innertube config, but the first page is skipped
+    assert youtube == [f"https://www.youtube.com/watch?v={VIDEO_ID}", SECOND_TOKEN]
+
+
+def test_stale_token_restarts_from_watch_page(harvester, youtube, mongo_database):
+    mongo_database["comment_progress"].insert_one({"_id": VIDEO_ID, "token": "Eg0SC2V4cGlyZWQ", "done": False})
+    assert harvester.harvest_video(VIDEO_ID) == 3
+    watch_url = f"https://www.youtube.com/watch?v={VIDEO_ID}"
+    assert youtube == [watch_url, "Eg0SC2V4cGlyZWQ", watch_url, FIRST_TOKEN, SECOND_TOKEN]
+    assert mongo_database["comment_progress"].find_one({"_id": VIDEO_ID})["done"] is True
+
+
+def test_video_without_comments_is_done(harvester, youtube, mongo_database):
+    assert harvester.harvest_video("4xDzrJKXOOY") == 0
+    assert youtube == ["https://www.youtube.com/watch?v=4xDzrJKXOOY"]
+    assert mongo_database["comment_progress"].find_one({"_id": "4xDzrJKXOOY"})["done"] is True
@@ -0,0 +1,69 @@
+"""
+store_items_to_collection writes unordered batches and leaves duplicate
+detection to a unique _hash index, falling back to a lookup per batch when
+legacy duplicates keep the index from being built. Videos are upserted by
+video_id, so a re-scrape never stores a second copy. mongomock stands in for
+MongoDB.
+"""
+
+import pytest
+
+from db import db as db_module
+from db.db import generate_hash, store_items_to_collection
+
+
+@pytest.fixture(autouse=True)
+def fresh_index_state(monkeypatch):
+    # Index checks are cached per collection name, and every test gets a new mongomock database
+    monkeypatch.setattr(db_module, "_hash_index_state", {})
+    monkeypatch.setattr(db_module, "_video_id_indexed", set())
+
+
+def video(video_id, title="Lofi study mix", description="Beats to study to", **fields):
+    return {"video_id": video_id, "title": title, "description": description, "tags": ["lofi"], **fields}
+
+
+def test_duplicates_in_batch_and_across_batches(mongo_database):
+    collection = mongo_database["trending_video_data"]
+    items = [video("aaaaaaaaaaa"), video("bbbbbbbbbbb", title="Jazz"), video("aaaaaaaaaaa"),
+             {"title": "No id", "description": ""}, {"title": "No id", "description": ""}]
+    result = store_items_to_collection(collection, items)
+    assert result["inserted_count"] == 3
+    assert collection.count_documents({}) == 3
+
+    again = store_items_to_collection(collection, [video("aaaaaaaaaaa"), {"title": "No id", "description": ""}])
+    assert again == {"inserted_count": 0, "ids": []}
+    assert collection.count_documents({}) == 3
+    assert "_hash_1" in collection.index_information()
+
+
+def test_batches_larger_than_insert_batch_size(mongo_database, monkeypatch):
+    monkeypatch.setattr(db_module, "INSERT_BATCH_SIZE", 2)
+    collection = mongo_database["trending_video_data"]
+    items = [video(f"video{index:06d}", title=f"Video {index}") for index in range(5)] + [video("video000001", title="Video 1")]
+    assert store_items_to_collection(collection, items)["inserted_count"] == 5
+    assert collection.count_documents({}) == 5
+
+
+def test_rescrape_keeps_stored_document(mongo_database):
+    collection = mongo_database["trending_video_data"]
+    store_items_to_collection(collection, [video("aaaaaaaaaaa", view_count=10)])
+    # A new title changes the hash, but the video_id still matches the stored video
+    result = store_items_to_collection(collection, [video("aaaaaaaaaaa", title="Lofi study mix (2024)", view_count=20)])
+    assert result["inserted_count"] == 0
+    stored, = collection.find({"video_id": "aaaaaaaaaaa"})
+    assert stored["title"] == "Lofi study mix"
+    assert stored["view_count"] == 10
+
+
+def test_legacy_duplicates_fall_back_to_lookup(mongo_database):
+    collection = mongo_database["legacy_video_data"]
+    legacy = {"title": "Legacy", "description": "stored twice", "_hash": generate_hash({"title": "Legacy", "description": "stored twice"})}
+    collection.insert_many([dict(legacy), dict(legacy)])
+
+    result = store_items_to_collection(collection, [{"title": "Legacy", "description": "stored twice"},
+                                                    {"title": "New", "description": ""}])
+    assert result["inserted_count"] == 1
+    assert db_module._hash_index_state[collection.full_name] is False
+    assert collection.count_documents({}) == 3
+
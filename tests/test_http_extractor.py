@@ -0,0 +1,92 @@
+"""
+The browserless fast path reads watch and search pages from the JSON that
+YouTube embeds in them. The recorded pages under fixtures/ are trimmed
+copies of real responses, kept to the parts the extractor reads, so the
+parsers are checked against the actual page layout without the network.
+"""
+
+import os
+
+import pytest
+
+from video_scraper import http_extractor
+from video_scraper.http_extractor import (
+    extract_embedded_json, fetch_video_details, find_continuation_token, parse_innertube_config, parse_search_results,
+    parse_watch_page
+)
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def read_fixture(*path):
+    with open(os.path.join(FIXTURES, *path), "r", encoding="utf-8") as file:
+        return file.read()
+
+
+@pytest.fixture
+def watch_html():
+    return read_fixture("watch", "rUxyKA_-grg.html")
+
+
+@pytest.fixture
+def search_html():
+    return read_fixture("search", "lofi_hip_hop.html")
+
+
+def test_parse_watch_page(watch_html):
+    assert parse_watch_page(watch_html) == {
+        "title": "1 A.M Study Session 📚 [lofi hip hop/chill beats]",
+        "description": "Listen on Spotify, Apple music and more\n→ https://fanlink.tv/1amStudy\n\n🎼 Tracklist:\n00:00 Dreamy - Kupla",
+        "tags": ["lofi", "lofi hip hop", "study music", "chill beats"],
+        "upload_date": "2020-02-11",
+        "raw_stats": {"view_count": "48213977", "likes": "1.2M"}
+    }
+
+
+def test_parse_watch_page_defaults():
+    # No description or keywords, and ytInitialData assigned through window[...]
+    video = parse_watch_page(read_fixture("watch", "4xDzrJKXOOY.html"))
+    assert video["description"] == "No description available"
+    assert video["tags"] == []
+    assert video["raw_stats"] == {"view_count": "2104356", "likes": "41K"}
+
+
+def test_parse_watch_page_without_player_response(search_html):
+    assert parse_watch_page(search_html) is None
+    assert parse_watch_page("<html><body>consent.youtube.com</body></html>") is None
+
+
+def test_extract_embedded_json_skips_invalid_assignments(watch_html):
+    html = "<script>var ytInitialPlayerResponse = {broken;</script>" + watch_html
+    assert extract_embedded_json(html, "ytInitialPlayerResponse")["videoDetails"]["videoId"] == "rUxyKA_-grg"
+
+
+def test_parse_search_results(search_html):
+    # Shorts are skipped and a video listed twice is returned once, in page order
+    assert parse_search_results(search_html) == [
+        f"https://www.youtube.com/watch?v={video_id}" for video_id in ("jfKfPfyJRdk", "4xDzrJKXOOY", "rUxyKA_-grg", "lTRiuFIWV54")
+    ]
+
+
+def test_search_continuation(search_html):
+    assert find_continuation_token(extract_embedded_json(search_html, "ytInitialData")) == \
+        "EpUDEgxsb2ZpIGhpcCBob3AajANFZ1NJQWhBQlNCU0NBUXR"
+    assert parse_innertube_config(search_html) == {
+        "api_key": "AIzaSyFixtureKeyForOfflineTests000000", "client_version": "2.20241120.01.00"
+    }
+
+
+def test_fetch_video_details(watch_html, monkeypatch):
+    requested = []
+
+    def fetch_html(url, *args, **kwargs):
+        requested.append(url)
+        return watch_html
+
+    monkeypatch.setattr(http_extractor, "fetch_html", fetch_html)
+    video = fetch_video_details("https://www.youtube.com/watch?v=rUxyKA_-grg")
+    assert requested == ["https://www.youtube.com/watch?v=rUxyKA_-grg"]
+    assert video["title"].startswith("1 A.M Study Session")
+
+    monkeypatch.setattr(http_extractor, "fetch_html", lambda url, *args, **kwargs: None)
+    assert fetch_video_details("https://www.youtube.com/watch?v=rUxyKA_-grg") is None
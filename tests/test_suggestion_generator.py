@@ -0,0 +1,50 @@
+"""
+Batched generation with the cached few-shot prefix has to decode every tag
+exactly as model.generate does on the full prompt. A tiny randomly
+initialised GPT-2 and a tokenizer trained on the prompts stand in for the
+fine-tuned model, so the test runs offline.
+"""
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+from suggestions.generator import FEW_SHOT_PREFIX, SuggestionGenerator, build_prompt
+
+TAGS = ["python", "super resolution", "cats", "a much longer tag about cooking pasta at home"]
+MAX_NEW_TOKENS = 48
+
+
+@pytest.fixture(scope="module")
+def model_and_tokenizer():
+    torch.manual_seed(0)
+    bpe = tokenizers.ByteLevelBPETokenizer()
+    bpe.train_from_iterator([FEW_SHOT_PREFIX * 3] + [build_prompt(tag) for tag in TAGS], vocab_size=300,
+                            special_tokens=["<|endoftext|>"])
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=bpe._tokenizer, eos_token="<|endoftext|>")
+    config = GPT2Config(vocab_size=len(tokenizer), n_positions=1024, n_embd=32, n_layer=2, n_head=2,
+                        bos_token_id=tokenizer.eos_token_id, eos_token_id=tokenizer.eos_token_id)
+    model = GPT2LMHeadModel(config)
+    return model.eval(), tokenizer
+
+
+def reference_text(model, tokenizer, tag, no_repeat_ngram_size):
+    input_ids = tokenizer(FEW_SHOT_PREFIX + build_prompt(tag), return_tensors="pt")["input_ids"]
+    output = model.generate(
+        input_ids, attention_mask=torch.ones_like(input_ids), max_new_tokens=MAX_NEW_TOKENS, do_sample=False,
+        no_repeat_ngram_size=no_repeat_ngram_size, eos_token_id=tokenizer.eos_token_id,
+        pad_token_id=tokenizer.eos_token_id
+    )
+    return tokenizer.decode(output[0, input_ids.shape[1]:].tolist(), skip_special_tokens=True)
+
+
+@pytest.mark.parametrize("no_repeat_ngram_size", [0, 2])
+def test_batched_generation_matches_full_prompt(model_and_tokenizer, no_repeat_ngram_size):
+    model, tokenizer = model_and_tokenizer
+    generator = SuggestionGenerator(model, tokenizer, max_new_tokens=MAX_NEW_TOKENS, do_sample=False,
+                                    no_repeat_ngram_size=no_repeat_ngram_size)
+    batched = generator.generate(TAGS)
+    assert batched == [reference_text(model, tokenizer, tag, no_repeat_ngram_size) for tag in TAGS]
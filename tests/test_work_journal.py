@@ -0,0 +1,66 @@
+"""
+A video whose write-behind batch could not be stored must not strand its
+topic. The journal marks it failed, so a resumed run scrapes it again, and
+the topic finishes once the retry is stored or every attempt is used up.
+"""
+
+import pytest
+
+from db import sink as sink_module
+from db.known_videos import KnownVideoIndex
+from db.sink import WriteBehindSink
+from journal import WorkJournal
+
+# main imports the whole scraper, including its optional dependencies
+make_sink_callbacks = pytest.importorskip("main").make_sink_callbacks
+
+TOPIC = "cats"
+VIDEO_ID = "abcdefghijk"
+URL = f"https://www.youtube.com/watch?v={VIDEO_ID}"
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = WorkJournal(str(tmp_path / "journal.sqlite3"), max_attempts=2)
+    journal.add_topics([TOPIC])
+    journal.record_discovered(TOPIC, {VIDEO_ID: URL})
+    yield journal
+    journal.close()
+
+
+def scrape_and_store(journal, known_videos, monkeypatch, stored):
+    def store(collection, items):
+        if not stored:
+            raise ConnectionError("MongoDB is unreachable")
+        return {"inserted_count": len(items)}
+
+    monkeypatch.setattr(sink_module, "store_items_to_collection", store)
+    monkeypatch.setattr(sink_module, "FLUSH_RETRIES", 1)
+    assert known_videos.claim(VIDEO_ID)
+    journal.mark_in_flight(VIDEO_ID)
+    on_flush, on_error = make_sink_callbacks(known_videos, journal)
+    with WriteBehindSink(None, on_flush=on_flush, on_error=on_error) as sink:
+        sink.put({"video_id": VIDEO_ID, "url": URL, "view_count": "1,234", "likes": "56"})
+    return sink
+
+
+def test_failed_flush_leaves_topic_resumable(journal, monkeypatch):
+    known_videos = KnownVideoIndex()
+    sink = scrape_and_store(journal, known_videos, monkeypatch, stored=False)
+    assert sink.failed_count == 1
+    assert not known_videos.is_stored(VIDEO_ID)
+    assert journal.finish_topics([TOPIC]) == []
+    assert journal.pending_urls(TOPIC) == {VIDEO_ID: URL}
+
+    scrape_and_store(journal, known_videos, monkeypatch, stored=True)
+    assert known_videos.is_stored(VIDEO_ID)
+    assert journal.finish_topics([TOPIC]) == [TOPIC]
+
+
+def test_topic_finishes_after_every_attempt_fails(journal, monkeypatch):
+    known_videos = KnownVideoIndex()
+    for _ in range(journal.max_attempts):
+        scrape_and_store(journal, known_videos, monkeypatch, stored=False)
+    assert journal.pending_urls(TOPIC) == {}
+    assert journal.finish_topics([TOPIC]) == [TOPIC]
+    assert journal.counts() == {"topics": {"done": 1}, "urls": {"failed": 1}}
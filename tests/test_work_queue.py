@@ -0,0 +1,88 @@
+"""
+Two worker processes leasing from the same SQLite queue file must never be
+handed the same item, and between them they have to finish the queue. A
+topic whose discovery fails has to go back to pending, not be completed.
+"""
+
+import multiprocessing
+
+import pytest
+
+from work_queue.lease import TOPIC, VIDEO
+from work_queue.sqlite_queue import SQLiteLeaseQueue
+from work_queue import worker as worker_module
+
+ITEMS = 200
+PROCESSES = 2
+
+
+def lease_until_empty(path, owner, results):
+    queue = SQLiteLeaseQueue(path)
+    leased = []
+    while True:
+        leases = queue.lease(VIDEO, owner, limit=3, visibility_timeout=60)
+        if not leases:
+            if queue.outstanding(VIDEO) == 0:
+                break
+            continue
+        for lease in leases:
+            leased.append(lease.key)
+            assert queue.complete(lease)
+    queue.close()
+    results.put((owner, leased))
+
+
+def test_processes_never_lease_the_same_item(tmp_path):
+    path = str(tmp_path / "queue.sqlite3")
+    queue = SQLiteLeaseQueue(path)
+    queue.enqueue(VIDEO, {f"video-{i}": {"url": f"https://example.com/{i}"} for i in range(ITEMS)})
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    processes = [context.Process(target=lease_until_empty, args=(path, f"worker-{i}", results))
+                 for i in range(PROCESSES)]
+    for process in processes:
+        process.start()
+    leased = dict(results.get(timeout=60) for _ in processes)
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    keys = [key for keys in leased.values() for key in keys]
+    assert len(keys) == len(set(keys)) == ITEMS
+    assert queue.counts() == {VIDEO: {"done": ITEMS}}
+    queue.close()
+
+
+@pytest.fixture
+def topic_worker(tmp_path):
+    queue = SQLiteLeaseQueue(str(tmp_path / "queue.sqlite3"))
+    queue.enqueue(TOPIC, {"cats": {"topic": "cats"}})
+    yield worker_module.QueueWorker(queue, threads=1, owner="test", pool=object(), videos_per_topic=2)
+    queue.close()
+
+
+def discover(topic_worker):
+    lease, = topic_worker.queue.lease(TOPIC, topic_worker.owner)
+    topic_worker._discover(lease)
+    return topic_worker.queue.counts()
+
+
+def test_discovery_completes_topic(topic_worker, monkeypatch):
+    urls = [f"https://www.youtube.com/watch?v=video{i:06d}" for i in range(3)]
+    monkeypatch.setattr(worker_module, "iter_video_urls", lambda topic, pool: (url for url in urls))
+    assert discover(topic_worker) == {TOPIC: {"done": 1}, VIDEO: {"pending": 2}}
+
+
+def test_failed_search_leaves_topic_pending(topic_worker, monkeypatch):
+    monkeypatch.setattr(worker_module, "iter_video_urls", lambda topic, pool: (url for url in []))
+    assert discover(topic_worker) == {TOPIC: {"pending": 1}}
+
+
+def test_discovery_error_leaves_topic_pending(topic_worker, monkeypatch):
+    def broken_search(topic, pool):
+        yield "https://www.youtube.com/watch?v=video000000"
+        raise RuntimeError("driver crashed")
+
+    monkeypatch.setattr(worker_module, "iter_video_urls", broken_search)
+    assert discover(topic_worker) == {TOPIC: {"pending": 1}, VIDEO: {"pending": 1}}